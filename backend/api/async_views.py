@@ -0,0 +1,211 @@
+"""Асинхронные версии нагруженных GET-эндпоинтов для запуска под ASGI.
+
+Подключаются в foodgram.asgi_urls и отдают те же данные, что и вьюсеты
+DRF. Изменяющие запросы и режимы, которые здесь не поддержаны (например,
+курсорная пагинация), передаются синхронным вьюсетам.
+"""
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+from django.http import HttpResponse
+from django_filters.utils import translate_validation
+from rest_framework import exceptions, status
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+from foodgram.routers import use_primary
+from recipes.models import Ingredients, Recipes, Tags
+from users.authentication import CachedTokenAuthentication, local_user
+
+from .filters import RecipeFilter
+from .indexes import ingredient_index
+from .metrics import timed_serializer
+from .mixins import not_modified, reference_cache_key, reference_headers
+from .pagination import RecipePagination
+from .querysets import recipes_for_user
+from .renderers import FastJSONRenderer
+from .serializers import RecipesSerializer, TagsSerializer
+from .views import IngredientViewSet, RecipeViewSet, TagViewSet
+
+
+def render(data, status_code=status.HTTP_200_OK, headers=None):
+    """JSON-ответ в том же виде, что отдаёт JSONRenderer в DRF."""
+    response = HttpResponse(
+        FastJSONRenderer().render(data),
+        content_type='application/json',
+        status=status_code,
+    )
+    for header, value in (headers or {}).items():
+        response[header] = value
+    return response
+
+
+def render_error(error):
+    headers = {}
+    if isinstance(error, (exceptions.NotAuthenticated,
+                          exceptions.AuthenticationFailed)):
+        headers['WWW-Authenticate'] = 'Token'
+    data = error.detail
+    if not isinstance(data, (list, dict)):
+        data = {'detail': data}
+    return render(data, error.status_code, headers)
+
+
+async def authenticate(request):
+    """Асинхронный аналог CachedTokenAuthentication."""
+    auth = request.headers.get('Authorization', '').split()
+    if not auth or auth[0].lower() != 'token':
+        return AnonymousUser()
+    if len(auth) != 2:
+        raise exceptions.AuthenticationFailed(
+            'Invalid token header. No credentials provided.'
+        )
+    user = local_user(auth[1])
+    if user is not None:
+        return user
+    user, _ = await sync_to_async(
+        CachedTokenAuthentication().authenticate_credentials
+    )(auth[1])
+    return user
+
+
+def async_read_view(sync_view):
+    """Асинхронная обработка GET с передачей остальных методов sync_view.
+
+    Сама вьюха получает аутентифицированный request.user и функцию
+    fallback, через которую может отдать запрос синхронному вьюсету.
+    """
+    def decorator(view):
+        @wraps(view)
+        async def wrapper(request, *args, **kwargs):
+            async def fallback():
+                return await sync_to_async(sync_view)(
+                    request, *args, **kwargs
+                )
+
+            if request.method != 'GET':
+                return await fallback()
+            try:
+                request.user = await authenticate(request)
+                return await view(request, fallback, *args, **kwargs)
+            except exceptions.APIException as error:
+                return render_error(error)
+
+        # csrf_exempt в Django 4.2 не поддерживает корутины.
+        wrapper.csrf_exempt = True
+        return wrapper
+    return decorator
+
+
+async def cached_reference(request, model, load, params=None):
+    """Справочник из кеша с заголовками версии и ответом 304."""
+    version, headers = await sync_to_async(reference_headers)(model)
+    response = not_modified(request, version, headers)
+    if response is not None:
+        return response
+    key = reference_cache_key(model, version, request, params)
+    data = await cache.aget(key)
+    if data is None:
+        with use_primary():
+            data = await load()
+        await cache.aset(key, data, settings.REFERENCE_CACHE_TIMEOUT)
+    return render(data, headers=headers)
+
+
+def filter_recipes(request):
+    filterset = RecipeFilter(
+        request.GET, queryset=recipes_for_user(request.user),
+        request=request,
+    )
+    if not filterset.is_valid():
+        raise translate_validation(filterset.errors)
+    return filterset.qs
+
+
+def page_link(request, number, last):
+    if number < 1 or number > last:
+        return None
+    url = request.build_absolute_uri()
+    if number == 1:
+        return remove_query_param(url, 'page')
+    return replace_query_param(url, 'page', number)
+
+
+@async_read_view(RecipeViewSet.as_view({'get': 'list', 'post': 'create'}))
+async def recipe_list(request, fallback):
+    if RecipePagination.uses_cursor(request.GET):
+        return await fallback()
+    queryset = await sync_to_async(filter_recipes)(request)
+    page_size = settings.REST_FRAMEWORK['PAGE_SIZE']
+    count = await queryset.acount()
+    last = max((count + page_size - 1) // page_size, 1)
+    number = request.GET.get('page', '1')
+    if number == 'last':
+        number = str(last)
+    if not number.isdigit() or not 1 <= int(number) <= last:
+        raise exceptions.NotFound('Invalid page.')
+    number = int(number)
+    offset = (number - 1) * page_size
+    recipes = [
+        recipe async for recipe in queryset[offset:offset + page_size]
+    ]
+    return render({
+        'count': count,
+        'next': page_link(request, number + 1, last),
+        'previous': page_link(request, number - 1, last),
+        'results': timed_serializer(RecipesSerializer(
+            recipes, many=True, context={'request': request}
+        )).data,
+    })
+
+
+@async_read_view(RecipeViewSet.as_view({
+    'get': 'retrieve',
+    'put': 'update',
+    'patch': 'partial_update',
+    'delete': 'destroy',
+}))
+async def recipe_detail(request, fallback, pk):
+    try:
+        recipe = await recipes_for_user(request.user).aget(pk=pk)
+    except Recipes.DoesNotExist:
+        raise exceptions.NotFound()
+    return render(timed_serializer(RecipesSerializer(
+        recipe, context={'request': request}
+    )).data)
+
+
+@async_read_view(TagViewSet.as_view({'get': 'list'}))
+async def tag_list(request, fallback):
+    async def load():
+        tags = [tag async for tag in Tags.objects.all()]
+        return timed_serializer(TagsSerializer(tags, many=True)).data
+
+    return await cached_reference(request, Tags, load)
+
+
+@async_read_view(IngredientViewSet.as_view({'get': 'list'}))
+async def ingredient_list(request, fallback):
+    name = request.GET.get('name')
+    limit = request.GET.get('limit')
+    if name is not None and limit is not None and not limit.isdigit():
+        raise exceptions.ValidationError(
+            'limit должен быть положительным числом.'
+        )
+
+    async def load():
+        if name is None:
+            return [
+                row async for row in Ingredients.objects.values(
+                    'id', 'name', 'measurement_unit'
+                )
+            ]
+        return await sync_to_async(ingredient_index.search)(
+            name, limit and int(limit)
+        )
+
+    return await cached_reference(
+        request, Ingredients, load, IngredientViewSet.cache_params
+    )
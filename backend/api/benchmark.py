@@ -0,0 +1,89 @@
+"""Простой нагрузочный драйвер: пропускная способность и перцентили."""
+import http.client
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+PERCENTILES = (50, 95, 99)
+
+
+def percentile(values, percent):
+    """Перцентиль по отсортированному списку методом ближайшего ранга."""
+    if not values:
+        return 0.0
+    index = max(int(round(percent / 100 * len(values))) - 1, 0)
+    return values[min(index, len(values) - 1)]
+
+
+def run_benchmark(request, total, concurrency):
+    """Выполняет request() total раз в concurrency потоках.
+
+    request возвращает код ответа или любой результат, по которому
+    определяется ошибка: исключение или код 400 и выше.
+    Возвращает словарь со статистикой, время указано в миллисекундах.
+    """
+    timings = []
+    errors = 0
+    lock = threading.Lock()
+
+    def worker(_):
+        nonlocal errors
+        started = time.perf_counter()
+        try:
+            failed = request() >= 400
+        except Exception:
+            failed = True
+        elapsed = (time.perf_counter() - started) * 1000
+        with lock:
+            timings.append(elapsed)
+            errors += failed
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        list(executor.map(worker, range(total)))
+    duration = time.perf_counter() - started
+    timings.sort()
+    stats = {
+        'requests': total,
+        'errors': errors,
+        'rps': total / duration if duration else 0.0,
+    }
+    for percent in PERCENTILES:
+        stats[f'p{percent}'] = percentile(timings, percent)
+    return stats
+
+
+def http_request(base_url, path, headers=None):
+    """Функция для run_benchmark с keep-alive соединением на поток."""
+    url = urlsplit(base_url)
+    connection_class = (http.client.HTTPSConnection
+                        if url.scheme == 'https'
+                        else http.client.HTTPConnection)
+    local = threading.local()
+    target = url.path.rstrip('/') + path
+
+    def request():
+        connection = getattr(local, 'connection', None)
+        if connection is None:
+            connection = local.connection = connection_class(url.netloc)
+        try:
+            connection.request('GET', target, headers=headers or {})
+            response = connection.getresponse()
+            response.read()
+        except (OSError, http.client.HTTPException):
+            connection.close()
+            local.connection = None
+            raise
+        return response.status
+    return request
+
+
+def format_stats(name, stats):
+    line = (f'{name}: {stats["rps"]:.1f} rps, '
+            + ', '.join(f'p{percent} {stats[f"p{percent}"]:.1f} мс'
+                        for percent in PERCENTILES)
+            + f', ошибок {stats["errors"]} из {stats["requests"]}')
+    if 'queries' in stats:
+        line += f', запросов к БД {stats["queries"]:.1f}'
+    return line
@@ -1,7 +1,9 @@
 import django_filters
+from django.db.models import Exists, OuterRef
 from django_filters import filters
 
 from recipes.models import Ingredients, Recipes, Tags
+from recipes.search import search_recipes
 
 
 class IngredientFilter(django_filters.FilterSet):
@@ -19,15 +21,32 @@ class RecipeFilter(django_filters.FilterSet):
         queryset=Tags.objects.all(),
         field_name='tags__slug',
         to_field_name='slug',
+        method='filter_tags',
     )
     is_favorited = filters.NumberFilter(method='filter_is_favorited')
     is_in_shopping_cart = filters.NumberFilter(
         method='filter_is_in_shopping_cart'
     )
+    search = filters.CharFilter(method='filter_search')
+    ordering = filters.ChoiceFilter(
+        choices=(('trending', 'популярные'),),
+        method='filter_ordering',
+    )
 
     class Meta:
         model = Recipes
-        fields = ('author', 'tags', 'is_favorited', 'is_in_shopping_cart')
+        fields = ('author', 'tags', 'is_favorited', 'is_in_shopping_cart',
+                  'search', 'ordering')
+
+    def filter_tags(self, queryset, name, value):
+        """Полусоединение с таблицей связей вместо JOIN и DISTINCT."""
+        if not value:
+            return queryset
+        return queryset.filter(Exists(
+            Recipes.tags.through.objects.filter(
+                recipes=OuterRef('pk'), tags__in=value
+            )
+        ))
 
     def filter_is_favorited(self, queryset, name, value):
         if value and self.request.user.is_authenticated:
@@ -40,3 +59,14 @@ class RecipeFilter(django_filters.FilterSet):
                 shoppingcartrecipe__user=self.request.user.pk
             )
         return queryset
+
+    def filter_search(self, queryset, name, value):
+        if not value.strip():
+            return queryset
+        return search_recipes(queryset, value)
+
+    def filter_ordering(self, queryset, name, value):
+        """Только рецепты из рейтинга, по убыванию популярности."""
+        return queryset.filter(trending__isnull=False).order_by(
+            '-trending__score', '-id'
+        )
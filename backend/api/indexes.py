@@ -0,0 +1,191 @@
+import threading
+from bisect import bisect_left
+from collections import Counter
+
+from django.conf import settings
+
+from recipes.changes import changes_since, latest_change
+from recipes.models import Ingredients, IngredientsRecipes
+from recipes.versions import get_version
+
+CHANGES_OVERLAP = 1000
+
+
+def normalize(value):
+    return value.strip().casefold().replace('ё', 'е')
+
+
+class IngredientIndex:
+    """Индекс ингредиентов в памяти процесса для автодополнения.
+
+    Хранит отсортированные нормализованные названия: совпадения по
+    префиксу находятся двоичным поиском, затем добираются совпадения
+    по подстроке. Перестраивается при смене версии ингредиентов.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._version = None
+        self._keys = []
+        self._rows = []
+
+    def _refresh(self):
+        version = get_version(Ingredients)
+        if version == self._version:
+            return
+        with self._lock:
+            if version == self._version:
+                return
+            rows = sorted(
+                Ingredients.objects.using('default').values(
+                    'id', 'name', 'measurement_unit'
+                ),
+                key=lambda row: (normalize(row['name']), row['id'])
+            )
+            self._keys = [normalize(row['name']) for row in rows]
+            self._rows = rows
+            self._version = version
+
+    def search(self, query, limit=None):
+        self._refresh()
+        keys, rows = self._keys, self._rows
+        query = normalize(query)
+        start = bisect_left(keys, query)
+        end = bisect_left(keys, query + '\U0010ffff', start)
+        result = rows[start:end][:limit]
+        if not query or (limit is not None and len(result) >= limit):
+            return result
+        for key, row in zip(keys, rows):
+            if query in key and not key.startswith(query):
+                result.append(row)
+                if limit is not None and len(result) >= limit:
+                    break
+        return result
+
+
+ingredient_index = IngredientIndex()
+
+
+class RecipeCoverageIndex:
+    """Инвертированный индекс «ингредиент → рецепты» в памяти процесса.
+
+    Отвечает, какие рецепты можно приготовить из набора ингредиентов:
+    сколько ингредиентов рецепта есть и скольких не хватает. Изменения
+    рецептов всех процессов читаются из журнала RecipeChange и
+    применяются точечно. Индекс перестраивается целиком, только если
+    журнал обрезан дальше прочитанного места или в нём есть отметка
+    о массовом изменении.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._version = None
+        self._seen = set()
+        self._recipes = {}
+        self._ingredients = {}
+
+    def _rebuild(self):
+        version = latest_change()
+        recipes = {}
+        rows = IngredientsRecipes.objects.using('default').values_list(
+            'recipes_id', 'ingredients_id'
+        ).order_by()
+        for recipe, ingredient in rows.iterator():
+            recipes.setdefault(recipe, set()).add(ingredient)
+        self._recipes = {}
+        self._ingredients = {}
+        for recipe, ingredients in recipes.items():
+            self._add(recipe, ingredients)
+        self._version = version
+        self._seen = {
+            change
+            for change, _ in changes_since(version - CHANGES_OVERLAP)
+            if change <= version
+        }
+
+    def _unseen_from(self):
+        """Номер, после которого в журнале могут быть непрочитанные записи.
+
+        Транзакции фиксируются не в порядке номеров записей, поэтому
+        пропуски среди последних CHANGES_OVERLAP номеров перечитываются,
+        пока не заполнятся или не станут старше окна.
+        """
+        for change in range(
+            max(self._version - CHANGES_OVERLAP + 1, 1), self._version + 1
+        ):
+            if change not in self._seen:
+                return change - 1
+        return self._version
+
+    def _refresh(self):
+        with self._lock:
+            if self._version is None:
+                self._rebuild()
+                return
+            changes = [
+                (change, recipe)
+                for change, recipe in changes_since(self._unseen_from())
+                if change not in self._seen
+            ]
+            if not changes:
+                return
+            latest = changes[-1][0]
+            if (
+                latest - settings.RECIPE_CHANGES_KEEP > self._version
+                or any(recipe is None for _, recipe in changes)
+            ):
+                self._rebuild()
+                return
+            self._reload({recipe for _, recipe in changes})
+            self._version = max(self._version, latest)
+            self._seen.update(change for change, _ in changes)
+            self._seen = {
+                change for change in self._seen
+                if change > self._version - CHANGES_OVERLAP
+            }
+
+    def _add(self, recipe, ingredients):
+        self._recipes[recipe] = frozenset(ingredients)
+        for ingredient in ingredients:
+            self._ingredients.setdefault(ingredient, set()).add(recipe)
+
+    def _remove(self, recipe):
+        for ingredient in self._recipes.pop(recipe, ()):
+            recipes = self._ingredients[ingredient]
+            recipes.discard(recipe)
+            if not recipes:
+                del self._ingredients[ingredient]
+
+    def _reload(self, recipes):
+        ingredients = {}
+        rows = IngredientsRecipes.objects.using('default').filter(
+            recipes_id__in=recipes
+        ).values_list('recipes_id', 'ingredients_id').order_by()
+        for recipe, ingredient in rows:
+            ingredients.setdefault(recipe, set()).add(ingredient)
+        for recipe in recipes:
+            self._remove(recipe)
+            if recipe in ingredients:
+                self._add(recipe, ingredients[recipe])
+
+    def sync(self):
+        """Применяет новые записи журнала, если индекс уже построен."""
+        if self._version is not None:
+            self._refresh()
+
+    def search(self, ingredients):
+        """Список (id рецепта, есть ингредиентов, не хватает)."""
+        self._refresh()
+        with self._lock:
+            covered = Counter()
+            for ingredient in set(ingredients):
+                covered.update(self._ingredients.get(ingredient, ()))
+            result = [
+                (recipe, count, len(self._recipes[recipe]) - count)
+                for recipe, count in covered.items()
+            ]
+        result.sort(key=lambda item: (-item[1], item[2], -item[0]))
+        return result
+
+
+coverage_index = RecipeCoverageIndex()
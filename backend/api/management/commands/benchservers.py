@@ -0,0 +1,42 @@
+from django.core.management.base import BaseCommand
+
+from api.benchmark import format_stats, http_request, run_benchmark
+
+DEFAULT_PATHS = (
+    '/api/recipes/',
+    '/api/recipes/?page=2',
+    '/api/tags/',
+    '/api/ingredients/?name=%D1%81%D0%B0',
+)
+
+
+class Command(BaseCommand):
+    """Сравнение запущенных WSGI- и ASGI-серверов на GET-эндпоинтах."""
+    help = 'Сравнение запущенных WSGI- и ASGI-серверов на GET-эндпоинтах'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--wsgi-url', default='http://127.0.0.1:8000')
+        parser.add_argument('--asgi-url', default='http://127.0.0.1:8001')
+        parser.add_argument(
+            '--path', action='append', dest='paths',
+            help='Путь для проверки, можно указать несколько раз'
+        )
+        parser.add_argument('--requests', type=int, default=500)
+        parser.add_argument('--concurrency', type=int, default=20)
+        parser.add_argument('--token', help='Токен для авторизации')
+
+    def handle(self, *args, **options):
+        headers = {}
+        if options['token']:
+            headers['Authorization'] = f'Token {options["token"]}'
+        servers = (('WSGI', options['wsgi_url']),
+                   ('ASGI', options['asgi_url']))
+        for path in options['paths'] or DEFAULT_PATHS:
+            self.stdout.write(path)
+            for name, url in servers:
+                stats = run_benchmark(
+                    http_request(url, path, headers),
+                    options['requests'],
+                    options['concurrency'],
+                )
+                self.stdout.write(f'  {format_stats(name, stats)}')
@@ -0,0 +1,273 @@
+import base64
+import io
+import itertools
+import threading
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import Count
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from PIL import Image
+from rest_framework.authtoken.models import Token
+
+from api.benchmark import format_stats, run_benchmark
+from recipes.generators import DEFAULT_PASSWORD
+from recipes.models import Ingredients, Recipes, Tags
+
+User = get_user_model()
+
+
+def fetch(client, method, path, data=None):
+    """Выполняет запрос и дочитывает потоковый ответ."""
+    if method == 'get':
+        response = client.get(path)
+    else:
+        response = getattr(client, method)(
+            path, data, content_type='application/json'
+        )
+    if response.streaming:
+        b''.join(response.streaming_content)
+    return response.status_code
+
+
+def get(path):
+    return lambda client, number: fetch(client, 'get', path)
+
+
+def toggle(path, pool, field=None):
+    """POST и DELETE по очередному объекту из pool.
+
+    Без field объект подставляется в путь, с field передаётся
+    списком в теле запроса пакетного эндпоинта.
+    """
+    def step(client, number):
+        target = pool[number % len(pool)]
+        if field is None:
+            url, data = path.format(target), None
+        else:
+            url, data = path, {field: [target]}
+        return max(fetch(client, 'post', url, data),
+                   fetch(client, 'delete', url, data))
+    return step
+
+
+class Command(BaseCommand):
+    """Нагрузочный прогон всех эндпоинтов api и users внутри процесса.
+
+    Запросы выполняются тестовым клиентом Django по текущей базе, для
+    каждого эндпоинта выводятся запросы в секунду, перцентили задержки и
+    среднее число SQL-запросов. Изменяющие запросы выполняются парами
+    (добавление и удаление), поэтому данные после прогона не меняются.
+    """
+    help = 'Нагрузочный прогон всех эндпоинтов api и users'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=100)
+        parser.add_argument('--concurrency', type=int, default=1)
+        parser.add_argument(
+            '--email', help='Пользователь, от имени которого идут запросы'
+        )
+        parser.add_argument(
+            '--password', default=DEFAULT_PASSWORD,
+            help='Пароль сгенерированных пользователей для проверки входа'
+        )
+        parser.add_argument(
+            '--only', help='Проверять только эндпоинты, содержащие строку'
+        )
+
+    def handle(self, *args, **options):
+        user = self.get_user(options['email'])
+        token, _ = Token.objects.get_or_create(user=user)
+        host = next((host for host in settings.ALLOWED_HOSTS
+                     if host != '*' and not host.startswith('.')),
+                    'localhost')
+        defaults = {
+            True: {'SERVER_NAME': host},
+            False: {'SERVER_NAME': host,
+                    'HTTP_AUTHORIZATION': f'Token {token.key}'},
+        }
+        for name, step, anonymous in self.get_scenarios(user, options):
+            if options['only'] and options['only'] not in name:
+                continue
+            queries = []
+            stats = run_benchmark(
+                self.measured(step, defaults[anonymous], queries),
+                options['requests'],
+                options['concurrency'],
+            )
+            stats['queries'] = sum(queries) / len(queries)
+            self.stdout.write(format_stats(name, stats))
+
+    def measured(self, step, defaults, queries):
+        local = threading.local()
+        numbers = itertools.count()
+
+        def request():
+            client = getattr(local, 'client', None)
+            if client is None:
+                client = local.client = Client(**defaults)
+            with CaptureQueriesContext(connection) as context:
+                try:
+                    return step(client, next(numbers))
+                finally:
+                    queries.append(len(context))
+        return request
+
+    def get_user(self, email):
+        if email:
+            user = User.objects.filter(email=email).first()
+        else:
+            user = User.objects.annotate(
+                subscriptions=Count('follower')
+            ).order_by('-subscriptions', 'pk').first()
+        if user is None:
+            raise CommandError(
+                'Пользователь не найден, сначала выполните generatedata.'
+            )
+        return user
+
+    def get_scenarios(self, user, options):
+        recipe = Recipes.objects.order_by('-favorites_count').first()
+        tag = Tags.objects.first()
+        ingredients = list(Ingredients.objects.annotate(
+            recipes_count=Count('ingredients')
+        ).order_by('-recipes_count').values_list('pk', flat=True)[:5])
+        if recipe is None or not ingredients:
+            raise CommandError('Нет рецептов, сначала выполните generatedata.')
+        pages = max(Recipes.objects.count() // 6 // 2, 1)
+        word = recipe.name.split()[0]
+        pool = max(options['requests'], options['concurrency'] * 2)
+        not_favorited = list(Recipes.objects.exclude(
+            favoriterecipe__user=user
+        ).values_list('pk', flat=True)[:pool])
+        not_in_cart = list(Recipes.objects.exclude(
+            shoppingcartrecipe__user=user
+        ).values_list('pk', flat=True)[:pool])
+        not_followed = list(User.objects.exclude(
+            following__user=user
+        ).exclude(pk=user.pk).values_list('pk', flat=True)[:pool])
+        others = list(User.objects.exclude(pk=user.pk).filter(
+            email__endswith='@example.com'
+        ).values_list('email', flat=True)[:pool])
+        reads = [
+            ('GET /api/recipes/ (аноним)', get('/api/recipes/'), True),
+            ('GET /api/recipes/', get('/api/recipes/'), False),
+            (f'GET /api/recipes/?page={pages}',
+             get(f'/api/recipes/?page={pages}'), False),
+            ('GET /api/recipes/?cursor=', get('/api/recipes/?cursor='),
+             False),
+            ('GET /api/recipes/?is_favorited=1',
+             get('/api/recipes/?is_favorited=1'), False),
+            ('GET /api/recipes/?is_in_shopping_cart=1',
+             get('/api/recipes/?is_in_shopping_cart=1'), False),
+            ('GET /api/recipes/?ordering=trending',
+             get('/api/recipes/?ordering=trending'), False),
+            (f'GET /api/recipes/?search={word}',
+             get(f'/api/recipes/?search={word}'), False),
+            (f'GET /api/recipes/{recipe.pk}/',
+             get(f'/api/recipes/{recipe.pk}/'), False),
+            ('GET /api/recipes/cookable/', get(
+                '/api/recipes/cookable/?ingredients='
+                + ','.join(map(str, ingredients))
+            ), False),
+            ('GET /api/recipes/download_shopping_cart/',
+             get('/api/recipes/download_shopping_cart/'), False),
+            ('GET /api/recipes/shopping_cart/totals/',
+             get('/api/recipes/shopping_cart/totals/'), False),
+            ('GET /api/tags/', get('/api/tags/'), False),
+            ('GET /api/ingredients/', get('/api/ingredients/'), False),
+            ('GET /api/ingredients/?name=',
+             get(f'/api/ingredients/?name={word[:2]}'), False),
+            (f'GET /api/ingredients/{ingredients[0]}/',
+             get(f'/api/ingredients/{ingredients[0]}/'), False),
+            ('GET /api/users/', get('/api/users/'), False),
+            ('GET /api/users/me/', get('/api/users/me/'), False),
+            (f'GET /api/users/{recipe.author_id}/',
+             get(f'/api/users/{recipe.author_id}/'), False),
+            ('GET /api/users/subscriptions/',
+             get('/api/users/subscriptions/'), False),
+        ]
+        if tag is not None:
+            reads += [
+                (f'GET /api/recipes/?tags={tag.slug}',
+                 get(f'/api/recipes/?tags={tag.slug}'), False),
+                (f'GET /api/tags/{tag.pk}/',
+                 get(f'/api/tags/{tag.pk}/'), False),
+            ]
+        writes = [
+            ('POST+DELETE /api/recipes/{id}/favorite/',
+             toggle('/api/recipes/{}/favorite/', not_favorited), False),
+            ('POST+DELETE /api/recipes/favorite/',
+             toggle('/api/recipes/favorite/', not_favorited, 'recipes'),
+             False),
+            ('POST+DELETE /api/recipes/{id}/shopping_cart/',
+             toggle('/api/recipes/{}/shopping_cart/', not_in_cart), False),
+            ('POST+DELETE /api/recipes/shopping_cart/',
+             toggle('/api/recipes/shopping_cart/', not_in_cart, 'recipes'),
+             False),
+            ('POST+DELETE /api/users/{id}/subscribe/',
+             toggle('/api/users/{}/subscribe/', not_followed), False),
+            ('POST+DELETE /api/users/subscribe/',
+             toggle('/api/users/subscribe/', not_followed, 'authors'),
+             False),
+            ('POST+PATCH+DELETE /api/recipes/',
+             self.recipe_crud(tag, ingredients), False),
+        ]
+        if others:
+            writes.append((
+                'POST /api/auth/token/login/+logout/',
+                self.login(others, options['password']), True
+            ))
+        return reads + writes
+
+    def recipe_crud(self, tag, ingredients):
+        buffer = io.BytesIO()
+        Image.new('RGB', (64, 64), (200, 120, 40)).save(buffer, 'JPEG')
+        payload = {
+            'name': 'Нагрузочный рецепт',
+            'text': 'Создан командой loadtest.',
+            'cooking_time': 10,
+            'tags': [tag.pk] if tag is not None else [],
+            'ingredients': [{'id': pk, 'amount': 10} for pk in ingredients],
+            'image': 'data:image/jpeg;base64,'
+                     + base64.b64encode(buffer.getvalue()).decode(),
+        }
+
+        edited = payload['ingredients'][1:] or payload['ingredients']
+
+        def step(client, number):
+            response = client.post(
+                '/api/recipes/', payload, content_type='application/json'
+            )
+            if response.status_code >= 400:
+                return response.status_code
+            url = f'/api/recipes/{response.json()["id"]}/'
+            return max(
+                response.status_code,
+                fetch(client, 'patch', url, {
+                    **payload,
+                    'cooking_time': 20,
+                    'ingredients': edited,
+                }),
+                fetch(client, 'delete', url),
+            )
+        return step
+
+    def login(self, emails, password):
+        def step(client, number):
+            response = client.post(
+                '/api/auth/token/login/',
+                {'email': emails[number % len(emails)], 'password': password},
+                content_type='application/json',
+            )
+            if response.status_code >= 400:
+                return response.status_code
+            token = response.json()['auth_token']
+            return max(response.status_code, client.post(
+                '/api/auth/token/logout/',
+                HTTP_AUTHORIZATION=f'Token {token}',
+            ).status_code)
+        return step
@@ -0,0 +1,238 @@
+"""Метрики запросов: время SQL, сериализации, рендеринга и ответа.
+
+Гистограммы хранятся в памяти процесса и отдаются в текстовом формате
+Prometheus. При нескольких воркерах gunicorn у каждого свои значения.
+"""
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+TIME_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+QUERY_BUCKETS = (1, 2, 3, 5, 8, 13, 21, 34, 55, 89)
+
+current_timings = ContextVar('current_timings', default=None)
+
+
+class RequestTimings:
+    """Счётчики одного запроса, которые пополняются по ходу обработки."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.queries = 0
+        self.db = 0.0
+        self.serialize = 0.0
+        self.serializing = False
+        self.render = 0.0
+        self.render_started = None
+
+    @property
+    def total(self):
+        return time.perf_counter() - self.started
+
+    def app(self, total):
+        """Время кода вьюхи без SQL, сериализации и рендеринга."""
+        return max(total - self.db - self.serialize - self.render, 0)
+
+    def server_timing(self, total):
+        """Значение заголовка Server-Timing, время в миллисекундах."""
+        return ', '.join((
+            f'db;desc="{self.queries} queries";dur={self.db * 1000:.1f}',
+            f'app;dur={self.app(total) * 1000:.1f}',
+            f'serialize;dur={self.serialize * 1000:.1f}',
+            f'render;dur={self.render * 1000:.1f}',
+            f'total;dur={total * 1000:.1f}',
+        ))
+
+
+@contextmanager
+def serializing():
+    """Учитывает время блока как сериализацию, без времени SQL.
+
+    Вложенные блоки отдельно не считаются.
+    """
+    timings = current_timings.get()
+    if timings is None or timings.serializing:
+        yield
+        return
+    timings.serializing = True
+    started, db = time.perf_counter(), timings.db
+    try:
+        yield
+    finally:
+        timings.serializing = False
+        timings.serialize += (
+            time.perf_counter() - started - (timings.db - db)
+        )
+
+
+class TimedDataMixin:
+    """Сериализатор, чьё свойство data учитывается как сериализация."""
+
+    @property
+    def data(self):
+        with serializing():
+            return super().data
+
+
+timed_classes = {}
+
+
+def timed_serializer(serializer):
+    """Подменяет класс сериализатора на наследника с TimedDataMixin."""
+    if isinstance(serializer, TimedDataMixin):
+        return serializer
+    serializer_class = type(serializer)
+    timed_class = timed_classes.get(serializer_class)
+    if timed_class is None:
+        timed_class = timed_classes.setdefault(serializer_class, type(
+            serializer_class.__name__,
+            (TimedDataMixin, serializer_class),
+            {'__module__': serializer_class.__module__},
+        ))
+    serializer.__class__ = timed_class
+    return serializer
+
+
+def record_query(execute, sql, params, many, context):
+    """Обёртка execute_wrapper: учитывает запрос в текущих счётчиках."""
+    timings = current_timings.get()
+    if timings is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        timings.db += time.perf_counter() - started
+        timings.queries += 1
+
+
+def install_query_recorder(sender, connection, **kwargs):
+    """Подключает record_query к каждому новому соединению с БД."""
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
+
+
+def format_labels(labels):
+    if not labels:
+        return ''
+    return '{' + ','.join(
+        f'{name}="{value}"' for name, value in labels
+    ) + '}'
+
+
+def format_value(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Histogram:
+    def __init__(self, name, documentation, buckets, labels=('view',)):
+        self.name = name
+        self.documentation = documentation
+        self.buckets = tuple(buckets)
+        self.labels = labels
+        self.values = {}
+        self.lock = threading.Lock()
+
+    def observe(self, value, *labels):
+        with self.lock:
+            counts, total = self.values.get(
+                labels, ([0] * (len(self.buckets) + 1), 0)
+            )
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[index] += 1
+                    break
+            else:
+                counts[-1] += 1
+            self.values[labels] = (counts, total + value)
+
+    def collect(self):
+        yield f'# HELP {self.name} {self.documentation}'
+        yield f'# TYPE {self.name} histogram'
+        with self.lock:
+            values = {
+                labels: (list(counts), total)
+                for labels, (counts, total) in self.values.items()
+            }
+        for labels, (counts, total) in sorted(values.items()):
+            pairs = list(zip(self.labels, labels))
+            cumulative = 0
+            for bound, count in zip(self.buckets + ('+Inf',), counts):
+                cumulative += count
+                bucket = format_labels(pairs + [('le', bound)])
+                yield f'{self.name}_bucket{bucket} {cumulative}'
+            yield (f'{self.name}_sum{format_labels(pairs)} '
+                   f'{format_value(total)}')
+            yield f'{self.name}_count{format_labels(pairs)} {cumulative}'
+
+
+class Counter:
+    def __init__(self, name, documentation, labels=('view',)):
+        self.name = name
+        self.documentation = documentation
+        self.labels = labels
+        self.values = {}
+        self.lock = threading.Lock()
+
+    def inc(self, *labels):
+        with self.lock:
+            self.values[labels] = self.values.get(labels, 0) + 1
+
+    def collect(self):
+        yield f'# HELP {self.name} {self.documentation}'
+        yield f'# TYPE {self.name} counter'
+        with self.lock:
+            values = dict(self.values)
+        for labels, value in sorted(values.items()):
+            pairs = list(zip(self.labels, labels))
+            yield f'{self.name}{format_labels(pairs)} {value}'
+
+
+REQUEST_DURATION = Histogram(
+    'foodgram_request_duration_seconds',
+    'Полное время обработки запроса.', TIME_BUCKETS,
+)
+APP_DURATION = Histogram(
+    'foodgram_request_app_duration_seconds',
+    'Время кода вьюхи без SQL, сериализации и рендеринга.', TIME_BUCKETS,
+)
+SERIALIZE_DURATION = Histogram(
+    'foodgram_request_serialize_duration_seconds',
+    'Время сериализаторов без SQL.', TIME_BUCKETS,
+)
+DB_DURATION = Histogram(
+    'foodgram_request_db_duration_seconds',
+    'Суммарное время SQL-запросов за запрос.', TIME_BUCKETS,
+)
+DB_QUERIES = Histogram(
+    'foodgram_request_db_queries',
+    'Количество SQL-запросов за запрос.', QUERY_BUCKETS,
+)
+RENDER_DURATION = Histogram(
+    'foodgram_request_render_duration_seconds',
+    'Время рендеринга ответа.', TIME_BUCKETS,
+)
+RESPONSES = Counter(
+    'foodgram_responses_total',
+    'Количество ответов по коду статуса.', labels=('view', 'status'),
+)
+METRICS = (REQUEST_DURATION, APP_DURATION, SERIALIZE_DURATION, DB_DURATION,
+           DB_QUERIES, RENDER_DURATION, RESPONSES)
+
+
+def observe(view, status, timings, total):
+    REQUEST_DURATION.observe(total, view)
+    APP_DURATION.observe(timings.app(total), view)
+    SERIALIZE_DURATION.observe(timings.serialize, view)
+    DB_DURATION.observe(timings.db, view)
+    DB_QUERIES.observe(timings.queries, view)
+    RENDER_DURATION.observe(timings.render, view)
+    RESPONSES.inc(view, str(status))
+
+
+def export():
+    """Все метрики в текстовом формате Prometheus."""
+    return '\n'.join(
+        line for metric in METRICS for line in metric.collect()
+    ) + '\n'
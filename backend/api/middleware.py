@@ -0,0 +1,187 @@
+import hashlib
+import time
+from functools import partial
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured
+from django.http import FileResponse
+from rest_framework.permissions import SAFE_METHODS
+
+from foodgram.routers import RequestRouting, current_routing
+from recipes.versions import is_shared_cache
+
+from .metrics import RequestTimings, current_timings, observe
+
+REPLICA_APPS = ('api', 'users')
+PIN_COOKIE = 'primary_pin'
+
+
+def view_name(request):
+    """Имя вьюхи для метрик, например RecipeViewSet.list."""
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        return 'unmatched'
+    func = match.func
+    view_class = getattr(func, 'cls', None)
+    if view_class is None:
+        return f'{func.__module__}.{func.__name__}'
+    method = request.method.lower()
+    action = (getattr(func, 'actions', None) or {}).get(method, method)
+    return f'{view_class.__name__}.{action}'
+
+
+def rendered(timings, response):
+    timings.render += time.perf_counter() - timings.render_started
+
+
+class MetricsMiddleware:
+    """Время SQL, рендеринга и ответа для каждой вьюхи.
+
+    Значения отдаются клиенту в заголовке Server-Timing и копятся в
+    гистограммах для /metrics. Для потоковых ответов метрики
+    записываются, когда ответ отдан целиком, а заголовок содержит
+    только время до начала отдачи.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        timings = RequestTimings()
+        token = current_timings.set(timings)
+        try:
+            response = self.get_response(request)
+        finally:
+            current_timings.reset(token)
+        return self.finish(request, response, timings)
+
+    async def __acall__(self, request):
+        timings = RequestTimings()
+        token = current_timings.set(timings)
+        try:
+            response = await self.get_response(request)
+        finally:
+            current_timings.reset(token)
+        return self.finish(request, response, timings)
+
+    def process_template_response(self, request, response):
+        timings = current_timings.get()
+        if timings is not None:
+            timings.render_started = time.perf_counter()
+            response.add_post_render_callback(partial(rendered, timings))
+        return response
+
+    def finish(self, request, response, timings):
+        view = view_name(request)
+        total = timings.total
+        if settings.SERVER_TIMING:
+            response['Server-Timing'] = timings.server_timing(total)
+        if (response.streaming and not response.is_async
+                and not isinstance(response, FileResponse)):
+            response.streaming_content = self.stream(
+                response.streaming_content, view, response.status_code,
+                timings,
+            )
+        else:
+            observe(view, response.status_code, timings, total)
+        return response
+
+    def stream(self, content, view, status, timings):
+        current_timings.set(timings)
+        try:
+            yield from content
+        finally:
+            current_timings.set(None)
+            observe(view, status, timings, timings.total)
+
+
+def pin_key(request):
+    """Ключ пользователя по токену или сессии, без самих учётных данных."""
+    credentials = (request.headers.get('Authorization')
+                   or request.COOKIES.get(settings.SESSION_COOKIE_NAME))
+    if not credentials:
+        return None
+    digest = hashlib.sha256(credentials.encode()).hexdigest()
+    return f'primary-pin:{digest}'
+
+
+class ReplicaRoutingMiddleware:
+    """Чтение с реплик для безопасных запросов к вьюхам api и users.
+
+    После успешного изменяющего запроса пользователь на
+    REPLICA_PIN_SECONDS закрепляется за основной базой, чтобы сразу
+    видеть свои изменения, даже если реплика отстаёт. Закрепление
+    хранится в кеше по токену и дублируется cookie для клиентов,
+    которые её сохраняют. Клиенты с токеном без cookie закреплены,
+    только если кеш общий для всех воркеров, поэтому без него реплики
+    не включаются.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if settings.REPLICA_DATABASES and not is_shared_cache():
+            raise ImproperlyConfigured(
+                'Реплики требуют общего кеша (CACHE_BACKEND): в нём '
+                'хранится закрепление за основной базой по токену.'
+            )
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        token = current_routing.set(RequestRouting())
+        try:
+            response = self.get_response(request)
+        finally:
+            current_routing.reset(token)
+        return self.finish(request, response)
+
+    async def __acall__(self, request):
+        token = current_routing.set(RequestRouting())
+        try:
+            response = await self.get_response(request)
+        finally:
+            current_routing.reset(token)
+        return self.finish(request, response)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if (not settings.REPLICA_DATABASES
+                or request.method not in SAFE_METHODS
+                or self.is_pinned(request)):
+            return None
+        module = getattr(view_func, 'cls', view_func).__module__
+        if module.split('.')[0] in REPLICA_APPS:
+            current_routing.get().use_replica()
+        return None
+
+    def is_pinned(self, request):
+        if PIN_COOKIE in request.COOKIES:
+            return True
+        key = pin_key(request)
+        return key is not None and cache.get(key) is not None
+
+    def finish(self, request, response):
+        if (settings.REPLICA_DATABASES
+                and request.method not in SAFE_METHODS
+                and response.status_code < 400):
+            key = pin_key(request)
+            if key is not None:
+                cache.set(key, 1, settings.REPLICA_PIN_SECONDS)
+            response.set_cookie(
+                PIN_COOKIE, '1', max_age=settings.REPLICA_PIN_SECONDS,
+                httponly=True, samesite='Lax',
+            )
+        return response
@@ -0,0 +1,102 @@
+import hashlib
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.cache import get_conditional_response, quote_etag
+from django.utils.http import http_date
+from rest_framework import status
+from rest_framework.response import Response
+
+from foodgram.routers import use_primary
+from recipes.versions import get_version
+
+from .metrics import timed_serializer
+
+
+def normalize_number(value):
+    """Число без ведущих нулей; остальные строки без изменений."""
+    if value.isdigit():
+        return value.lstrip('0') or '0'
+    return value
+
+
+def reference_cache_key(model, version, request, params=None):
+    """Ключ кеша справочника по пути и нормализованным параметрам.
+
+    В ключ попадают только параметры из params, приведённые своими
+    функциями, а путь с параметрами хешируется. Произвольные строки
+    запроса не плодят записи в кеше и не удлиняют ключ.
+    """
+    query = urlencode(sorted(
+        (param, normalize(request.GET[param]))
+        for param, normalize in (params or {}).items()
+        if param in request.GET
+    ))
+    digest = hashlib.md5(f'{request.path}?{query}'.encode()).hexdigest()
+    return f'reference:{model._meta.label_lower}:{version}:{digest}'
+
+
+def reference_headers(model):
+    """Версия справочника и заголовки ETag и Last-Modified для неё."""
+    version = get_version(model)
+    return version, {
+        'ETag': quote_etag(f'{model._meta.label_lower}-{version}'),
+        'Last-Modified': http_date(version),
+    }
+
+
+def not_modified(request, version, headers):
+    """Ответ 304, если у клиента актуальная версия, иначе None."""
+    response = get_conditional_response(
+        request, etag=headers['ETag'], last_modified=int(version)
+    )
+    if response is not None:
+        for header, value in headers.items():
+            response[header] = value
+    return response
+
+
+class SerializerTimingMixin:
+    """Время сериализаторов вьюсета попадает в метрики отдельно."""
+
+    def get_serializer(self, *args, **kwargs):
+        return timed_serializer(super().get_serializer(*args, **kwargs))
+
+
+class ReferenceCacheMixin:
+    """Кеширование справочника и ответы 304 на условные GET-запросы.
+
+    Ответы хранятся в кеше под ключом с версией модели, поэтому
+    изменение любой строки справочника делает старые ответы и ETag
+    недействительными. Параметры запроса, влияющие на ответ, и функции
+    их нормализации перечисляются в cache_params.
+    """
+    cache_model = None
+    cache_params = {}
+
+    def list(self, request, *args, **kwargs):
+        return self.cached_response(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.cached_response(
+            super().retrieve, request, *args, **kwargs
+        )
+
+    def cached_response(self, view, request, *args, **kwargs):
+        version, headers = reference_headers(self.cache_model)
+        response = not_modified(request, version, headers)
+        if response is not None:
+            return response
+        key = reference_cache_key(
+            self.cache_model, version, request, self.cache_params
+        )
+        data = cache.get(key)
+        if data is None:
+            with use_primary():
+                response = view(request, *args, **kwargs)
+            if response.status_code != status.HTTP_200_OK:
+                return response
+            data = response.data
+            cache.set(key, data, settings.REFERENCE_CACHE_TIMEOUT)
+        return Response(data, headers=headers)
@@ -0,0 +1,96 @@
+from rest_framework.exceptions import ValidationError
+from rest_framework.pagination import (BasePagination, CursorPagination,
+                                       PageNumberPagination, _positive_int)
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import replace_query_param
+
+from recipes.feed import feed_recipe_ids
+
+
+class RecipeCursorPagination(CursorPagination):
+    """Курсорная пагинация по id без COUNT и OFFSET."""
+    ordering = '-id'
+    page_size_query_param = 'limit'
+    max_page_size = 100
+
+
+class RecipePagination(PageNumberPagination):
+    """Пагинация по номеру страницы с курсорным режимом по запросу.
+
+    Если в запросе передан параметр cursor (в том числе пустой для
+    первой страницы), выдача строится по курсору, иначе по page.
+    Результаты поиска и популярные рецепты упорядочены не по id,
+    поэтому для них всегда используется page.
+    """
+    cursor_query_param = RecipeCursorPagination.cursor_query_param
+    ordered_query_params = ('search', 'ordering')
+
+    @classmethod
+    def uses_cursor(cls, query_params):
+        return cls.cursor_query_param in query_params and not any(
+            query_params.get(param) for param in cls.ordered_query_params
+        )
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.cursor_paginator = None
+        if self.uses_cursor(request.query_params):
+            self.cursor_paginator = RecipeCursorPagination()
+            return self.cursor_paginator.paginate_queryset(
+                queryset, request, view
+            )
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        if self.cursor_paginator is not None:
+            return self.cursor_paginator.get_paginated_response(data)
+        return super().get_paginated_response(data)
+
+
+class FeedPagination(BasePagination):
+    """Keyset-пагинация ленты подписок по id рецепта.
+
+    Следующая страница запрашивается с before, равным id последнего
+    рецепта предыдущей, поэтому глубина листания не влияет на запрос.
+    """
+    page_size = api_settings.PAGE_SIZE
+    page_size_query_param = 'limit'
+    before_query_param = 'before'
+    max_page_size = 100
+
+    def paginate_feed(self, user, request):
+        """id рецептов страницы ленты пользователя."""
+        self.request = request
+        limit = self.get_page_size(request)
+        before = request.query_params.get(self.before_query_param)
+        if before is not None:
+            if not before.isdigit():
+                raise ValidationError(
+                    f'{self.before_query_param} должен быть id рецепта.'
+                )
+            before = int(before)
+        ids = feed_recipe_ids(user, limit + 1, before)
+        self.has_next = len(ids) > limit
+        return ids[:limit]
+
+    def get_page_size(self, request):
+        try:
+            return _positive_int(
+                request.query_params[self.page_size_query_param],
+                strict=True, cutoff=self.max_page_size,
+            )
+        except (KeyError, ValueError):
+            return self.page_size
+
+    def get_next_link(self, last):
+        if not self.has_next:
+            return None
+        return replace_query_param(
+            self.request.build_absolute_uri(), self.before_query_param, last
+        )
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(data[-1]['id'] if data else None),
+            'results': data,
+        })
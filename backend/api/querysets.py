@@ -0,0 +1,51 @@
+from django.contrib.auth import get_user_model
+from django.db.models import Exists, OuterRef, Prefetch, Value
+
+from recipes.models import Favorite, IngredientsRecipes, Recipes, ShoppingCart
+from users.models import Subscribe
+
+User = get_user_model()
+
+
+def users_for_user(user, queryset=None):
+    """Пользователи с флагом подписки на них, вычисленным в запросе."""
+    if queryset is None:
+        queryset = User.objects.all()
+    if not user.is_authenticated:
+        return queryset.annotate(is_subscribed=Value(False))
+    return queryset.annotate(is_subscribed=Exists(
+        Subscribe.objects.filter(user=user, author=OuterRef('pk'))
+    ))
+
+
+def recipes_for_user(user, queryset=None):
+    """Рецепты с флагами пользователя и связанными данными.
+
+    Флаги избранного, корзины и подписки на автора вычисляются в
+    запросах, а теги и ингредиенты подгружаются пачкой, поэтому
+    количество запросов не зависит от размера страницы.
+    """
+    if queryset is None:
+        queryset = Recipes.objects.defer('search_vector')
+    if user.is_authenticated:
+        queryset = queryset.annotate(
+            is_favorited=Exists(Favorite.objects.filter(
+                user=user, recipe=OuterRef('pk')
+            )),
+            is_in_shopping_cart=Exists(ShoppingCart.objects.filter(
+                user=user, recipe=OuterRef('pk')
+            )),
+        )
+    else:
+        queryset = queryset.annotate(
+            is_favorited=Value(False),
+            is_in_shopping_cart=Value(False),
+        )
+    return queryset.prefetch_related(
+        Prefetch('author', queryset=users_for_user(user)),
+        'tags',
+        Prefetch(
+            'ingredientsrecipes_set',
+            queryset=IngredientsRecipes.objects.select_related('ingredients')
+        ),
+    )
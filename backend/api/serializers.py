@@ -1,14 +1,24 @@
 import base64
+import binascii
+from tempfile import SpooledTemporaryFile
 
 import webcolors
-from django.core.files.base import ContentFile
+from django.conf import settings
+from django.core.files import File
+from django.db import transaction
+from django.db.models import Prefetch, prefetch_related_objects
 from rest_framework import serializers
 from rest_framework.serializers import ModelSerializer
 from rest_framework.validators import UniqueTogetherValidator
 
+from recipes.images import variant_names
 from recipes.models import Ingredients, IngredientsRecipes, Recipes, Tags
+from recipes.relations import ingredients_changed
+from recipes.totals import lock_recipes
 from users.serializers import CustomUserSerializer
 
+from .viewer import get_viewer
+
 
 class Hex2NameColor(serializers.Field):
     def to_representation(self, value):
@@ -31,11 +41,28 @@ class TagsSerializer(serializers.ModelSerializer):
 
 
 class Base64ImageField(serializers.ImageField):
+    """Картинка в base64, декодируемая по частям во временный файл."""
+    chunk_size = 64 * 1024
+
     def to_internal_value(self, data):
         if isinstance(data, str) and data.startswith('data:image'):
             format, imgstr = data.split(';base64,')
-            ext = format.split('/')[-1]
-            data = ContentFile(base64.b64decode(imgstr), name='temp.' + ext)
+            ext = ''.join(filter(str.isalnum, format.split('/')[-1]))
+            file = SpooledTemporaryFile(
+                max_size=settings.FILE_UPLOAD_MAX_MEMORY_SIZE
+            )
+            try:
+                for start in range(0, len(imgstr), self.chunk_size):
+                    chunk = base64.b64decode(
+                        imgstr[start:start + self.chunk_size]
+                    )
+                    file.write(chunk)
+            except binascii.Error:
+                raise serializers.ValidationError(
+                    'Некорректное изображение в base64'
+                )
+            file.seek(0)
+            data = File(file, name=f'image.{ext}')
         return super().to_internal_value(data)
 
 
@@ -88,7 +115,7 @@ class IngredientsRecipesSerializer(serializers.ModelSerializer):
 
 class IngredientsInRecipeSerializer(IngredientsRecipesSerializer):
     """Вспомогательный сериализатор для добавления ингредиентов"""
-    id = serializers.PrimaryKeyRelatedField(queryset=Ingredients.objects.all())
+    id = serializers.IntegerField()
 
     class Meta:
         model = IngredientsRecipes
@@ -100,6 +127,7 @@ class RecipesSerializer(serializers.ModelSerializer):
     author = CustomUserSerializer(read_only=True)
     tags = TagsSerializer(read_only=True, many=True)
     image = Base64ImageField()
+    image_variants = serializers.SerializerMethodField()
     ingredients = serializers.SerializerMethodField()
     is_favorited = serializers.SerializerMethodField()
     is_in_shopping_cart = serializers.SerializerMethodField()
@@ -107,23 +135,37 @@ class RecipesSerializer(serializers.ModelSerializer):
     class Meta:
         model = Recipes
         fields = ['id', 'tags', 'author', 'ingredients', 'is_favorited',
-                  'is_in_shopping_cart', 'name', 'image', 'text',
-                  'cooking_time']
+                  'is_in_shopping_cart', 'name', 'image', 'image_variants',
+                  'text', 'cooking_time']
 
     def get_is_favorited(self, obj):
-        user = self.context.get('request').user
-        if user.is_anonymous:
-            return False
-        return user.favorite.filter(recipe=obj).exists()
+        if hasattr(obj, 'is_favorited'):
+            return obj.is_favorited
+        viewer = get_viewer(self.context.get('request'))
+        return obj.pk in viewer.favorites
 
     def get_is_in_shopping_cart(self, obj):
-        user = self.context.get('request').user
-        if user.is_anonymous:
-            return False
-        return user.shoppingcart.filter(recipe=obj).exists()
+        if hasattr(obj, 'is_in_shopping_cart'):
+            return obj.is_in_shopping_cart
+        viewer = get_viewer(self.context.get('request'))
+        return obj.pk in viewer.shopping_cart
+
+    def get_image_variants(self, obj):
+        # Копии создаются задачей после сохранения; до этого их нет.
+        if not obj.image or obj.variants_image != obj.image.name:
+            return None
+        request = self.context.get('request')
+        storage = obj.image.storage
+        return {
+            width: {
+                extension: request.build_absolute_uri(storage.url(name))
+                for extension, name in variants.items()
+            }
+            for width, variants in variant_names(obj.image.name).items()
+        }
 
     def get_ingredients(self, obj):
-        ingredients = IngredientsRecipes.objects.filter(recipes=obj)
+        ingredients = obj.ingredientsrecipes_set.all()
         return IngredientsRecipesSerializer(ingredients, many=True).data
 
 
@@ -148,40 +190,100 @@ class CreateRecipesSerializer(serializers.ModelSerializer):
             )
         return data
 
+    def validate_ingredients(self, data):
+        if not data:
+            raise serializers.ValidationError(
+                'Укажите как минимум один ингредиент'
+            )
+        ids = [item['id'] for item in data]
+        if len(set(ids)) != len(ids):
+            raise serializers.ValidationError(
+                'Вы уже добавили этот ингредиент'
+            )
+        existing = set(Ingredients.objects.filter(
+            id__in=ids
+        ).values_list('id', flat=True))
+        missing = [pk for pk in ids if pk not in existing]
+        if missing:
+            raise serializers.ValidationError(
+                f'Ингредиенты не найдены: {missing}'
+            )
+        return data
+
     def add_ingredients(self, ingredients, model):
-        ingredientsinrecipe_data = []
-        for ingredient in ingredients:
-            ingredientsinrecipe_data.append(IngredientsRecipes(
+        IngredientsRecipes.objects.bulk_create(
+            IngredientsRecipes(
                 recipes=model,
-                ingredients=ingredient['id'],
+                ingredients_id=ingredient['id'],
                 amount=ingredient['amount']
-            ))
-        IngredientsRecipes.objects.bulk_create(ingredientsinrecipe_data)
+            )
+            for ingredient in ingredients
+        )
+
+    def update_ingredients(self, ingredients, model):
+        """Применяет к рецепту только изменившиеся ингредиенты."""
+        amounts = {item['id']: item['amount'] for item in ingredients}
+        current = IngredientsRecipes.objects.filter(recipes=model)
+        to_delete = []
+        to_update = []
+        deltas = {}
+        for item in current:
+            amount = amounts.pop(item.ingredients_id, None)
+            if amount is None:
+                # Удалённые строки вычитаются из корзин через post_delete.
+                to_delete.append(item.pk)
+            elif amount != item.amount:
+                deltas[item.ingredients_id] = amount - item.amount
+                item.amount = amount
+                to_update.append(item)
+        if to_delete:
+            IngredientsRecipes.objects.filter(pk__in=to_delete).delete()
+        if to_update:
+            IngredientsRecipes.objects.bulk_update(to_update, ['amount'])
+        if amounts:
+            self.add_ingredients(
+                [{'id': pk, 'amount': amount}
+                 for pk, amount in amounts.items()],
+                model
+            )
+            deltas.update(amounts)
+        if deltas:
+            ingredients_changed.send(
+                sender=Recipes, recipe_id=model.pk, deltas=deltas
+            )
 
+    @transaction.atomic
     def create(self, validated_data):
         ingredients = validated_data.pop('ingredients')
         tags = validated_data.pop('tags')
         recipe = super().create(validated_data)
         self.add_ingredients(ingredients, recipe)
-        for tag in tags:
-            recipe.tags.add(tag)
+        recipe.tags.set(tags)
         return recipe
 
+    @transaction.atomic
     def update(self, instance, validated_data):
-        ingredients = validated_data.pop('ingredients')
+        # Ингредиенты читаются только после блокировки рецепта, иначе
+        # параллельное добавление рецепта в корзину посчитает старые.
+        lock_recipes([instance.pk])
+        ingredients = validated_data.pop('ingredients', None)
         if 'tags' in validated_data:
             instance.tags.set(validated_data.pop('tags'))
-        instance.ingredients.clear()
-        instance.image = validated_data.get('image', instance.image)
-        self.add_ingredients(ingredients, instance)
-        instance.name = validated_data.get('name', instance.name)
-        instance.text = validated_data.get('text', instance.text)
-        instance.cooking_time = validated_data.get(
-            'cooking_time', instance.cooking_time
-        )
+        if ingredients is not None:
+            self.update_ingredients(ingredients, instance)
         return super().update(instance, validated_data)
 
     def to_representation(self, recipe):
+        prefetch_related_objects(
+            [recipe],
+            'tags',
+            Prefetch(
+                'ingredientsrecipes_set',
+                queryset=IngredientsRecipes.objects.select_related(
+                    'ingredients'
+                )
+            ),
+        )
         return RecipesSerializer(
             recipe,
             context={'request': self.context.get('request')}
@@ -194,3 +296,21 @@ class ShoppingCartSerializer(ModelSerializer):
     class Meta:
         model = Recipes
         fields = ['id', 'name', 'image', 'cooking_time']
+
+
+class RecipeIdsSerializer(serializers.Serializer):
+    """Список id рецептов для пакетных операций."""
+    recipes = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        allow_empty=False,
+        max_length=1000,
+    )
+
+
+class IngredientIdsSerializer(serializers.Serializer):
+    """Список id ингредиентов, которые есть у пользователя."""
+    ingredients = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        allow_empty=False,
+        max_length=200,
+    )
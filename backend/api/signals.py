@@ -0,0 +1,37 @@
+from functools import partial
+
+from django.db import connection, transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from recipes.changes import record_change
+from recipes.models import IngredientsRecipes, Recipes
+
+from .indexes import coverage_index
+
+
+def reload_recipe(recipe_id):
+    """Записывает изменение рецепта в журнал один раз за транзакцию.
+
+    После фиксации индекс этого процесса сразу применяет журнал,
+    остальные процессы прочитают его при следующем поиске.
+    """
+    for _, callback, *_ in connection.run_on_commit:
+        if getattr(callback, 'coverage_recipe', None) == recipe_id:
+            return
+    record_change(recipe_id)
+    callback = partial(coverage_index.sync)
+    callback.coverage_recipe = recipe_id
+    transaction.on_commit(callback)
+
+
+@receiver(post_save, sender=Recipes)
+@receiver(post_delete, sender=Recipes)
+def recipe_changed(sender, instance, **kwargs):
+    reload_recipe(instance.pk)
+
+
+@receiver(post_save, sender=IngredientsRecipes)
+@receiver(post_delete, sender=IngredientsRecipes)
+def recipe_ingredient_changed(sender, instance, **kwargs):
+    reload_recipe(instance.recipes_id)
@@ -0,0 +1,72 @@
+from django.test import override_settings
+from rest_framework.authtoken.models import Token
+
+from recipes.models import (Favorite, Ingredients, IngredientsRecipes,
+                            Recipes, ShoppingCart, Tags)
+from users.models import CustomUser, Subscribe
+
+# Реплика читает своим соединением и не видит данных из транзакции
+# TestCase, поэтому запросы в таких тестах идут только в основную базу.
+primary_only = override_settings(REPLICA_DATABASES=[])
+
+
+def create_user(number):
+    return CustomUser.objects.create_user(
+        username=f'user{number}',
+        email=f'user{number}@example.com',
+        first_name='Имя',
+        last_name='Фамилия',
+        password='password',
+    )
+
+
+def create_catalog():
+    tags = [
+        Tags.objects.create(name=f'Тег {number}', color=f'#00000{number}',
+                            slug=f'tag{number}')
+        for number in range(3)
+    ]
+    ingredients = [
+        Ingredients.objects.create(name=name, measurement_unit='г')
+        for name in ('соль', 'сахар', 'мука', 'масло')
+    ]
+    return tags, ingredients
+
+
+def create_recipes(authors, tags, ingredients, count,
+                   image='recipes/images/test.jpg'):
+    """Рецепты с тегами и ингредиентами разного состава."""
+    recipes = []
+    for number in range(count):
+        recipe = Recipes.objects.create(
+            name=f'Рецепт {number}',
+            author=authors[number % len(authors)],
+            text='Описание',
+            image=image,
+            cooking_time=number + 1,
+        )
+        recipe.tags.set(tags[:1 + number % len(tags)])
+        for position, ingredient in enumerate(
+            ingredients[:1 + number % len(ingredients)]
+        ):
+            IngredientsRecipes.objects.create(
+                recipes=recipe, ingredients=ingredient, amount=position + 1
+            )
+        recipes.append(recipe)
+    return recipes
+
+
+def create_relations(user, recipes, authors):
+    """Избранное, корзина и подписки пользователя."""
+    for number, recipe in enumerate(recipes):
+        if number % 2:
+            Favorite.objects.create(user=user, recipe=recipe)
+        if number % 3 == 0:
+            ShoppingCart.objects.create(user=user, recipe=recipe)
+    for author in authors:
+        if author != user:
+            Subscribe.objects.create(user=user, author=author)
+
+
+def create_token(user):
+    return Token.objects.create(user=user).key
@@ -0,0 +1,71 @@
+from unittest import mock
+
+from django.test import TransactionTestCase, override_settings
+
+from api.indexes import RecipeCoverageIndex
+from recipes.changes import record_change
+from recipes.models import IngredientsRecipes
+
+from .factories import create_catalog, create_recipes, create_user
+
+
+class RecipeCoverageIndexTest(TransactionTestCase):
+
+    def setUp(self):
+        tags, self.ingredients = create_catalog()
+        self.recipes = create_recipes(
+            [create_user(0)], tags, self.ingredients, 2
+        )
+        # Индекс другого процесса, построенный до изменений.
+        self.index = RecipeCoverageIndex()
+        self.index.search([])
+
+    def ranking(self):
+        return self.index.search([
+            ingredient.pk for ingredient in self.ingredients
+        ])
+
+    def test_applies_changes_of_other_processes(self):
+        recipe = self.recipes[0]
+        self.assertIn((recipe.pk, 1, 0), self.ranking())
+        IngredientsRecipes.objects.create(
+            recipes=recipe, ingredients=self.ingredients[3], amount=1
+        )
+        with mock.patch.object(self.index, '_rebuild') as rebuild:
+            self.assertIn((recipe.pk, 2, 0), self.ranking())
+        rebuild.assert_not_called()
+
+    def test_deleted_recipe(self):
+        recipe = self.recipes[1]
+        self.assertIn((recipe.pk, 2, 0), self.ranking())
+        recipe.delete()
+        self.assertNotIn(recipe.pk, [row[0] for row in self.ranking()])
+
+    def test_changes_committed_out_of_order(self):
+        first = record_change(self.recipes[0].pk)
+        second = record_change(self.recipes[1].pk)
+        # Вторая запись видна, а первая ещё в незафиксированной транзакции.
+        with mock.patch('api.indexes.changes_since', return_value=[
+            (second, self.recipes[1].pk)
+        ]):
+            self.index.search([])
+        IngredientsRecipes.objects.create(
+            recipes=self.recipes[0], ingredients=self.ingredients[3],
+            amount=1
+        )
+        self.assertIn((self.recipes[0].pk, 2, 0), self.ranking())
+        self.assertIn(first, self.index._seen)
+
+    def test_rebuild_marker(self):
+        record_change()
+        with mock.patch.object(self.index, '_rebuild') as rebuild:
+            self.index.search([])
+        rebuild.assert_called_once()
+
+    @override_settings(RECIPE_CHANGES_KEEP=1)
+    def test_rebuild_after_gap(self):
+        for recipe in self.recipes:
+            record_change(recipe.pk)
+        with mock.patch.object(self.index, '_rebuild') as rebuild:
+            self.index.search([])
+        rebuild.assert_called_once()
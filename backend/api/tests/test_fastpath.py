@@ -0,0 +1,73 @@
+from django.contrib.auth.models import AnonymousUser
+from django.test import TestCase
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from api.fastpath import recipe_rows, recipes_payload, user_rows
+from api.querysets import recipes_for_user, users_for_user
+from api.renderers import FastJSONRenderer
+from api.serializers import RecipesSerializer
+from recipes.models import Recipes
+from users.serializers import CustomUserSerializer
+
+from .factories import (create_catalog, create_recipes, create_relations,
+                        create_user)
+
+
+class FastPathTest(TestCase):
+    """Быстрый путь с orjson отдаёт те же байты, что DRF."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = create_user(0)
+        authors = [cls.user, create_user(1)]
+        tags, ingredients = create_catalog()
+        recipes = create_recipes(authors, tags, ingredients, 4)
+        recipes.append(Recipes.objects.create(
+            name='Пустой рецепт \u2028 «ёжик» 🍲',
+            author=authors[1],
+            text='Без тегов, ингредиентов\u2029 и картинки',
+            image='',
+            cooking_time=1,
+        ))
+        Recipes.objects.filter(pk=recipes[0].pk).update(
+            variants_image=recipes[0].image.name
+        )
+        create_relations(cls.user, recipes, authors)
+
+    def request(self, user):
+        request = Request(APIRequestFactory().get('/api/recipes/'))
+        request.user = user
+        return request
+
+    def assertSameJSON(self, payload, data):
+        self.assertEqual(
+            FastJSONRenderer().render(payload), JSONRenderer().render(data)
+        )
+
+    def test_recipes(self):
+        for user in (AnonymousUser(), self.user):
+            with self.subTest(user=user):
+                request = self.request(user)
+                queryset = recipes_for_user(
+                    user, Recipes.objects.defer('search_vector')
+                )
+                self.assertSameJSON(
+                    recipes_payload(recipe_rows(queryset), request),
+                    RecipesSerializer(
+                        queryset, many=True, context={'request': request}
+                    ).data,
+                )
+
+    def test_users(self):
+        for user in (AnonymousUser(), self.user):
+            with self.subTest(user=user):
+                queryset = users_for_user(user)
+                self.assertSameJSON(
+                    list(user_rows(queryset)),
+                    CustomUserSerializer(
+                        queryset, many=True,
+                        context={'request': self.request(user)}
+                    ).data,
+                )
@@ -0,0 +1,113 @@
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+
+from recipes.models import FeedEntry
+from users.models import Subscribe
+
+from .factories import (create_catalog, create_recipes, create_user,
+                        primary_only)
+
+
+@primary_only
+@override_settings(JOBS_INLINE=True, FEED_FANOUT_LIMIT=1,
+                   FEED_BACKFILL_SIZE=2)
+class FeedTest(TestCase):
+    """Дозаполнение при подписке, очистка при отписке и листание ленты."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = create_user(0)
+        cls.author = create_user(1)
+        cls.celebrity = create_user(2)
+        cls.fan = create_user(3)
+        cls.tags, cls.ingredients = create_catalog()
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def create_recipes(self, author, count):
+        return [recipe.pk for recipe in create_recipes(
+            [author], self.tags, self.ingredients, count, image=''
+        )]
+
+    def subscribe(self, author, method='post'):
+        response = getattr(self.client, method)(
+            f'/api/users/{author.pk}/subscribe/'
+        )
+        self.assertLess(response.status_code, 300)
+
+    def entries(self):
+        return sorted(FeedEntry.objects.filter(
+            user=self.user
+        ).values_list('recipe_id', flat=True), reverse=True)
+
+    def feed(self, **params):
+        response = self.client.get('/api/recipes/feed/', params)
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def feed_ids(self, **params):
+        return [recipe['id'] for recipe in self.feed(**params)['results']]
+
+    def test_subscribe_backfill_and_unsubscribe(self):
+        recipes = self.create_recipes(self.author, 3)
+        self.assertEqual(self.feed_ids(), [])
+        self.subscribe(self.author)
+        # Дозаполняются только FEED_BACKFILL_SIZE последних рецептов.
+        self.assertEqual(self.entries(), recipes[:0:-1])
+        new = self.create_recipes(self.author, 1)
+        self.assertEqual(self.feed_ids(), [*new, *recipes[:0:-1]])
+        self.subscribe(self.author, 'delete')
+        self.assertEqual(self.entries(), [])
+        self.assertEqual(self.feed_ids(), [])
+
+    def test_celebrity_merged_on_read(self):
+        Subscribe.objects.create(user=self.fan, author=self.celebrity)
+        early = self.create_recipes(self.celebrity, 1)
+        self.subscribe(self.author)
+        self.subscribe(self.celebrity)
+        # Подписчиков больше FEED_FANOUT_LIMIT: в ленту не раскладывается.
+        ordinary = self.create_recipes(self.author, 2)
+        late = self.create_recipes(self.celebrity, 1)
+        self.assertEqual(self.entries(), ordinary[::-1])
+        self.assertFalse(FeedEntry.objects.filter(
+            user=self.user, author=self.celebrity
+        ).exists())
+        self.assertEqual(
+            self.feed_ids(), [*late, *ordinary[::-1], *early]
+        )
+        # Подписчиков стало не больше лимита: рецепты раскладываются.
+        Subscribe.objects.filter(user=self.fan).delete()
+        self.assertEqual(
+            self.entries(), [*late, *ordinary[::-1], *early]
+        )
+        self.subscribe(self.celebrity, 'delete')
+        self.assertEqual(self.feed_ids(), ordinary[::-1])
+
+    def test_keyset_pages(self):
+        Subscribe.objects.create(user=self.fan, author=self.celebrity)
+        self.subscribe(self.author)
+        self.subscribe(self.celebrity)
+        recipes = []
+        for _ in range(3):
+            recipes += self.create_recipes(self.author, 1)
+            recipes += self.create_recipes(self.celebrity, 1)
+        expected = recipes[::-1]
+        first = self.feed(limit=4)
+        self.assertEqual(
+            [recipe['id'] for recipe in first['results']], expected[:4]
+        )
+        self.assertIn(f'before={expected[3]}', first['next'])
+        # Новые рецепты не сдвигают следующую страницу.
+        self.create_recipes(self.author, 1)
+        self.create_recipes(self.celebrity, 1)
+        second = self.client.get(first['next']).data
+        self.assertEqual(
+            [recipe['id'] for recipe in second['results']], expected[4:]
+        )
+        self.assertIsNone(second['next'])
+        self.assertEqual(
+            self.client.get('/api/recipes/feed/', {'before': 'x'}).status_code,
+            400
+        )
@@ -0,0 +1,46 @@
+from unittest import mock
+
+from django.test import TestCase
+
+from api.indexes import IngredientIndex
+from recipes.models import Ingredients
+
+
+@mock.patch.dict('recipes.versions._local_versions', clear=True)
+class IngredientIndexTest(TestCase):
+    """Сначала совпадения по префиксу, затем по подстроке."""
+
+    @classmethod
+    def setUpTestData(cls):
+        for name in ('перец солёный', 'Соль морская', 'сахар', 'соль',
+                     'Ёжевика', 'фасоль'):
+            Ingredients.objects.create(name=name, measurement_unit='г')
+
+    def setUp(self):
+        self.index = IngredientIndex()
+
+    def names(self, query, limit=None):
+        return [row['name'] for row in self.index.search(query, limit)]
+
+    def test_ranking(self):
+        self.assertEqual(
+            self.names(' СОЛ'),
+            ['соль', 'Соль морская', 'перец солёный', 'фасоль']
+        )
+        self.assertEqual(self.names('ежев'), ['Ёжевика'])
+        self.assertEqual(self.names('солен'), ['перец солёный'])
+        self.assertEqual(self.names('мука'), [])
+        self.assertEqual(len(self.names('')), 6)
+
+    def test_limit(self):
+        self.assertEqual(self.names('сол', 1), ['соль'])
+        self.assertEqual(
+            self.names('сол', 3), ['соль', 'Соль морская', 'перец солёный']
+        )
+
+    def test_rebuilt_on_change(self):
+        self.assertEqual(self.names('солод'), [])
+        Ingredients.objects.create(name='Солод', measurement_unit='г')
+        self.assertEqual(self.names('солод'), ['Солод'])
+        with self.assertNumQueries(0):
+            self.names('сол')
@@ -0,0 +1,59 @@
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+
+from .factories import (create_catalog, create_recipes, create_user,
+                        primary_only)
+
+
+def server_timing(response):
+    return dict(
+        (part.split(';')[0], float(part.rsplit('dur=', 1)[1]))
+        for part in response['Server-Timing'].split(', ')
+    )
+
+
+@primary_only
+class MetricsTest(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        tags, ingredients = create_catalog()
+        create_recipes([create_user(0)], tags, ingredients, 5)
+
+    def setUp(self):
+        self.client = APIClient()
+
+    @override_settings(FAST_READ_PATH=False)
+    def test_serialize_timing(self):
+        timing = server_timing(self.client.get('/api/recipes/'))
+        self.assertEqual(
+            set(timing), {'db', 'app', 'serialize', 'render', 'total'}
+        )
+        self.assertGreater(timing['serialize'], 0)
+        self.assertLessEqual(
+            timing['db'] + timing['app'] + timing['serialize'],
+            timing['total'] + 0.1
+        )
+
+    @override_settings(FAST_READ_PATH=True)
+    def test_serialize_timing_fast_path(self):
+        timing = server_timing(self.client.get('/api/recipes/'))
+        self.assertGreater(timing['serialize'], 0)
+
+    @override_settings(METRICS_TOKEN='')
+    def test_no_token_configured(self):
+        self.assertEqual(self.client.get('/metrics').status_code, 403)
+
+    @override_settings(METRICS_TOKEN='secret')
+    def test_token(self):
+        self.client.get('/api/recipes/')
+        self.assertEqual(self.client.get('/metrics').status_code, 403)
+        response = self.client.get(
+            '/metrics', HTTP_AUTHORIZATION='Bearer secret'
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(
+            'foodgram_request_serialize_duration_seconds_count'
+            '{view="RecipeViewSet.list"}',
+            response.content.decode()
+        )
@@ -0,0 +1,73 @@
+from django.http import QueryDict
+from django.test import TestCase, override_settings
+from django.utils.http import urlencode
+from rest_framework.test import APIClient
+
+from api.pagination import RecipePagination
+from recipes.models import TrendingRecipe
+
+from .factories import (create_catalog, create_recipes, create_user,
+                        primary_only)
+
+
+@primary_only
+class RecipePaginationTest(TestCase):
+    """Курсор стабилен при вставках, поиск и рейтинг листаются по page."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = create_user(0)
+        cls.tags, cls.ingredients = create_catalog()
+        cls.recipes = cls.create(5)
+
+    @classmethod
+    def create(cls, count):
+        return [recipe.pk for recipe in create_recipes(
+            [cls.author], cls.tags, cls.ingredients, count, image=''
+        )]
+
+    def setUp(self):
+        self.client = APIClient()
+
+    def ids(self, data):
+        return [recipe['id'] for recipe in data['results']]
+
+    def test_cursor_stable_under_inserts(self):
+        for fast in (False, True):
+            with self.subTest(fast=fast), override_settings(
+                FAST_READ_PATH=fast
+            ):
+                response = self.client.get(
+                    '/api/recipes/', {'cursor': '', 'limit': 2}
+                )
+                self.assertEqual(response.status_code, 200)
+                self.assertNotIn('count', response.data)
+                seen = self.ids(response.data)
+                new = self.create(2)
+                url = response.data['next']
+                while url:
+                    data = self.client.get(url).data
+                    seen += self.ids(data)
+                    url = data['next']
+                self.assertEqual(seen, self.recipes[::-1])
+                self.recipes += new
+
+    def test_ordered_requests_use_pages(self):
+        for params in ({'search': 'суп'}, {'ordering': 'trending'}):
+            with self.subTest(params=params):
+                self.assertFalse(RecipePagination.uses_cursor(
+                    QueryDict(urlencode({'cursor': '', **params}))
+                ))
+        self.assertTrue(RecipePagination.uses_cursor(
+            QueryDict('cursor=&search=')
+        ))
+        TrendingRecipe.objects.bulk_create(
+            TrendingRecipe(recipe_id=recipe, score=score)
+            for score, recipe in enumerate(self.recipes)
+        )
+        response = self.client.get('/api/recipes/', {
+            'cursor': '', 'ordering': 'trending'
+        })
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['count'], 5)
+        self.assertEqual(self.ids(response.data), self.recipes[::-1])
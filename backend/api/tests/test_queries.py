@@ -0,0 +1,58 @@
+from unittest import mock
+
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from api.pagination import RecipePagination
+
+from .factories import (create_catalog, create_recipes, create_relations,
+                        create_user, primary_only)
+
+# Рецепты, пагинация (COUNT), теги, ингредиенты, авторы.
+RECIPE_LIST_QUERIES = 5
+# Рецепт, теги, ингредиенты, автор.
+RECIPE_DETAIL_QUERIES = 4
+
+
+@primary_only
+class RecipeQueryCountTest(TestCase):
+    """Число запросов на страницах рецептов не зависит от их количества."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.users = [create_user(number) for number in range(3)]
+        tags, ingredients = create_catalog()
+        cls.recipes = create_recipes(cls.users, tags, ingredients, 12)
+        create_relations(cls.users[0], cls.recipes, cls.users)
+
+    def setUp(self):
+        self.anonymous = APIClient()
+        self.authenticated = APIClient()
+        self.authenticated.force_authenticate(self.users[0])
+
+    def assert_list_queries(self, client, page_size):
+        with mock.patch.object(RecipePagination, 'page_size', page_size):
+            with self.assertNumQueries(RECIPE_LIST_QUERIES):
+                response = client.get('/api/recipes/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data['results']), page_size)
+
+    def test_list_anonymous(self):
+        for page_size in (2, 10):
+            with self.subTest(page_size=page_size):
+                self.assert_list_queries(self.anonymous, page_size)
+
+    def test_list_authenticated(self):
+        for page_size in (2, 10):
+            with self.subTest(page_size=page_size):
+                self.assert_list_queries(self.authenticated, page_size)
+
+    def test_detail(self):
+        for client in (self.anonymous, self.authenticated):
+            with self.subTest(client=client):
+                with self.assertNumQueries(RECIPE_DETAIL_QUERIES):
+                    response = client.get(
+                        f'/api/recipes/{self.recipes[0].pk}/'
+                    )
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(len(response.data['ingredients']), 1)
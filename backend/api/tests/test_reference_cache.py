@@ -0,0 +1,51 @@
+from django.core.cache import cache
+from django.test import AsyncClient, TestCase, override_settings
+from rest_framework.test import APIClient
+
+from .factories import create_catalog, primary_only
+
+
+@primary_only
+class ReferenceCacheTest(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        create_catalog()
+
+    def setUp(self):
+        self.client = APIClient()
+
+    def tearDown(self):
+        cache.clear()
+
+    def test_etag_shared_between_processes(self):
+        etag = self.client.get('/api/tags/')['ETag']
+        # Пустой кеш как у другого воркера: версия берётся из базы.
+        cache.clear()
+        response = self.client.get('/api/tags/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+    def test_cache_key_ignores_other_params(self):
+        self.client.get('/api/ingredients/', {'name': 'Со', 'limit': '5'})
+        keys = len(cache._cache)
+        for params in (
+            {'name': 'со', 'limit': '05'},
+            {'limit': '5', 'name': ' СО', 'page': '2'},
+            {'name': 'со', 'limit': '5', 'junk': 'x' * 1000},
+        ):
+            with self.subTest(params=params):
+                response = self.client.get('/api/ingredients/', params)
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(response.data[0]['name'], 'соль')
+                self.assertEqual(len(cache._cache), keys)
+
+    @override_settings(ROOT_URLCONF='foodgram.asgi_urls')
+    async def test_async_view_shares_cache_key(self):
+        client = AsyncClient()
+        await client.get('/api/ingredients/', {'name': 'со'})
+        keys = len(cache._cache)
+        response = await client.get(
+            '/api/ingredients/', {'page': '1', 'name': 'СО'}
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(cache._cache), keys)
@@ -0,0 +1,138 @@
+from django.db.models import Sum
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from recipes.models import (Favorite, IngredientsRecipes, Recipes,
+                            ShoppingCart, ShoppingCartTotal)
+
+from .factories import (create_catalog, create_recipes, create_user,
+                        primary_only)
+
+MISSING = 999999
+
+
+@primary_only
+class RelationsTest(TestCase):
+    """Избранное и корзина: ответы, счётчики рецептов и суммы корзины."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = create_user(0)
+        author = create_user(1)
+        tags, ingredients = create_catalog()
+        cls.recipes = [
+            recipe.pk
+            for recipe in create_recipes([author], tags, ingredients, 4)
+        ]
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def assertRelations(self, model, recipes):
+        self.assertEqual(sorted(model.objects.filter(
+            user=self.user
+        ).values_list('recipe', flat=True)), sorted(recipes))
+        field = {
+            Favorite: 'favorites_count',
+            ShoppingCart: 'shopping_cart_count',
+        }[model]
+        self.assertEqual(
+            dict(Recipes.objects.values_list('pk', field)),
+            {pk: int(pk in recipes) for pk in self.recipes}
+        )
+        self.assertEqual(
+            dict(ShoppingCartTotal.objects.filter(
+                user=self.user
+            ).values_list('ingredient_id', 'amount')),
+            dict(IngredientsRecipes.objects.filter(
+                recipes__shoppingcartrecipe__user=self.user
+            ).values('ingredients').annotate(
+                total=Sum('amount')
+            ).values_list('ingredients', 'total'))
+        )
+
+    def toggle(self, method, action, pk):
+        return getattr(self.client, method)(f'/api/recipes/{pk}/{action}/')
+
+    def batch(self, method, action, recipes=None):
+        data = None if recipes is None else {'recipes': recipes}
+        return getattr(self.client, method)(
+            f'/api/recipes/{action}/', data, format='json'
+        )
+
+    def test_toggles(self):
+        first = self.recipes[0]
+        for model, action in ((Favorite, 'favorite'),
+                              (ShoppingCart, 'shopping_cart')):
+            with self.subTest(action=action):
+                response = self.toggle('post', action, first)
+                self.assertEqual(response.status_code, 201)
+                self.assertEqual(response.data['id'], first)
+                self.assertRelations(model, [first])
+                self.assertEqual(
+                    self.toggle('post', action, first).status_code, 400
+                )
+                self.assertEqual(
+                    self.toggle('post', action, MISSING).status_code, 404
+                )
+                self.assertRelations(model, [first])
+                self.assertEqual(
+                    self.toggle('delete', action, first).status_code, 204
+                )
+                self.assertRelations(model, [])
+                self.assertEqual(
+                    self.toggle('delete', action, first).status_code, 400
+                )
+                self.assertEqual(
+                    self.toggle('delete', action, MISSING).status_code, 404
+                )
+                self.assertRelations(model, [])
+
+    def test_batches(self):
+        first, second, third, fourth = self.recipes
+        for model, action in ((Favorite, 'favorite'),
+                              (ShoppingCart, 'shopping_cart')):
+            with self.subTest(action=action):
+                self.toggle('post', action, first)
+                response = self.batch(
+                    'post', action, [first, second, third, MISSING]
+                )
+                self.assertEqual(response.status_code, 201)
+                self.assertEqual(
+                    sorted(response.data['recipes']), [second, third]
+                )
+                self.assertRelations(model, [first, second, third])
+                response = self.batch('delete', action, [second, fourth])
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(response.data['recipes'], [second])
+                self.assertRelations(model, [first, third])
+                self.assertEqual(
+                    self.batch('post', action, []).status_code, 400
+                )
+
+    def test_clear_cart(self):
+        self.batch('post', 'shopping_cart', self.recipes)
+        self.assertRelations(ShoppingCart, self.recipes)
+        response = self.batch('delete', 'shopping_cart')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(sorted(response.data['recipes']), self.recipes)
+        self.assertRelations(ShoppingCart, [])
+        # Без recipes очищается только корзина, избранное не меняется.
+        self.batch('post', 'favorite', self.recipes[:1])
+        self.assertEqual(
+            self.batch('delete', 'favorite').status_code, 400
+        )
+        self.assertRelations(Favorite, self.recipes[:1])
+
+    def test_anonymous(self):
+        client = APIClient()
+        for action in ('favorite', 'shopping_cart'):
+            with self.subTest(action=action):
+                self.assertEqual(client.post(
+                    f'/api/recipes/{action}/', {'recipes': self.recipes},
+                    format='json'
+                ).status_code, 401)
+                self.assertEqual(client.post(
+                    f'/api/recipes/{self.recipes[0]}/{action}/'
+                ).status_code, 401)
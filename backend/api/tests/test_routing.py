@@ -0,0 +1,173 @@
+import tempfile
+from unittest import skipUnless
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.cache.backends.filebased import FileBasedCache
+from django.core.exceptions import ImproperlyConfigured
+from django.db import connections
+from django.http import HttpResponse
+from django.test import (RequestFactory, SimpleTestCase, TransactionTestCase,
+                         override_settings)
+from django.test.utils import CaptureQueriesContext
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from api.middleware import PIN_COOKIE, ReplicaRoutingMiddleware, pin_key
+from api.views import RecipeViewSet
+from foodgram.routers import ReplicaRouter, current_routing, use_primary
+from recipes.models import Recipes
+
+from .factories import (create_catalog, create_recipes, create_token,
+                        create_user)
+
+REPLICA = 'replica1'
+FILE_CACHE = 'django.core.cache.backends.filebased.FileBasedCache'
+
+
+def use_shared_cache(test):
+    """Общий для процессов кеш в файлах вместо LocMemCache на время теста."""
+    directory = tempfile.TemporaryDirectory()
+    test.addCleanup(directory.cleanup)
+    caches = override_settings(CACHES={
+        'default': {'BACKEND': FILE_CACHE, 'LOCATION': directory.name}
+    })
+    caches.enable()
+    test.addCleanup(caches.disable)
+    return directory.name
+
+
+@override_settings(REPLICA_DATABASES=[REPLICA])
+class ReplicaRoutingTest(SimpleTestCase):
+    """Выбор базы для чтения без настоящей реплики."""
+
+    def setUp(self):
+        self.cache_location = use_shared_cache(self)
+        self.factory = RequestFactory()
+        self.router = ReplicaRouter()
+        self.view = RecipeViewSet.as_view({'get': 'list', 'post': 'create'})
+
+    def tearDown(self):
+        cache.clear()
+
+    def read_database(self, request):
+        """База, с которой вьюха прочитала бы рецепты и токен."""
+        databases = {}
+
+        def get_response(request):
+            middleware.process_view(request, self.view, (), {})
+            databases['recipe'] = self.router.db_for_read(Recipes)
+            databases['token'] = self.router.db_for_read(Token)
+            return HttpResponse()
+
+        middleware = ReplicaRoutingMiddleware(get_response)
+        middleware(request)
+        return databases
+
+    def test_get_uses_replica(self):
+        self.assertEqual(
+            self.read_database(self.factory.get('/api/recipes/')),
+            {'recipe': REPLICA, 'token': 'default'}
+        )
+
+    def test_write_pins_primary(self):
+        headers = {'HTTP_AUTHORIZATION': 'Token secret'}
+        middleware = ReplicaRoutingMiddleware(
+            lambda request: HttpResponse(status=201)
+        )
+        response = middleware(self.factory.post('/api/recipes/', **headers))
+        self.assertIn(PIN_COOKIE, response.cookies)
+        # Клиент без cookie закреплён по токену.
+        self.assertEqual(self.read_database(
+            self.factory.get('/api/recipes/', **headers)
+        )['recipe'], 'default')
+        # Клиент с cookie закреплён и без токена.
+        request = self.factory.get('/api/recipes/')
+        request.COOKIES[PIN_COOKIE] = '1'
+        self.assertEqual(self.read_database(request)['recipe'], 'default')
+        # Другие пользователи по-прежнему читают с реплики.
+        self.assertEqual(self.read_database(self.factory.get(
+            '/api/recipes/', HTTP_AUTHORIZATION='Token other'
+        ))['recipe'], REPLICA)
+
+    def test_token_pin_shared(self):
+        request = self.factory.post(
+            '/api/recipes/', HTTP_AUTHORIZATION='Token secret'
+        )
+        ReplicaRoutingMiddleware(lambda request: HttpResponse(status=201))(
+            request
+        )
+        # Воркер в другом процессе читает закрепление из того же кеша.
+        worker_cache = FileBasedCache(self.cache_location, {})
+        self.assertIsNotNone(worker_cache.get(pin_key(request)))
+
+    def test_local_cache_rejected(self):
+        with override_settings(CACHES={'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'
+        }}):
+            with self.assertRaises(ImproperlyConfigured):
+                ReplicaRoutingMiddleware(HttpResponse)
+        with override_settings(REPLICA_DATABASES=[], CACHES={'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'
+        }}):
+            ReplicaRoutingMiddleware(HttpResponse)
+
+    def test_failed_write_does_not_pin(self):
+        middleware = ReplicaRoutingMiddleware(
+            lambda request: HttpResponse(status=400)
+        )
+        response = middleware(self.factory.post('/api/recipes/'))
+        self.assertNotIn(PIN_COOKIE, response.cookies)
+
+    def test_use_primary(self):
+        def get_response(request):
+            current_routing.get().use_replica()
+            with use_primary():
+                databases.append(self.router.db_for_read(Recipes))
+            databases.append(self.router.db_for_read(Recipes))
+            return HttpResponse()
+
+        databases = []
+        ReplicaRoutingMiddleware(get_response)(
+            self.factory.get('/api/recipes/')
+        )
+        self.assertEqual(databases, ['default', REPLICA])
+
+
+@skipUnless(REPLICA in settings.DATABASES, 'реплика не настроена')
+class ReplicaQueriesTest(TransactionTestCase):
+    """Запросы через реплику, которая в тестах зеркалирует default.
+
+    Реплика читает через своё соединение и не видит незафиксированных
+    данных, поэтому нужен TransactionTestCase.
+    """
+    databases = '__all__'
+
+    def setUp(self):
+        use_shared_cache(self)
+        self.user = create_user(0)
+        tags, ingredients = create_catalog()
+        self.recipes = create_recipes([self.user], tags, ingredients, 2)
+        self.client = APIClient()
+        self.client.credentials(
+            HTTP_AUTHORIZATION=f'Token {create_token(self.user)}'
+        )
+
+    def tearDown(self):
+        cache.clear()
+
+    def queries(self, method, path):
+        with CaptureQueriesContext(connections['default']) as primary, \
+                CaptureQueriesContext(connections[REPLICA]) as replica:
+            response = getattr(self.client, method)(path)
+        self.assertLess(response.status_code, 400)
+        return len(primary), len(replica)
+
+    def test_get_reads_replica_until_write(self):
+        primary, replica = self.queries('get', '/api/recipes/')
+        self.assertGreater(replica, 0)
+        self.assertEqual(primary, 1)  # токен
+        self.queries('post', f'/api/recipes/{self.recipes[0].pk}/favorite/')
+        primary, replica = self.queries('get', '/api/recipes/')
+        self.assertEqual(replica, 0)
+        self.assertGreater(primary, 1)
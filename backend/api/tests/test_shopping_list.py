@@ -0,0 +1,72 @@
+import csv
+import io
+
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+
+from api.utils import SHOPPING_LIST_FORMATS, register_font
+from recipes.models import Ingredients, IngredientsRecipes
+
+from .factories import (create_catalog, create_recipes, create_user,
+                        primary_only)
+
+
+@primary_only
+class ShoppingListTest(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = create_user(0)
+        tags, ingredients = create_catalog()
+        cls.recipes = create_recipes([cls.user], tags, ingredients, 3)
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.client.post('/api/recipes/shopping_cart/', {
+            'recipes': [recipe.pk for recipe in self.recipes]
+        }, format='json')
+
+    def download(self, file_type):
+        response = self.client.get(
+            f'/api/recipes/download_shopping_cart/?file_type={file_type}'
+        )
+        return response, b''.join(response.streaming_content)
+
+    def test_txt(self):
+        response, content = self.download('txt')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            content.decode(), 'мука, 3 г\nсахар, 4 г\nсоль, 3 г\n'
+        )
+
+    def test_csv(self):
+        IngredientsRecipes.objects.create(
+            recipes=self.recipes[0], amount=2,
+            ingredients=Ingredients.objects.create(
+                name='перец "чили", молотый', measurement_unit='г'
+            ),
+        )
+        response, content = self.download('csv')
+        self.assertEqual(response['Content-Type'], 'text/csv; charset=utf-8')
+        text = content.decode()
+        self.assertIn('"перец ""чили"", молотый",2,г\r\n', text)
+        self.assertEqual(list(csv.reader(io.StringIO(text))), [
+            ['Ингредиент', 'Количество', 'Единица измерения'],
+            ['мука', '3', 'г'],
+            ['перец "чили", молотый', '2', 'г'],
+            ['сахар', '4', 'г'],
+            ['соль', '3', 'г'],
+        ])
+
+    def test_pdf(self):
+        if 'pdf' not in SHOPPING_LIST_FORMATS:
+            self.skipTest('нет шрифта SHOPPING_LIST_FONT')
+        response, content = self.download('pdf')
+        self.assertEqual(response['Content-Type'], 'application/pdf')
+        self.assertTrue(content.startswith(b'%PDF'))
+
+    @override_settings(SHOPPING_LIST_FONT='/nonexistent.ttf')
+    def test_no_font(self):
+        with self.assertLogs('api.utils', 'WARNING'):
+            self.assertFalse(register_font())
@@ -0,0 +1,83 @@
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from recipes.models import IngredientsRecipes, ShoppingCart, ShoppingCartTotal
+from recipes.relations import ingredients_changed
+
+from .factories import (create_catalog, create_recipes, create_user,
+                        primary_only)
+
+
+@primary_only
+class UpdateIngredientsTest(TestCase):
+    """Изменение рецепта трогает только изменившиеся ингредиенты."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = create_user(0)
+        cls.reader = create_user(1)
+        cls.tags, cls.ingredients = create_catalog()
+        cls.recipe = create_recipes(
+            [cls.author], cls.tags, cls.ingredients, 3, image=''
+        )[2]
+        ShoppingCart.objects.create(user=cls.reader, recipe=cls.recipe)
+
+    def setUp(self):
+        self.sent = []
+        ingredients_changed.connect(self.receive)
+        self.addCleanup(ingredients_changed.disconnect, self.receive)
+        self.client = APIClient()
+        self.client.force_authenticate(self.author)
+
+    def receive(self, sender, recipe_id, deltas, **kwargs):
+        self.sent.append((recipe_id, deltas))
+
+    def rows(self):
+        return {
+            ingredient: (pk, amount)
+            for pk, ingredient, amount in IngredientsRecipes.objects.filter(
+                recipes=self.recipe
+            ).values_list('pk', 'ingredients', 'amount')
+        }
+
+    def patch(self, amounts):
+        return self.client.patch(f'/api/recipes/{self.recipe.pk}/', {
+            'ingredients': [
+                {'id': ingredient.pk, 'amount': amount}
+                for ingredient, amount in amounts
+            ],
+        }, format='json')
+
+    def test_diff_update(self):
+        kept, changed, removed, added = self.ingredients
+        before = self.rows()
+        self.assertEqual(
+            {ingredient: amount for ingredient, (_, amount) in before.items()},
+            {kept.pk: 1, changed.pk: 2, removed.pk: 3}
+        )
+        response = self.patch([(kept, 1), (changed, 10), (added, 4)])
+        self.assertEqual(response.status_code, 200)
+        after = self.rows()
+        self.assertEqual(after[kept.pk], before[kept.pk])
+        self.assertEqual(after[changed.pk], (before[changed.pk][0], 10))
+        self.assertNotIn(removed.pk, after)
+        self.assertEqual(after[added.pk][1], 4)
+        # Удалённая строка вычитается через post_delete, а не через сигнал.
+        self.assertEqual(
+            self.sent, [(self.recipe.pk, {changed.pk: 8, added.pk: 4})]
+        )
+        self.assertEqual(dict(ShoppingCartTotal.objects.filter(
+            user=self.reader
+        ).values_list('ingredient', 'amount')), {
+            kept.pk: 1, changed.pk: 10, added.pk: 4
+        })
+
+    def test_unchanged(self):
+        before = self.rows()
+        response = self.patch([
+            (ingredient, amount)
+            for ingredient, amount in zip(self.ingredients[:3], (1, 2, 3))
+        ])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.rows(), before)
+        self.assertEqual(self.sent, [])
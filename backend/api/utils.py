@@ -0,0 +1,95 @@
+import csv
+import io
+import logging
+import os
+
+from django.conf import settings
+from django.db.models import F
+from reportlab.lib.pagesizes import A4
+from reportlab.pdfbase import pdfmetrics
+from reportlab.pdfbase.ttfonts import TTFont
+from reportlab.pdfgen import canvas
+
+from recipes.models import ShoppingCartTotal
+
+logger = logging.getLogger(__name__)
+
+SHOPPING_LIST_HEADER = ('Ингредиент', 'Количество', 'Единица измерения')
+SHOPPING_LIST_FONT = 'ShoppingListFont'
+
+
+def register_font():
+    """Регистрирует шрифт с кириллицей для PDF; False, если его нет.
+
+    Встроенные шрифты PDF не содержат кириллицы, поэтому без
+    SHOPPING_LIST_FONT формат pdf недоступен.
+    """
+    if not os.path.exists(settings.SHOPPING_LIST_FONT):
+        logger.warning(
+            'Шрифт %s не найден, список покупок в PDF недоступен',
+            settings.SHOPPING_LIST_FONT
+        )
+        return False
+    pdfmetrics.registerFont(
+        TTFont(SHOPPING_LIST_FONT, settings.SHOPPING_LIST_FONT)
+    )
+    return True
+
+
+class Echo:
+    """Буфер, который сразу возвращает записанную строку."""
+
+    def write(self, value):
+        return value
+
+
+def get_shopping_list(user):
+    """Суммарное количество ингредиентов из корзины без агрегации."""
+    return ShoppingCartTotal.objects.filter(user=user).values(
+        'ingredient_id', 'amount',
+        name=F('ingredient__name'),
+        measurement_unit=F('ingredient__measurement_unit'),
+    ).order_by('ingredient__name')
+
+
+def shopping_list_txt(rows):
+    for item in rows:
+        yield (f'{item["name"]}, {item["amount"]} '
+               f'{item["measurement_unit"]}\n')
+
+
+def shopping_list_csv(rows):
+    writer = csv.writer(Echo())
+    yield writer.writerow(SHOPPING_LIST_HEADER)
+    for item in rows:
+        yield writer.writerow((item['name'],
+                               item['amount'],
+                               item['measurement_unit']))
+
+
+def shopping_list_pdf(rows):
+    font = SHOPPING_LIST_FONT
+    buffer = io.BytesIO()
+    page = canvas.Canvas(buffer, pagesize=A4)
+    width, height = A4
+    page.setFont(font, 16)
+    page.drawString(50, height - 50, 'Список покупок')
+    page.setFont(font, 12)
+    y = height - 80
+    for item in rows:
+        if y < 50:
+            page.showPage()
+            page.setFont(font, 12)
+            y = height - 50
+        page.drawString(50, y, next(shopping_list_txt([item])).rstrip())
+        y -= 20
+    page.save()
+    yield buffer.getvalue()
+
+
+SHOPPING_LIST_FORMATS = {
+    'txt': (shopping_list_txt, 'text/plain; charset=utf-8'),
+    'csv': (shopping_list_csv, 'text/csv; charset=utf-8'),
+}
+if register_font():
+    SHOPPING_LIST_FORMATS['pdf'] = (shopping_list_pdf, 'application/pdf')
@@ -0,0 +1,39 @@
+from django.utils.functional import cached_property
+
+from recipes.models import Favorite, ShoppingCart
+from users.models import Subscribe
+
+
+class Viewer:
+    """Связи текущего пользователя, загружаемые не чаще раза за запрос."""
+
+    def __init__(self, user):
+        self.user = user
+
+    def _ids(self, queryset, field):
+        if not self.user.is_authenticated:
+            return frozenset()
+        return frozenset(
+            queryset.filter(user=self.user).values_list(field, flat=True)
+        )
+
+    @cached_property
+    def favorites(self):
+        return self._ids(Favorite.objects, 'recipe_id')
+
+    @cached_property
+    def shopping_cart(self):
+        return self._ids(ShoppingCart.objects, 'recipe_id')
+
+    @cached_property
+    def subscriptions(self):
+        return self._ids(Subscribe.objects, 'author_id')
+
+
+def get_viewer(request):
+    """Viewer для запроса, создаётся при первом обращении."""
+    viewer = getattr(request, 'viewer', None)
+    if viewer is None:
+        viewer = Viewer(request.user)
+        request.viewer = viewer
+    return viewer
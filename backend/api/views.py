@@ -1,57 +1,122 @@
-from django.db.models import Sum
-from django.http import HttpResponse
+from itertools import chain
+
+from django.conf import settings
+from django.http import (HttpResponse, HttpResponseForbidden,
+                         StreamingHttpResponse)
 from django.shortcuts import get_object_or_404
+from django.utils.crypto import constant_time_compare
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework import exceptions, status, viewsets
 from rest_framework.decorators import action
 from rest_framework.pagination import PageNumberPagination
+from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 
 from recipes.models import (
     Favorite,
     Ingredients,
-    IngredientsRecipes,
     Recipes,
     ShoppingCart,
     Tags
 )
+from recipes.relations import add_relations, remove_relations
 
 from .filters import IngredientFilter, RecipeFilter
+from .fastpath import recipe_rows, recipes_payload
+from .indexes import coverage_index, ingredient_index, normalize
+from .metrics import export, serializing, timed_serializer
+from .mixins import (ReferenceCacheMixin, SerializerTimingMixin,
+                     normalize_number)
+from .pagination import FeedPagination, RecipePagination
 from .permissions import IsAdminOrReadOnly, IsAuthorOrReadOnly
+from .querysets import recipes_for_user
 from .serializers import (
     CreateRecipesSerializer,
+    IngredientIdsSerializer,
     IngredientSerializer,
+    RecipeIdsSerializer,
     RecipesSerializer,
     ShoppingCartSerializer,
     TagsSerializer
 )
+from .utils import SHOPPING_LIST_FORMATS, get_shopping_list
 
 
-class IngredientViewSet(viewsets.ReadOnlyModelViewSet):
+class IngredientViewSet(ReferenceCacheMixin, SerializerTimingMixin,
+                        viewsets.ReadOnlyModelViewSet):
     """Вьюсет для ингредиентов."""
     queryset = Ingredients.objects.all()
+    cache_model = Ingredients
+    cache_params = {'name': normalize, 'limit': normalize_number}
     serializer_class = IngredientSerializer
     filter_backends = (DjangoFilterBackend,)
     filterset_class = IngredientFilter
     pagination_class = None
 
+    def list(self, request, *args, **kwargs):
+        if 'name' not in request.query_params:
+            return super().list(request, *args, **kwargs)
+        return self.cached_response(self.search, request)
+
+    def search(self, request):
+        limit = request.query_params.get('limit')
+        if limit is not None:
+            if not limit.isdigit():
+                raise exceptions.ValidationError(
+                    'limit должен быть положительным числом.'
+                )
+            limit = int(limit)
+        return Response(ingredient_index.search(
+            request.query_params['name'], limit
+        ))
+
 
-class TagViewSet(viewsets.ReadOnlyModelViewSet):
+class TagViewSet(ReferenceCacheMixin, SerializerTimingMixin,
+                 viewsets.ReadOnlyModelViewSet):
     """Вьюсет для тегов."""
     queryset = Tags.objects.all()
+    cache_model = Tags
     serializer_class = TagsSerializer
     permission_classes = (IsAdminOrReadOnly,)
     pagination_class = None
 
 
-class RecipeViewSet(viewsets.ModelViewSet):
+class RecipeViewSet(SerializerTimingMixin, viewsets.ModelViewSet):
     """Вьюсет для рецептов."""
-    queryset = Recipes.objects.all()
-    pagination_class = PageNumberPagination
+    queryset = Recipes.objects.defer('search_vector')
+    lookup_value_regex = r'\d+'
+    pagination_class = RecipePagination
     permission_classes = (IsAuthorOrReadOnly,)
     filter_backends = (DjangoFilterBackend,)
     filterset_class = RecipeFilter
 
+    def get_queryset(self):
+        if self.request.method != 'GET':
+            return super().get_queryset()
+        return self.get_read_queryset()
+
+    def get_read_queryset(self):
+        """Рецепты с флагами пользователя и связанными данными."""
+        return recipes_for_user(self.request.user, super().get_queryset())
+
+    def list(self, request, *args, **kwargs):
+        if not settings.FAST_READ_PATH:
+            return super().list(request, *args, **kwargs)
+        queryset = recipe_rows(self.filter_queryset(self.get_queryset()))
+        page = self.paginate_queryset(queryset)
+        with serializing():
+            data = recipes_payload(page, request)
+        return self.get_paginated_response(data)
+
+    def retrieve(self, request, *args, **kwargs):
+        if not settings.FAST_READ_PATH:
+            return super().retrieve(request, *args, **kwargs)
+        queryset = recipe_rows(self.filter_queryset(self.get_queryset()))
+        row = get_object_or_404(queryset, pk=kwargs[self.lookup_field])
+        with serializing():
+            data = recipes_payload([row], request)[0]
+        return Response(data)
+
     def get_serializer_class(self):
         if self.request.method == 'GET':
             return RecipesSerializer
@@ -60,75 +125,171 @@ class RecipeViewSet(viewsets.ModelViewSet):
     def perform_create(self, serializer):
         serializer.save(author=self.request.user)
 
+    @action(detail=False, methods=['get'],
+            permission_classes=[IsAuthenticated])
+    def feed(self, request):
+        """Рецепты авторов, на которых подписан пользователь."""
+        paginator = FeedPagination()
+        ids = paginator.paginate_feed(request.user, request)
+        queryset = self.get_read_queryset().filter(pk__in=ids)
+        if settings.FAST_READ_PATH:
+            with serializing():
+                data = recipes_payload(recipe_rows(queryset), request)
+        else:
+            data = timed_serializer(RecipesSerializer(
+                queryset, many=True, context={'request': request}
+            )).data
+        return paginator.get_paginated_response(data)
+
+    @action(detail=False, methods=['get'])
+    def cookable(self, request):
+        """Рецепты по наличию ингредиентов: сколько есть и скольких нет."""
+        serializer = IngredientIdsSerializer(data={
+            'ingredients': [
+                pk for value in request.query_params.getlist('ingredients')
+                for pk in value.split(',') if pk
+            ]
+        })
+        serializer.is_valid(raise_exception=True)
+        ranking = coverage_index.search(
+            serializer.validated_data['ingredients']
+        )
+        paginator = PageNumberPagination()
+        page = paginator.paginate_queryset(ranking, request, view=self)
+        recipes = self.get_read_queryset().in_bulk(
+            [recipe for recipe, _, _ in page]
+        )
+        data = []
+        for recipe, covered, missing in page:
+            if recipe not in recipes:
+                continue
+            item = timed_serializer(RecipesSerializer(
+                recipes[recipe], context={'request': request}
+            )).data
+            item['covered'] = covered
+            item['missing'] = missing
+            data.append(item)
+        return paginator.get_paginated_response(data)
+
     @action(detail=True, methods=['post', 'delete'])
     def favorite(self, request, pk=None):
-        user = self.request.user
-        recipe = get_object_or_404(Recipes, pk=pk)
         if self.request.method == 'POST':
-            if Favorite.objects.filter(user=user, recipe=recipe).exists():
+            if not add_relations(Favorite, request.user.id, [pk]):
+                get_object_or_404(Recipes, pk=pk)
                 raise exceptions.ValidationError(
                     'Вы уже добавили этот рецепт в избранное.'
                 )
-            Favorite.objects.create(user=user, recipe=recipe)
-            serializer = RecipesSerializer(
-                recipe, context={'request': request}
-            )
+            serializer = timed_serializer(RecipesSerializer(
+                self.get_read_queryset().get(pk=pk),
+                context={'request': request}
+            ))
             return Response(serializer.data, status=status.HTTP_201_CREATED)
-        if not Favorite.objects.filter(user=user, recipe=recipe).exists():
+        if not remove_relations(Favorite, request.user.id, [pk]):
+            get_object_or_404(Recipes, pk=pk)
             raise exceptions.ValidationError('Рецепт не в избранном.')
-        favorite = get_object_or_404(Favorite, user=user, recipe=recipe)
-        favorite.delete()
         return Response(status=status.HTTP_204_NO_CONTENT)
 
+    @action(detail=False, methods=['post', 'delete'], url_path='favorite',
+            url_name='favorite-batch',
+            permission_classes=[IsAuthenticated])
+    def favorite_batch(self, request):
+        recipes = self.get_batch_ids(request)
+        if self.request.method == 'POST':
+            added = add_relations(Favorite, request.user.id, recipes)
+            return Response({'recipes': added},
+                            status=status.HTTP_201_CREATED)
+        removed = remove_relations(Favorite, request.user.id, recipes)
+        return Response({'recipes': removed})
+
     @action(detail=True, methods=['post', 'delete'], url_path='shopping_cart',
             url_name='shopping_cart')
     def shopping_cart(self, request, pk=None):
-        user = self.request.user
-        recipe = get_object_or_404(Recipes, pk=pk)
         if self.request.method == 'POST':
-            if ShoppingCart.objects.filter(user=user, recipe=recipe).exists():
+            if not add_relations(ShoppingCart, request.user.id, [pk]):
+                get_object_or_404(Recipes, pk=pk)
                 raise exceptions.ValidationError(
                     'Вы уже добавили тот рецепт в список покупок.'
                 )
-            ShoppingCart.objects.create(user=user, recipe=recipe)
-            serializer = ShoppingCartSerializer(
-                recipe, context={'request': request}
-            )
+            serializer = timed_serializer(ShoppingCartSerializer(
+                Recipes.objects.get(pk=pk), context={'request': request}
+            ))
             return Response(serializer.data, status=status.HTTP_201_CREATED)
-        if self.request.method == 'DELETE':
-            if not ShoppingCart.objects.filter(user=user,
-                                               recipe=recipe).exists():
-                raise exceptions.ValidationError(
-                    'Этого рецепта нет в списке покупок.'
-                )
-            recipe_in_shopping_cart = get_object_or_404(
-                ShoppingCart,
-                user=user,
-                recipe=recipe
+        if not remove_relations(ShoppingCart, request.user.id, [pk]):
+            get_object_or_404(Recipes, pk=pk)
+            raise exceptions.ValidationError(
+                'Этого рецепта нет в списке покупок.'
             )
-            recipe_in_shopping_cart.delete()
-            return Response(status=status.HTTP_204_NO_CONTENT)
+        return Response(status=status.HTTP_204_NO_CONTENT)
 
-    @action(detail=False, methods=['get'])
+    @action(detail=False, methods=['post', 'delete'],
+            url_path='shopping_cart', url_name='shopping_cart-batch',
+            permission_classes=[IsAuthenticated])
+    def shopping_cart_batch(self, request):
+        """Пакетное изменение корзины; DELETE без recipes очищает её."""
+        if self.request.method == 'POST':
+            added = add_relations(
+                ShoppingCart, request.user.id, self.get_batch_ids(request)
+            )
+            return Response({'recipes': added},
+                            status=status.HTTP_201_CREATED)
+        recipes = None
+        if 'recipes' in request.data:
+            recipes = self.get_batch_ids(request)
+        removed = remove_relations(ShoppingCart, request.user.id, recipes)
+        return Response({'recipes': removed})
+
+    @action(detail=False, methods=['get'], url_path='shopping_cart/totals',
+            url_name='shopping_cart-totals',
+            permission_classes=[IsAuthenticated])
+    def shopping_cart_totals(self, request):
+        """Суммарное количество ингредиентов в корзине."""
+        return Response([
+            {
+                'id': row['ingredient_id'],
+                'name': row['name'],
+                'measurement_unit': row['measurement_unit'],
+                'amount': row['amount'],
+            }
+            for row in get_shopping_list(request.user)
+        ])
+
+    def get_batch_ids(self, request):
+        serializer = RecipeIdsSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        return serializer.validated_data['recipes']
+
+    @action(detail=False, methods=['get'],
+            permission_classes=[IsAuthenticated])
     def download_shopping_cart(self, request):
-        user = self.request.user
-        if not user.shoppingcart.exists():
+        file_type = request.query_params.get('file_type', 'txt')
+        if file_type not in SHOPPING_LIST_FORMATS:
+            raise exceptions.ValidationError(
+                'Доступные форматы: ' + ', '.join(SHOPPING_LIST_FORMATS)
+            )
+        rows = get_shopping_list(request.user).iterator()
+        first = next(rows, None)
+        if first is None:
             raise exceptions.ValidationError('Корзина пуста.')
-        shopping_cart = ShoppingCart.objects.filter(user=user)
-        recipes = [item.recipe.id for item in shopping_cart]
-        shopping_list = IngredientsRecipes.objects.filter(
-            recipes__in=recipes
-        ).values(
-            'ingredients'
-        ).annotate(amount=Sum('amount'))
-        catalog = []
-        for item in shopping_list:
-            ingredient = Ingredients.objects.get(pk=item['ingredients'])
-            amount = item['amount']
-            catalog += (f'{ingredient.name}, {amount} '
-                        f'{ingredient.measurement_unit}\n')
-        response = HttpResponse(catalog, content_type='text/plain')
+        render, content_type = SHOPPING_LIST_FORMATS[file_type]
+        response = StreamingHttpResponse(
+            render(chain((first,), rows)), content_type=content_type
+        )
         response['Content-Disposition'] = (
-            'attachment; filename=shopping_list.txt'
+            f'attachment; filename=shopping_list.{file_type}'
         )
         return response
+
+
+def metrics(request):
+    """Метрики запросов в формате Prometheus.
+
+    Без METRICS_TOKEN адрес закрыт для всех.
+    """
+    token = settings.METRICS_TOKEN
+    if not token or not constant_time_compare(
+        request.headers.get('Authorization', ''), f'Bearer {token}'
+    ):
+        return HttpResponseForbidden()
+    return HttpResponse(
+        export(), content_type='text/plain; version=0.0.4; charset=utf-8'
+    )
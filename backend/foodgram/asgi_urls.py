@@ -0,0 +1,12 @@
+"""Маршруты для ASGI: асинхронные GET-эндпоинты поверх общих маршрутов."""
+from django.urls import include, path
+
+from api import async_views
+
+urlpatterns = [
+    path('api/recipes/', async_views.recipe_list),
+    path('api/recipes/<int:pk>/', async_views.recipe_detail),
+    path('api/tags/', async_views.tag_list),
+    path('api/ingredients/', async_views.ingredient_list),
+    path('', include('foodgram.urls')),
+]
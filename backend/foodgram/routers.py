@@ -0,0 +1,61 @@
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+
+current_routing = ContextVar('current_routing', default=None)
+
+
+class RequestRouting:
+    """Решение о чтении с реплики для текущего запроса."""
+
+    def __init__(self):
+        self.replica = None
+
+    def use_replica(self):
+        self.replica = random.choice(settings.REPLICA_DATABASES)
+
+
+@contextmanager
+def use_primary():
+    """Чтение с основной базы внутри блока.
+
+    Нужно там, где прочитанное кешируется под текущей версией данных:
+    отставшая реплика иначе закрепила бы в кеше старые значения.
+    """
+    routing = current_routing.get()
+    if routing is None or routing.replica is None:
+        yield
+        return
+    replica, routing.replica = routing.replica, None
+    try:
+        yield
+    finally:
+        routing.replica = replica
+
+
+class ReplicaRouter:
+    """Чтение с реплики в запросах, для которых это разрешено.
+
+    Реплику выбирает ReplicaRoutingMiddleware, и все запросы одного
+    HTTP-запроса идут на одну и ту же реплику. Запись, миграции и
+    чтение вне таких запросов всегда выполняются на основной базе.
+    """
+    primary_models = {'authtoken.token'}
+
+    def db_for_read(self, model, **hints):
+        routing = current_routing.get()
+        if (routing is None or routing.replica is None
+                or model._meta.label_lower in self.primary_models):
+            return 'default'
+        return routing.replica
+
+    def db_for_write(self, model, **hints):
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == 'default'
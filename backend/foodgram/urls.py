@@ -3,10 +3,13 @@ from django.conf.urls.static import static
 from django.contrib import admin
 from django.urls import include, path
 
+from api.views import metrics
+
 urlpatterns = [
     path('api/', include('users.urls')),
     path('api/', include('api.urls')),
     path('admin/', admin.site.urls),
+    path('metrics', metrics),
 ]
 
 if settings.DEBUG:
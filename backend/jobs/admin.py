@@ -0,0 +1,19 @@
+from django.contrib import admin
+from django.utils import timezone
+
+from .models import Job
+
+
+class JobAdmin(admin.ModelAdmin):
+    list_display = ('name', 'status', 'priority', 'attempts', 'run_at',
+                    'created')
+    list_filter = ('status', 'name')
+    actions = ('retry',)
+
+    @admin.action(description='Повторить')
+    def retry(self, request, queryset):
+        queryset.update(status=Job.PENDING, attempts=0, locked_at=None,
+                        run_at=timezone.now())
+
+
+admin.site.register(Job, JobAdmin)
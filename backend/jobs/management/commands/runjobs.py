@@ -0,0 +1,31 @@
+import signal
+
+from django.core.management.base import BaseCommand
+
+from jobs.worker import Worker
+
+
+class Command(BaseCommand):
+    """Обработчик очереди отложенных задач."""
+    help = 'Выполнение задач из очереди до остановки (SIGTERM или Ctrl+C)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', type=int, default=4,
+                            help='Число потоков, по умолчанию 4')
+        parser.add_argument('--poll-interval', type=float, default=1.0,
+                            help='Пауза при пустой очереди, секунд')
+        parser.add_argument('--once', action='store_true',
+                            help='Выполнить готовые задачи и завершиться')
+
+    def handle(self, *args, **options):
+        worker = Worker(
+            threads=options['threads'],
+            poll_interval=options['poll_interval'],
+            once=options['once'],
+        )
+        signal.signal(signal.SIGTERM, worker.stop)
+        signal.signal(signal.SIGINT, worker.stop)
+        done, failed = worker.run()
+        self.stdout.write(
+            f'Задач выполнено: {done}, завершилось ошибкой: {failed}'
+        )
@@ -0,0 +1,67 @@
+from django.db import models
+from django.utils import timezone
+
+
+class Job(models.Model):
+    """Отложенная задача для runjobs."""
+    PENDING = 'pending'
+    RUNNING = 'running'
+    FAILED = 'failed'
+    STATUSES = (
+        (PENDING, 'ожидает'),
+        (RUNNING, 'выполняется'),
+        (FAILED, 'завершилась ошибкой'),
+    )
+
+    name = models.CharField(max_length=200, verbose_name='задача')
+    payload = models.JSONField(default=dict, verbose_name='аргументы')
+    priority = models.SmallIntegerField(default=0, verbose_name='приоритет')
+    status = models.CharField(
+        max_length=10,
+        choices=STATUSES,
+        default=PENDING,
+        verbose_name='состояние'
+    )
+    attempts = models.PositiveSmallIntegerField(
+        default=0,
+        verbose_name='попыток'
+    )
+    max_attempts = models.PositiveSmallIntegerField(
+        default=3,
+        verbose_name='максимум попыток'
+    )
+    run_at = models.DateTimeField(
+        default=timezone.now,
+        verbose_name='выполнить после'
+    )
+    locked_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name='взята в работу'
+    )
+    last_error = models.TextField(blank=True, verbose_name='ошибка')
+    created = models.DateTimeField(
+        default=timezone.now,
+        editable=False,
+        verbose_name='создана'
+    )
+
+    class Meta:
+        ordering = ['-priority', 'run_at', 'id']
+        verbose_name = 'Задача'
+        verbose_name_plural = 'Задачи'
+        indexes = [
+            models.Index(
+                fields=['-priority', 'run_at', 'id'],
+                condition=models.Q(status='pending'),
+                name='jobs_pending_idx'
+            ),
+            models.Index(
+                fields=['locked_at'],
+                condition=models.Q(status='running'),
+                name='jobs_running_idx'
+            ),
+        ]
+
+    def __str__(self):
+        return f'{self.name} #{self.pk}'
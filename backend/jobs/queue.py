@@ -0,0 +1,158 @@
+"""Очередь отложенных задач в базе данных.
+
+Задачи объявляются в модулях tasks.py приложений декоратором task и
+ставятся в очередь методом enqueue. Строка задачи создаётся в текущей
+транзакции, поэтому обработчик увидит её только вместе с данными, ради
+которых она поставлена. Выполняет задачи команда runjobs.
+"""
+import logging
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import Job
+
+logger = logging.getLogger(__name__)
+
+registry = {}
+
+
+class Task:
+    """Функция, которую можно выполнить сейчас или поставить в очередь."""
+
+    def __init__(self, func, name, priority, max_attempts):
+        self.func = func
+        self.name = name
+        self.priority = priority
+        self.max_attempts = max_attempts
+
+    def __call__(self, **kwargs):
+        return self.func(**kwargs)
+
+    def enqueue(self, priority=None, delay=None, **kwargs):
+        """Ставит задачу в очередь; аргументы должны сериализоваться в JSON.
+
+        С JOBS_INLINE задача выполняется сразу в точке сохранения, а
+        ошибка записывается в лог, как при последней неудачной попытке
+        в очереди: изменения задачи откатываются, транзакция вызывающего
+        кода продолжается.
+        """
+        if settings.JOBS_INLINE:
+            try:
+                with transaction.atomic():
+                    self.func(**kwargs)
+            except Exception:
+                logger.exception('Задача %s завершилась ошибкой', self.name)
+            return None
+        return Job.objects.create(
+            name=self.name,
+            payload=kwargs,
+            priority=self.priority if priority is None else priority,
+            max_attempts=self.max_attempts,
+            run_at=timezone.now() + (delay or timedelta()),
+        )
+
+
+def task(func=None, *, name=None, priority=0, max_attempts=3):
+    """Регистрирует функцию как задачу очереди.
+
+    Имя задачи по умолчанию — модуль и имя функции. Задачи с большим
+    priority выполняются раньше.
+    """
+    def decorator(func):
+        task_name = name or f'{func.__module__}.{func.__name__}'
+        registry[task_name] = Task(func, task_name, priority, max_attempts)
+        return registry[task_name]
+
+    if func is None:
+        return decorator
+    return decorator(func)
+
+
+def claim_job():
+    """Берёт в работу следующую готовую задачу или возвращает None.
+
+    SKIP LOCKED позволяет нескольким обработчикам разбирать очередь,
+    не ожидая друг друга и не беря одну задачу дважды.
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        job = Job.objects.select_for_update(skip_locked=True).filter(
+            status=Job.PENDING, run_at__lte=now
+        ).order_by('-priority', 'run_at', 'id').first()
+        if job is None:
+            return None
+        job.status = Job.RUNNING
+        job.locked_at = now
+        job.attempts += 1
+        job.save(update_fields=['status', 'locked_at', 'attempts'])
+    return job
+
+
+def run_job(job):
+    """Выполняет задачу и возвращает True, если она прошла успешно.
+
+    Задача выполняется в транзакции, которая до конца держит блокировку
+    строки задачи: по ней requeue_stale отличает работающие задачи от
+    брошенных. Изменения неудачной задачи откатываются до точки
+    сохранения, сама задача ставится повторно с экспоненциальной
+    задержкой, пока не кончатся попытки. Выполненная задача удаляется
+    вместе с фиксацией её изменений. None означает, что задачу уже
+    вернули в очередь и она не выполнялась.
+    """
+    with transaction.atomic():
+        if not Job.objects.select_for_update(skip_locked=True).filter(
+            pk=job.pk, status=Job.RUNNING, locked_at=job.locked_at
+        ).values_list('pk', flat=True):
+            return None
+        try:
+            task = registry.get(job.name)
+            if task is None:
+                raise LookupError(f'Задача {job.name} не зарегистрирована')
+            with transaction.atomic():
+                task.func(**job.payload)
+        except Exception:
+            logger.exception('Задача %s завершилась ошибкой', job)
+            job.last_error = traceback.format_exc()
+            job.locked_at = None
+            if job.attempts >= job.max_attempts:
+                job.status = Job.FAILED
+            else:
+                job.status = Job.PENDING
+                job.run_at = timezone.now() + timedelta(
+                    seconds=settings.JOBS_RETRY_DELAY * 2 ** (job.attempts - 1)
+                )
+            job.save(update_fields=['status', 'run_at', 'locked_at',
+                                    'last_error'])
+            return False
+        job.delete()
+    return True
+
+
+def requeue_stale():
+    """Возвращает в очередь задачи остановившихся обработчиков.
+
+    Работающий обработчик держит блокировку строки задачи, поэтому такие
+    задачи пропускаются, сколько бы они ни выполнялись. Задача без
+    блокировки брошена, если её взяли в работу больше JOBS_TIMEOUT
+    секунд назад: за это время обработчик заведомо успевает её
+    заблокировать. Задачи без оставшихся попыток помечаются неудачными.
+    """
+    with transaction.atomic():
+        stale = Job.objects.filter(status=Job.RUNNING, pk__in=list(
+            Job.objects.select_for_update(skip_locked=True).filter(
+                status=Job.RUNNING,
+                locked_at__lt=timezone.now() - timedelta(
+                    seconds=settings.JOBS_TIMEOUT
+                ),
+            ).values_list('pk', flat=True)
+        ))
+        failed = stale.filter(attempts__gte=F('max_attempts')).update(
+            status=Job.FAILED, locked_at=None,
+            last_error='Обработчик остановился во время выполнения',
+        )
+        return failed + stale.update(status=Job.PENDING, locked_at=None)
@@ -0,0 +1,201 @@
+import logging
+import threading
+from datetime import timedelta
+from io import StringIO
+from unittest import skipUnless
+
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+
+from jobs.models import Job
+from jobs.queue import claim_job, requeue_stale, run_job, task
+
+calls = []
+
+
+@task(name='jobs.tests.record')
+def record(value):
+    calls.append(value)
+
+
+@task(name='jobs.tests.fail')
+def fail():
+    raise RuntimeError('сбой задачи')
+
+
+@task(name='jobs.tests.write_and_fail')
+def write_and_fail():
+    Job.objects.create(name='jobs.tests.record', payload={'value': 0})
+    raise RuntimeError('сбой задачи')
+
+
+started = threading.Event()
+release = threading.Event()
+
+
+@task(name='jobs.tests.wait')
+def wait():
+    started.set()
+    release.wait(10)
+
+
+@override_settings(JOBS_INLINE=False, JOBS_RETRY_DELAY=10)
+class RunJobsTest(TransactionTestCase):
+    """runjobs --once разбирает очередь в тестовой базе."""
+
+    def setUp(self):
+        calls.clear()
+        logger = logging.getLogger('jobs.queue')
+        logger.disabled = True
+        self.addCleanup(setattr, logger, 'disabled', False)
+
+    def runjobs(self):
+        stdout = StringIO()
+        call_command('runjobs', '--once', '--threads', '1', stdout=stdout)
+        return stdout.getvalue().strip()
+
+    def test_priority_order(self):
+        record.enqueue(value=1)
+        record.enqueue(priority=10, value=2)
+        record.enqueue(value=3)
+        record.enqueue(delay=timedelta(hours=1), value=4)
+        self.assertEqual(
+            self.runjobs(), 'Задач выполнено: 3, завершилось ошибкой: 0'
+        )
+        self.assertEqual(calls, [2, 1, 3])
+        self.assertEqual(list(Job.objects.values_list(
+            'payload__value', flat=True
+        )), [4])
+
+    def test_retry_backoff_and_failed(self):
+        job = fail.enqueue()
+        Job.objects.filter(pk=job.pk).update(max_attempts=2)
+        before = timezone.now()
+        self.assertEqual(
+            self.runjobs(), 'Задач выполнено: 0, завершилось ошибкой: 1'
+        )
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.PENDING)
+        self.assertEqual(job.attempts, 1)
+        self.assertIsNone(job.locked_at)
+        self.assertIn('сбой задачи', job.last_error)
+        self.assertGreaterEqual(job.run_at, before + timedelta(seconds=10))
+        self.assertLess(job.run_at, before + timedelta(seconds=20))
+
+        self.assertEqual(
+            self.runjobs(), 'Задач выполнено: 0, завершилось ошибкой: 0'
+        )
+        Job.objects.filter(pk=job.pk).update(run_at=timezone.now())
+        self.assertEqual(
+            self.runjobs(), 'Задач выполнено: 0, завершилось ошибкой: 1'
+        )
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.FAILED)
+        self.assertEqual(job.attempts, 2)
+
+        self.assertEqual(
+            self.runjobs(), 'Задач выполнено: 0, завершилось ошибкой: 0'
+        )
+
+    def test_unknown_task(self):
+        Job.objects.create(name='jobs.tests.missing', max_attempts=1)
+        self.assertEqual(
+            self.runjobs(), 'Задач выполнено: 0, завершилось ошибкой: 1'
+        )
+        job = Job.objects.get()
+        self.assertEqual(job.status, Job.FAILED)
+        self.assertIn('не зарегистрирована', job.last_error)
+
+    @override_settings(JOBS_TIMEOUT=600)
+    def test_requeue_stale(self):
+        stale = timezone.now() - timedelta(seconds=601)
+        retried = Job.objects.create(
+            name='jobs.tests.record', payload={'value': 1},
+            status=Job.RUNNING, locked_at=stale, attempts=1,
+        )
+        exhausted = Job.objects.create(
+            name='jobs.tests.record', payload={'value': 2},
+            status=Job.RUNNING, locked_at=stale, attempts=3,
+        )
+        running = Job.objects.create(
+            name='jobs.tests.record', payload={'value': 3},
+            status=Job.RUNNING, locked_at=timezone.now(), attempts=1,
+        )
+        self.assertEqual(requeue_stale(), 2)
+        exhausted.refresh_from_db()
+        self.assertEqual(exhausted.status, Job.FAILED)
+        self.assertEqual(
+            exhausted.last_error, 'Обработчик остановился во время выполнения'
+        )
+        running.refresh_from_db()
+        self.assertEqual(running.status, Job.RUNNING)
+
+        self.assertEqual(
+            self.runjobs(), 'Задач выполнено: 1, завершилось ошибкой: 0'
+        )
+        self.assertEqual(calls, [1])
+        self.assertFalse(Job.objects.filter(pk=retried.pk).exists())
+
+    def test_failed_job_rolled_back(self):
+        write_and_fail.enqueue()
+        self.assertEqual(
+            self.runjobs(), 'Задач выполнено: 0, завершилось ошибкой: 1'
+        )
+        job = Job.objects.get()
+        self.assertEqual(job.name, write_and_fail.name)
+        self.assertEqual(job.status, Job.PENDING)
+
+    def test_requeued_job_not_run(self):
+        record.enqueue(value=1)
+        job = claim_job()
+        # requeue_stale вернул задачу в очередь, пока обработчик стоял.
+        Job.objects.filter(pk=job.pk).update(status=Job.PENDING,
+                                             locked_at=None)
+        self.assertIsNone(run_job(job))
+        self.assertEqual(calls, [])
+        self.assertEqual(
+            self.runjobs(), 'Задач выполнено: 1, завершилось ошибкой: 0'
+        )
+        self.assertEqual(calls, [1])
+
+    @skipUnless(connection.features.has_select_for_update_skip_locked,
+                'нет блокировок строк')
+    @override_settings(JOBS_TIMEOUT=0)
+    def test_running_job_not_requeued(self):
+        started.clear()
+        release.clear()
+        wait.enqueue()
+        job = claim_job()
+
+        def work():
+            try:
+                run_job(job)
+            finally:
+                connection.close()
+
+        worker = threading.Thread(target=work)
+        worker.start()
+        try:
+            self.assertTrue(started.wait(10))
+            self.assertEqual(requeue_stale(), 0)
+        finally:
+            release.set()
+            worker.join()
+        self.assertFalse(Job.objects.exists())
+
+
+@override_settings(JOBS_INLINE=True)
+class InlineJobsTest(TestCase):
+    """С JOBS_INLINE ошибка задачи не ломает транзакцию вызывающего."""
+
+    def test_failed_task_rolled_back(self):
+        calls.clear()
+        self.assertIsNone(record.enqueue(value=1))
+        self.assertEqual(calls, [1])
+        with self.assertLogs('jobs.queue', 'ERROR'):
+            self.assertIsNone(write_and_fail.enqueue())
+        self.assertFalse(Job.objects.exists())
+        Job.objects.create(name='jobs.tests.record')
+        self.assertEqual(Job.objects.count(), 1)
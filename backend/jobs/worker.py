@@ -0,0 +1,58 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.db import close_old_connections, connection
+
+from .queue import claim_job, requeue_stale, run_job
+
+
+class Worker:
+    """Обработчик очереди из threads потоков.
+
+    Каждый поток берёт задачи по одной, пока очередь не опустеет, и
+    затем ждёт poll_interval секунд. С once потоки завершаются, как
+    только задач не осталось. Для нескольких процессов запускается
+    несколько runjobs: задачи между ними не дублируются.
+    """
+
+    def __init__(self, threads=1, poll_interval=1.0, once=False):
+        self.threads = threads
+        self.poll_interval = poll_interval
+        self.once = once
+        self.stopped = threading.Event()
+        self.lock = threading.Lock()
+        self.done = 0
+        self.failed = 0
+
+    def run(self):
+        with ThreadPoolExecutor(self.threads) as pool:
+            for future in [
+                pool.submit(self.loop) for _ in range(self.threads)
+            ]:
+                future.result()
+        return self.done, self.failed
+
+    def stop(self, *args):
+        self.stopped.set()
+
+    def loop(self):
+        try:
+            while not self.stopped.is_set():
+                close_old_connections()
+                job = claim_job()
+                if job is None:
+                    if self.once:
+                        return
+                    requeue_stale()
+                    self.stopped.wait(self.poll_interval)
+                    continue
+                succeeded = run_job(job)
+                if succeeded is None:
+                    continue
+                with self.lock:
+                    if succeeded:
+                        self.done += 1
+                    else:
+                        self.failed += 1
+        finally:
+            connection.close()
@@ -18,9 +18,9 @@ class RecipesAdmin(admin.ModelAdmin):
     list_filter = ('author', 'name', 'tags')
     inlines = (IngredientsInLine,)
 
+    @admin.display(description='в избранном')
     def in_favorite(self, obj):
-        favorite = obj.favoriterecipe.count()
-        return favorite
+        return obj.favorites_count
 
 
 admin.site.register(Ingredients, IngredientsAdmin)
@@ -0,0 +1,35 @@
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+from django.db.models import Max
+
+from .models import RecipeChange
+
+PRUNE_EVERY = 1000
+
+
+def record_change(recipe_id=None):
+    """Записывает в журнал изменение ингредиентов рецепта.
+
+    Без recipe_id читатели журнала перестраивают данные целиком. Журнал
+    хранит последние RECIPE_CHANGES_KEEP записей.
+    """
+    change = RecipeChange.objects.create(recipe_id=recipe_id)
+    if change.pk % PRUNE_EVERY == 0:
+        RecipeChange.objects.filter(
+            pk__lte=change.pk - settings.RECIPE_CHANGES_KEEP
+        ).delete()
+    return change.pk
+
+
+def latest_change():
+    """Номер последней записи журнала или 0."""
+    return RecipeChange.objects.using(DEFAULT_DB_ALIAS).aggregate(
+        latest=Max('pk')
+    )['latest'] or 0
+
+
+def changes_since(change_id):
+    """Пары (номер записи, id рецепта) после change_id по порядку."""
+    return list(RecipeChange.objects.using(DEFAULT_DB_ALIAS).filter(
+        pk__gt=change_id
+    ).values_list('pk', 'recipe_id').order_by('pk'))
@@ -0,0 +1,51 @@
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce, Greatest
+
+
+class CountersMixin:
+    """Модель со счётчиками, которые меняет только change_counter.
+
+    save() загруженного объекта не записывает counter_fields: значения
+    в объекте могли устареть, пока счётчик меняли другие запросы.
+    """
+    counter_fields = ()
+
+    def save(self, *args, **kwargs):
+        if (not self._state.adding and not kwargs.get('force_insert')
+                and kwargs.get('update_fields') is None):
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key
+                and field.name not in self.counter_fields
+            ]
+        super().save(*args, **kwargs)
+
+
+def change_counter(queryset, field, delta):
+    """Атомарно изменяет счётчик, не опуская его ниже нуля."""
+    return queryset.update(**{field: Greatest(F(field) + delta, 0)})
+
+
+def count_of(model, field):
+    """Подзапрос с количеством строк model, ссылающихся на объект."""
+    return Coalesce(Subquery(
+        model.objects.filter(
+            **{field: OuterRef('pk')}
+        ).order_by().values(field).annotate(
+            total=Count('pk')
+        ).values('total')
+    ), 0)
+
+
+def recount_recipes(recipes, favorite, shopping_cart):
+    return recipes.objects.update(
+        favorites_count=count_of(favorite, 'recipe'),
+        shopping_cart_count=count_of(shopping_cart, 'recipe'),
+    )
+
+
+def recount_users(users, recipes, subscribe):
+    return users.objects.update(
+        recipes_count=count_of(recipes, 'author'),
+        followers_count=count_of(subscribe, 'author'),
+    )
@@ -0,0 +1,138 @@
+"""Лента рецептов авторов, на которых подписан пользователь.
+
+Записи ленты создаются при публикации рецепта для каждого подписчика
+автора (fan-out on write) и дозаполняются последними рецептами автора
+при подписке. Авторы, у которых подписчиков больше FEED_FANOUT_LIMIT,
+в ленты не раскладываются: их рецепты подмешиваются при чтении.
+"""
+from django.conf import settings
+from django.db import connection, transaction
+
+from users.models import CustomUser, Subscribe
+
+from .models import FeedEntry, Recipes
+
+
+def _fill(feed_entry, subscribe, user, recipes, condition, params):
+    """Записи ленты с последними рецептами авторов подписок.
+
+    Для каждой подписки, подходящей под condition, добавляется не
+    больше FEED_BACKFILL_SIZE рецептов автора. Авторы с числом
+    подписчиков больше FEED_FANOUT_LIMIT пропускаются.
+    """
+    feed, subscribe, user, recipes = (
+        model._meta for model in (feed_entry, subscribe, user, recipes)
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'INSERT INTO {feed.db_table} (user_id, recipe_id, author_id) '
+            f'SELECT user_id, recipe_id, author_id FROM ('
+            f'SELECT s.user_id, r.id AS recipe_id, r.author_id, '
+            f'ROW_NUMBER() OVER (PARTITION BY s.id ORDER BY r.id DESC) '
+            f'AS position '
+            f'FROM {subscribe.db_table} s '
+            f'JOIN {user.db_table} a ON a.id = s.author_id '
+            f'JOIN {recipes.db_table} r ON r.author_id = s.author_id '
+            f'WHERE a.followers_count <= %s AND {condition}'
+            f') ranked WHERE position <= %s ON CONFLICT DO NOTHING',
+            [settings.FEED_FANOUT_LIMIT, *params,
+             settings.FEED_BACKFILL_SIZE]
+        )
+        return cursor.rowcount
+
+
+def rebuild_feed(feed_entry, subscribe, user, recipes):
+    """Заполняет ленты всех пользователей заново."""
+    with transaction.atomic():
+        feed_entry.objects.all().delete()
+        return _fill(feed_entry, subscribe, user, recipes, '1 = 1', [])
+
+
+def fill_subscriptions(user_id, author_ids):
+    """Дозаполняет ленту пользователя рецептами новых авторов."""
+    author_ids = list(author_ids)
+    placeholders = ', '.join(['%s'] * len(author_ids))
+    return _fill(
+        FeedEntry, Subscribe, CustomUser, Recipes,
+        f's.user_id = %s AND s.author_id IN ({placeholders})',
+        [user_id, *author_ids]
+    )
+
+
+def fill_authors(author_ids):
+    """Раскладывает рецепты авторов по лентам всех их подписчиков.
+
+    Нужно, когда число подписчиков автора опустилось до
+    FEED_FANOUT_LIMIT и его рецепты перестали подмешиваться при чтении.
+    """
+    author_ids = list(author_ids)
+    placeholders = ', '.join(['%s'] * len(author_ids))
+    return _fill(
+        FeedEntry, Subscribe, CustomUser, Recipes,
+        f's.author_id IN ({placeholders})', author_ids
+    )
+
+
+def prune_subscriptions(user_id, author_ids):
+    """Убирает из ленты пользователя рецепты авторов после отписки."""
+    return FeedEntry.objects.filter(
+        user_id=user_id, author_id__in=author_ids
+    ).delete()[0]
+
+
+def update_feed(user_id, author_ids, added):
+    """Приводит ленту в соответствие с изменившимися подписками.
+
+    Вызывается после изменения счётчиков подписчиков авторов.
+    """
+    author_ids = list(author_ids)
+    if added:
+        fill_subscriptions(user_id, author_ids)
+        return
+    prune_subscriptions(user_id, author_ids)
+    crossed = list(CustomUser.objects.filter(
+        pk__in=author_ids, followers_count=settings.FEED_FANOUT_LIMIT
+    ).values_list('pk', flat=True))
+    if crossed:
+        from .tasks import fill_author_feeds
+
+        fill_author_feeds.enqueue(author_ids=crossed)
+
+
+def fan_out(recipe):
+    """Добавляет новый рецепт в ленты подписчиков автора."""
+    feed, subscribe, user = (
+        model._meta for model in (FeedEntry, Subscribe, CustomUser)
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'INSERT INTO {feed.db_table} (user_id, recipe_id, author_id) '
+            f'SELECT s.user_id, %s, s.author_id '
+            f'FROM {subscribe.db_table} s '
+            f'JOIN {user.db_table} a ON a.id = s.author_id '
+            f'WHERE s.author_id = %s AND a.followers_count <= %s '
+            f'ON CONFLICT DO NOTHING',
+            [recipe.pk, recipe.author_id, settings.FEED_FANOUT_LIMIT]
+        )
+        return cursor.rowcount
+
+
+def feed_recipe_ids(user, limit, before=None):
+    """id рецептов ленты по убыванию, не больше limit, меньше before.
+
+    Разложенные записи и рецепты популярных авторов выбираются двумя
+    запросами по индексам и сливаются, поэтому стоимость чтения не
+    зависит от числа подписок пользователя.
+    """
+    entries = FeedEntry.objects.filter(user=user)
+    merged = Recipes.objects.filter(author__in=Subscribe.objects.filter(
+        user=user, author__followers_count__gt=settings.FEED_FANOUT_LIMIT
+    ).values('author'))
+    if before is not None:
+        entries = entries.filter(recipe_id__lt=before)
+        merged = merged.filter(pk__lt=before)
+    ids = set(entries.order_by('-recipe_id').values_list(
+        'recipe_id', flat=True
+    )[:limit])
+    ids.update(merged.order_by('-pk').values_list('pk', flat=True)[:limit])
+    return sorted(ids, reverse=True)[:limit]
@@ -0,0 +1,244 @@
+import io
+import random
+import time
+from datetime import timedelta
+from uuid import uuid4
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.files.base import ContentFile
+from django.db import transaction
+from django.utils import timezone
+from PIL import Image
+
+from users.models import Subscribe
+
+from .changes import record_change
+from .counters import recount_recipes, recount_users
+from .feed import fill_authors
+from .images import make_variants
+from .loaders import batched
+from .models import (Favorite, Ingredients, IngredientsRecipes, Recipes,
+                     ShoppingCart, Tags)
+from .search import update_search_vector
+from .totals import fill_totals
+from .trending import compute_trending
+
+User = get_user_model()
+
+FIRST_NAMES = ('Анна', 'Иван', 'Мария', 'Пётр', 'Ольга', 'Сергей', 'Елена',
+               'Дмитрий', 'Наталья', 'Алексей')
+LAST_NAMES = ('Иванов', 'Смирнов', 'Кузнецов', 'Попов', 'Васильев',
+              'Петров', 'Соколов', 'Михайлов', 'Новиков', 'Фёдоров')
+DISH_ADJECTIVES = ('Домашний', 'Быстрый', 'Пряный', 'Летний', 'Осенний',
+                   'Бабушкин', 'Острый', 'Нежный', 'Праздничный', 'Простой')
+DISHES = ('суп', 'салат', 'пирог', 'плов', 'омлет', 'борщ', 'рагу',
+          'гуляш', 'соус', 'десерт', 'хлеб', 'паштет')
+STEPS = ('Нарежьте продукты.', 'Обжарьте на среднем огне.',
+         'Добавьте специи по вкусу.', 'Тушите под крышкой.',
+         'Запекайте в разогретой духовке.', 'Подавайте горячим.',
+         'Перемешайте и дайте настояться.', 'Украсьте зеленью.')
+DEFAULT_PASSWORD = 'password'
+RELATIONS_PERIOD = timedelta(days=30)
+
+
+def zipf_weights(count, exponent=1.1):
+    """Веса по закону Ципфа: немногие элементы встречаются чаще всех."""
+    return [1 / rank ** exponent for rank in range(1, count + 1)]
+
+
+class DataGenerator:
+    """Синтетические данные в объёме, близком к продакшену.
+
+    Авторы, популярность рецептов и ингредиентов распределены по закону
+    Ципфа, количество избранного, корзины и подписок у пользователя —
+    экспоненциально вокруг заданного среднего. Строки вставляются
+    пакетами через bulk_create, поэтому сигналы не срабатывают, и
+    счётчики, поисковый вектор и версии индексов обновляются в конце.
+    """
+
+    def __init__(self, users, recipes, favorites, cart, subscriptions,
+                 authors_share=0.2, batch_size=1000, seed=None,
+                 stdout=None):
+        self.users = users
+        self.recipes = recipes
+        self.favorites = favorites
+        self.cart = cart
+        self.subscriptions = subscriptions
+        self.authors_share = authors_share
+        self.batch_size = batch_size
+        self.random = random.Random(seed)
+        self.stdout = stdout
+
+    def generate(self):
+        ingredients = list(Ingredients.objects.values_list('pk', flat=True))
+        if not ingredients:
+            raise ValueError(
+                'Нет ингредиентов, сначала выполните loadingredients.'
+            )
+        tags = list(Tags.objects.values_list('pk', flat=True))
+        started = time.monotonic()
+        with transaction.atomic():
+            users = self.create_users()
+            authors = users[:max(int(len(users) * self.authors_share), 1)]
+            recipes = self.create_recipes(authors)
+            self.create_recipe_links(recipes, ingredients, tags)
+            self.create_relations(
+                Favorite, 'recipe', users, recipes, self.favorites,
+                'в избранном', timestamps=True,
+            )
+            self.create_relations(
+                ShoppingCart, 'recipe', users, recipes, self.cart,
+                'в корзинах', timestamps=True,
+            )
+            self.create_relations(
+                Subscribe, 'author', users, authors, self.subscriptions,
+                'подписок', skip_self=True,
+            )
+            recount_recipes(Recipes, Favorite, ShoppingCart)
+            recount_users(User, Recipes, Subscribe)
+            self.fill_feed(authors)
+            self.fill_totals(users)
+            update_search_vector(Recipes.objects.filter(
+                pk__range=(min(recipes), max(recipes))
+            ))
+            compute_trending()
+            record_change()
+        self._report('Готово', started)
+
+    def create_users(self):
+        prefix = uuid4().hex[:8]
+        password = make_password(DEFAULT_PASSWORD)
+        users = [
+            User(
+                username=f'user_{prefix}_{number}',
+                email=f'user_{prefix}_{number}@example.com',
+                first_name=self.random.choice(FIRST_NAMES),
+                last_name=self.random.choice(LAST_NAMES),
+                password=password,
+            )
+            for number in range(self.users)
+        ]
+        return self._bulk_create(User, users, 'пользователей')
+
+    def create_recipes(self, authors):
+        image = self.create_image()
+        chosen = self.random.choices(
+            authors, zipf_weights(len(authors)), k=self.recipes
+        )
+        recipes = [
+            Recipes(
+                author_id=author,
+                name=(f'{self.random.choice(DISH_ADJECTIVES)} '
+                      f'{self.random.choice(DISHES)} №{number + 1}'),
+                text=' '.join(self.random.sample(
+                    STEPS, self.random.randint(2, 5)
+                )),
+                image=image,
+                variants_image=image,
+                cooking_time=min(
+                    max(int(self.random.lognormvariate(3.3, 0.6)), 1), 600
+                ),
+            )
+            for number, author in enumerate(chosen)
+        ]
+        return self._bulk_create(Recipes, recipes, 'рецептов')
+
+    def create_image(self):
+        """Одна картинка на все рецепты, как при повторной загрузке."""
+        color = tuple(self.random.randrange(256) for _ in range(3))
+        buffer = io.BytesIO()
+        Image.new('RGB', (1024, 768), color).save(buffer, 'JPEG')
+        field = Recipes._meta.get_field('image')
+        name = field.storage.save(
+            f'{field.upload_to}image.jpg', ContentFile(buffer.getvalue())
+        )
+        make_variants(field.storage, name)
+        return name
+
+    def create_recipe_links(self, recipes, ingredients, tags):
+        weights = zipf_weights(len(ingredients))
+        links = []
+        for recipe in recipes:
+            for ingredient in self._sample(
+                ingredients, weights, self.random.randint(3, 12)
+            ):
+                links.append(IngredientsRecipes(
+                    recipes_id=recipe,
+                    ingredients_id=ingredient,
+                    amount=self.random.randint(1, 500),
+                ))
+        self._bulk_create(IngredientsRecipes, links, 'ингредиентов рецептов')
+        if not tags:
+            return
+        through = Recipes.tags.through
+        self._bulk_create(through, [
+            through(recipes_id=recipe, tags_id=tag)
+            for recipe in recipes
+            for tag in self.random.sample(
+                tags, self.random.randint(1, min(3, len(tags)))
+            )
+        ], 'тегов рецептов')
+
+    def create_relations(self, model, field, users, targets, mean, label,
+                         skip_self=False, timestamps=False):
+        """Связи пользователей с популярными объектами, в среднем mean.
+
+        С timestamps время добавления связей распределено по последним
+        RELATIONS_PERIOD дням.
+        """
+        if not mean or not targets:
+            return
+        weights = zipf_weights(len(targets))
+        now = timezone.now()
+        period = RELATIONS_PERIOD.total_seconds()
+        rows = []
+        for user in users:
+            count = min(int(self.random.expovariate(1 / mean)), len(targets))
+            for target in self._sample(targets, weights, count):
+                if skip_self and target == user:
+                    continue
+                values = {'user_id': user, f'{field}_id': target}
+                if timestamps:
+                    values['created'] = now - timedelta(
+                        seconds=self.random.uniform(0, period)
+                    )
+                rows.append(model(**values))
+        self._bulk_create(model, rows, label)
+
+    def fill_feed(self, authors):
+        started = time.monotonic()
+        entries = 0
+        for batch in batched(authors, self.batch_size):
+            entries += fill_authors(batch)
+        self._report(f'Записей лент: {entries}', started)
+
+    def fill_totals(self, users):
+        started = time.monotonic()
+        totals = 0
+        for batch in batched(users, self.batch_size):
+            totals += fill_totals(batch)
+        self._report(f'Сумм ингредиентов в корзинах: {totals}', started)
+
+    def _sample(self, population, weights, count):
+        """До count разных элементов с учётом весов."""
+        if count <= 0:
+            return set()
+        return set(self.random.choices(population, weights, k=count))
+
+    def _bulk_create(self, model, objects, label):
+        started = time.monotonic()
+        ids = []
+        for batch in batched(objects, self.batch_size):
+            created = model.objects.bulk_create(batch, ignore_conflicts=(
+                model is not User and model is not Recipes
+            ))
+            ids.extend(obj.pk for obj in created)
+        self._report(f'Записей {label}: {len(objects)}', started)
+        return ids
+
+    def _report(self, message, started):
+        if self.stdout is not None:
+            self.stdout.write(
+                f'{message} за {time.monotonic() - started:.1f} с'
+            )
@@ -0,0 +1,55 @@
+import io
+import os
+
+from django.core.files.base import ContentFile
+from PIL import Image
+
+IMAGE_VARIANT_WIDTHS = (320, 640)
+IMAGE_VARIANT_FORMATS = {'jpeg': 'JPEG', 'webp': 'WEBP'}
+
+
+def variant_name(name, width, extension):
+    directory, filename = os.path.split(name)
+    stem = os.path.splitext(filename)[0]
+    return f'{directory}/variants/{stem}_{width}.{extension}'
+
+
+def variant_names(name):
+    """Имена уменьшенных копий изображения по ширине и формату."""
+    return {
+        width: {
+            extension: variant_name(name, width, extension)
+            for extension in IMAGE_VARIANT_FORMATS
+        }
+        for width in IMAGE_VARIANT_WIDTHS
+    }
+
+
+def variants_ready(recipe_model, name):
+    """Отмечает, что у рецептов с изображением name есть все копии."""
+    recipe_model.objects.filter(image=name).exclude(
+        variants_image=name
+    ).update(variants_image=name)
+
+
+def make_variants(storage, name):
+    """Создаёт недостающие уменьшенные копии изображения."""
+    missing = [
+        (width, extension, variant)
+        for width, variants in variant_names(name).items()
+        for extension, variant in variants.items()
+        if not storage.exists(variant)
+    ]
+    if not missing:
+        return
+    with storage.open(name) as file:
+        original = Image.open(file)
+        original.load()
+    for width, extension, variant in missing:
+        image = original.copy()
+        image.thumbnail((width, original.height))
+        if extension == 'jpeg' or image.mode not in ('RGB', 'RGBA'):
+            image = image.convert('RGB')
+        buffer = io.BytesIO()
+        image.save(buffer, IMAGE_VARIANT_FORMATS[extension], quality=85)
+        storage.save_as(variant, ContentFile(buffer.getvalue()))
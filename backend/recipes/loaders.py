@@ -0,0 +1,147 @@
+import csv
+import io
+import json
+import time
+from itertools import islice
+
+from django.db import connection, transaction
+
+from .versions import bump_version
+
+
+def read_csv(path, fields):
+    """Построчно читает csv-файл без заголовка."""
+    with open(path, encoding='utf-8', newline='') as csvfile:
+        for row in csv.reader(csvfile):
+            if row:
+                yield dict(zip(fields, row))
+
+
+def read_json(path, chunk_size=64 * 1024):
+    """Потоково читает json-массив объектов, не загружая файл целиком."""
+    decoder = json.JSONDecoder()
+    with open(path, encoding='utf-8') as jsonfile:
+        buffer = ''
+        while True:
+            chunk = jsonfile.read(chunk_size)
+            buffer += chunk
+            position = 0
+            while True:
+                while (position < len(buffer)
+                       and buffer[position] in '[, \t\r\n'):
+                    position += 1
+                if position >= len(buffer) or buffer[position] == ']':
+                    break
+                try:
+                    row, position = decoder.raw_decode(buffer, position)
+                except json.JSONDecodeError:
+                    if not chunk:
+                        raise
+                    break
+                yield row
+            buffer = buffer[position:]
+            if not chunk:
+                return
+
+
+def batched(rows, size):
+    rows = iter(rows)
+    while True:
+        batch = list(islice(rows, size))
+        if not batch:
+            return
+        yield batch
+
+
+class CatalogLoader:
+    """Пакетная идемпотентная загрузка справочника.
+
+    Строки сопоставляются с существующими по естественному ключу
+    unique_fields: новые добавляются, у найденных обновляются
+    update_fields. В PostgreSQL пакет передаётся через COPY во
+    временную таблицу, в остальных базах используется bulk_create.
+    """
+
+    def __init__(self, model, unique_fields, update_fields=(),
+                 batch_size=1000, use_copy=True, stdout=None):
+        self.model = model
+        self.unique_fields = list(unique_fields)
+        self.update_fields = list(update_fields)
+        self.fields = self.unique_fields + self.update_fields
+        self.batch_size = batch_size
+        self.use_copy = use_copy and connection.vendor == 'postgresql'
+        self.stdout = stdout
+
+    def load(self, rows):
+        started = time.monotonic()
+        total = 0
+        for batch in batched(rows, self.batch_size):
+            unique = {
+                tuple(row[field] for field in self.unique_fields): row
+                for row in batch
+            }
+            with transaction.atomic():
+                if self.use_copy:
+                    self._copy(unique.values())
+                else:
+                    self._bulk_create(unique.values())
+            total += len(batch)
+            self._report(total, started)
+        bump_version(self.model)
+        return total
+
+    def _bulk_create(self, rows):
+        objects = [self.model(**row) for row in rows]
+        if self.update_fields:
+            self.model.objects.bulk_create(
+                objects,
+                update_conflicts=True,
+                unique_fields=self.unique_fields,
+                update_fields=self.update_fields,
+            )
+        else:
+            self.model.objects.bulk_create(objects, ignore_conflicts=True)
+
+    def _copy(self, rows):
+        table = self.model._meta.db_table
+        columns = ', '.join(
+            self.model._meta.get_field(field).column for field in self.fields
+        )
+        unique = ', '.join(
+            self.model._meta.get_field(field).column
+            for field in self.unique_fields
+        )
+        if self.update_fields:
+            conflict = 'DO UPDATE SET ' + ', '.join(
+                f'{column} = EXCLUDED.{column}' for column in (
+                    self.model._meta.get_field(field).column
+                    for field in self.update_fields
+                )
+            )
+        else:
+            conflict = 'DO NOTHING'
+        data = io.StringIO()
+        writer = csv.writer(data)
+        for row in rows:
+            writer.writerow([row[field] for field in self.fields])
+        data.seek(0)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'CREATE TEMP TABLE catalog_load ON COMMIT DROP AS '
+                f'SELECT {columns} FROM {table} WITH NO DATA'
+            )
+            cursor.copy_expert(
+                f'COPY catalog_load ({columns}) FROM STDIN WITH CSV', data
+            )
+            cursor.execute(
+                f'INSERT INTO {table} ({columns}) '
+                f'SELECT {columns} FROM catalog_load '
+                f'ON CONFLICT ({unique}) {conflict}'
+            )
+
+    def _report(self, total, started):
+        if self.stdout is None:
+            return
+        elapsed = time.monotonic() - started
+        speed = total / elapsed if elapsed else total
+        self.stdout.write(f'Обработано записей: {total} ({speed:.0f} в сек.)')
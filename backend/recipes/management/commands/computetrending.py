@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from recipes.trending import compute_trending
+
+
+class Command(BaseCommand):
+    """Пересчёт рейтинга популярных рецептов."""
+    help = ('Пересчёт рейтинга популярных рецептов; запускается '
+            'периодически, например cron раз в 10 минут')
+
+    def handle(self, *args, **kwargs):
+        self.stdout.write(
+            f'Рецептов в рейтинге: {compute_trending()}'
+        )
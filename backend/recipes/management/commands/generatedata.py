@@ -0,0 +1,52 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from recipes.generators import DEFAULT_PASSWORD, DataGenerator
+
+
+class Command(BaseCommand):
+    """Генерация пользователей, рецептов, избранного, корзин и подписок."""
+    help = 'Генерация пользователей, рецептов, избранного, корзин и подписок'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument('--recipes', type=int, default=5000)
+        parser.add_argument(
+            '--favorites', type=int, default=20,
+            help='Среднее число рецептов в избранном у пользователя'
+        )
+        parser.add_argument(
+            '--cart', type=int, default=5,
+            help='Среднее число рецептов в корзине у пользователя'
+        )
+        parser.add_argument(
+            '--subscriptions', type=int, default=10,
+            help='Среднее число подписок у пользователя'
+        )
+        parser.add_argument(
+            '--authors-share', type=float, default=0.2,
+            help='Доля пользователей, публикующих рецепты'
+        )
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--seed', type=int)
+
+    def handle(self, *args, **options):
+        if options['users'] < 1 or options['recipes'] < 1:
+            raise CommandError('Нужен хотя бы один пользователь и рецепт.')
+        generator = DataGenerator(
+            users=options['users'],
+            recipes=options['recipes'],
+            favorites=options['favorites'],
+            cart=options['cart'],
+            subscriptions=options['subscriptions'],
+            authors_share=options['authors_share'],
+            batch_size=options['batch_size'],
+            seed=options['seed'],
+            stdout=self.stdout,
+        )
+        try:
+            generator.generate()
+        except ValueError as error:
+            raise CommandError(error)
+        self.stdout.write(
+            f'Данные созданы, пароль пользователей: {DEFAULT_PASSWORD}'
+        )
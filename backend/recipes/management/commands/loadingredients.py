@@ -1,22 +1,37 @@
-import csv
-
 from django.conf import settings
 from django.core.management.base import BaseCommand
 
+from recipes.loaders import CatalogLoader, read_csv, read_json
 from recipes.models import Ingredients
 
 
 class Command(BaseCommand):
-    """Импорт ингредиентов из scv-file в db."""
-    help = 'Импорт ингредиентов из scv-file в db'
+    """Импорт ингредиентов из csv- или json-file в db."""
+    help = 'Импорт ингредиентов из csv- или json-file в db'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--path', default=f'{settings.BASE_DIR}/data/ingredients.csv',
+            help='Путь к файлу с ингредиентами (.csv или .json)'
+        )
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument(
+            '--no-copy', action='store_true',
+            help='Не использовать COPY в PostgreSQL'
+        )
 
-    def handle(self, *args, **kwargs):
-        data_path = settings.BASE_DIR
-        with open(
-            f'{data_path}/data/ingredients.csv', 'r', encoding='utf-8'
-        ) as csvfile:
-            data = csv.reader(csvfile)
-            for row in data:
-                Ingredients.objects.create(name=row[0],
-                                           measurement_unit=row[1])
+    def handle(self, *args, **options):
+        path = options['path']
+        if path.endswith('.json'):
+            rows = read_json(path)
+        else:
+            rows = read_csv(path, ('name', 'measurement_unit'))
+        loader = CatalogLoader(
+            Ingredients,
+            unique_fields=('name', 'measurement_unit'),
+            batch_size=options['batch_size'],
+            use_copy=not options['no_copy'],
+            stdout=self.stdout,
+        )
+        loader.load(rows)
         self.stdout.write('Ингредиенты загружены')
@@ -1,8 +1,7 @@
-import json
-
 from django.conf import settings
 from django.core.management.base import BaseCommand
 
+from recipes.loaders import CatalogLoader, read_json
 from recipes.models import Tags
 
 
@@ -10,14 +9,25 @@ class Command(BaseCommand):
     """Импорт тегов из json-file в db."""
     help = 'Импорт тегов из json-file в db'
 
-    def handle(self, *args, **kwargs):
-        data_path = settings.BASE_DIR
-        with open(
-            f'{data_path}/data/tags.json', 'r', encoding='utf-8'
-        ) as jsonfile:
-            data = json.load(jsonfile)
-            for row in data:
-                Tags.objects.create(name=row["name"],
-                                    color=row["color"],
-                                    slug=row["slug"])
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--path', default=f'{settings.BASE_DIR}/data/tags.json',
+            help='Путь к json-файлу с тегами'
+        )
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument(
+            '--no-copy', action='store_true',
+            help='Не использовать COPY в PostgreSQL'
+        )
+
+    def handle(self, *args, **options):
+        loader = CatalogLoader(
+            Tags,
+            unique_fields=('slug',),
+            update_fields=('name', 'color'),
+            batch_size=options['batch_size'],
+            use_copy=not options['no_copy'],
+            stdout=self.stdout,
+        )
+        loader.load(read_json(options['path']))
         self.stdout.write('Теги загружены')
@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+
+from recipes.images import make_variants, variants_ready
+from recipes.models import Recipes
+
+
+class Command(BaseCommand):
+    """Создание уменьшенных копий изображений существующих рецептов."""
+    help = 'Создание уменьшенных копий изображений существующих рецептов'
+
+    def handle(self, *args, **kwargs):
+        storage = Recipes._meta.get_field('image').storage
+        names = Recipes.objects.exclude(image='').values_list(
+            'image', flat=True
+        ).distinct()
+        for name in names.iterator():
+            try:
+                make_variants(storage, name)
+            except OSError as error:
+                self.stderr.write(f'{name}: {error}')
+            else:
+                variants_ready(Recipes, name)
+        self.stdout.write('Копии изображений созданы')
@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from recipes.feed import rebuild_feed
+from recipes.models import FeedEntry, Recipes
+from users.models import CustomUser, Subscribe
+
+
+class Command(BaseCommand):
+    """Заполнение лент подписок заново."""
+    help = ('Заполнение лент подписок заново, например после изменения '
+            'FEED_FANOUT_LIMIT или FEED_BACKFILL_SIZE')
+
+    def handle(self, *args, **kwargs):
+        entries = rebuild_feed(FeedEntry, Subscribe, CustomUser, Recipes)
+        self.stdout.write(f'Ленты заполнены: записей {entries}')
@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from recipes.counters import recount_recipes, recount_users
+from recipes.models import (Favorite, IngredientsRecipes, Recipes,
+                            ShoppingCart, ShoppingCartTotal)
+from recipes.totals import rebuild_totals
+from users.models import CustomUser, Subscribe
+
+
+class Command(BaseCommand):
+    """Пересчёт счётчиков и сумм ингредиентов в корзинах."""
+    help = ('Пересчёт счётчиков избранного, корзины, рецептов, подписчиков '
+            'и сумм ингредиентов в корзинах')
+
+    def handle(self, *args, **kwargs):
+        with transaction.atomic():
+            recipes = recount_recipes(Recipes, Favorite, ShoppingCart)
+            users = recount_users(CustomUser, Recipes, Subscribe)
+            totals = rebuild_totals(
+                ShoppingCartTotal, ShoppingCart, IngredientsRecipes
+            )
+        self.stdout.write(
+            f'Счётчики пересчитаны: рецептов {recipes}, '
+            f'пользователей {users}, сумм в корзинах {totals}'
+        )
@@ -0,0 +1,47 @@
+# Generated by Django 4.2.3 on 2026-10-18 18:43
+
+from django.db import migrations, models
+from django.db.models import Count, Min
+
+
+def merge_duplicate_ingredients(apps, schema_editor):
+    Ingredients = apps.get_model('recipes', 'Ingredients')
+    IngredientsRecipes = apps.get_model('recipes', 'IngredientsRecipes')
+    duplicates = Ingredients.objects.values(
+        'name', 'measurement_unit'
+    ).annotate(keep=Min('id'), total=Count('id')).filter(total__gt=1)
+    for item in duplicates:
+        others = Ingredients.objects.filter(
+            name=item['name'], measurement_unit=item['measurement_unit']
+        ).exclude(id=item['keep'])
+        for link in IngredientsRecipes.objects.filter(ingredients__in=others):
+            kept = IngredientsRecipes.objects.filter(
+                recipes_id=link.recipes_id, ingredients_id=item['keep']
+            ).first()
+            if kept is None:
+                link.ingredients_id = item['keep']
+                link.save(update_fields=['ingredients'])
+                continue
+            # Рецепт уже содержит оставляемый ингредиент: количества
+            # складываются, чтобы список покупок не изменился.
+            kept.amount += link.amount
+            kept.save(update_fields=['amount'])
+            link.delete()
+        others.delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0002_initial'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            merge_duplicate_ingredients, migrations.RunPython.noop
+        ),
+        migrations.AddConstraint(
+            model_name='ingredients',
+            constraint=models.UniqueConstraint(fields=('name', 'measurement_unit'), name='unique_ingredient_unit'),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 4.2.3 on 2026-10-18 18:44
+
+from django.db import migrations, models
+import recipes.storage
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0003_ingredients_unique_name_unit'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='recipes',
+            name='image',
+            field=models.ImageField(default=None, storage=recipes.storage.ContentAddressedStorage(), upload_to='recipes/images/', verbose_name='изображение'),
+        ),
+    ]
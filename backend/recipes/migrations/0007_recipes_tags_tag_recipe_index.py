@@ -0,0 +1,16 @@
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0006_recipes_search_vector'),
+    ]
+
+    operations = [
+        migrations.RunSQL(
+            'CREATE INDEX recipes_recipes_tags_tag_recipe_idx '
+            'ON recipes_recipes_tags (tags_id, recipes_id)',
+            'DROP INDEX recipes_recipes_tags_tag_recipe_idx',
+        ),
+    ]
@@ -0,0 +1,60 @@
+# Generated by Django 4.2.3 on 2026-10-18 19:09
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def fill_feed(apps, schema_editor):
+    # Последние FEED_BACKFILL_SIZE рецептов каждого автора подписки,
+    # кроме авторов с числом подписчиков больше FEED_FANOUT_LIMIT.
+    feed, subscribe, user, recipes = (
+        apps.get_model(*label.split('.'))._meta for label in (
+            'recipes.FeedEntry', 'users.Subscribe', 'users.CustomUser',
+            'recipes.Recipes',
+        )
+    )
+    schema_editor.execute(
+        f'INSERT INTO {feed.db_table} (user_id, recipe_id, author_id) '
+        f'SELECT user_id, recipe_id, author_id FROM ('
+        f'SELECT s.user_id, r.id AS recipe_id, r.author_id, '
+        f'ROW_NUMBER() OVER (PARTITION BY s.id ORDER BY r.id DESC) '
+        f'AS position '
+        f'FROM {subscribe.db_table} s '
+        f'JOIN {user.db_table} a ON a.id = s.author_id '
+        f'JOIN {recipes.db_table} r ON r.author_id = s.author_id '
+        f'WHERE a.followers_count <= %s'
+        f') ranked WHERE position <= %s',
+        [settings.FEED_FANOUT_LIMIT, settings.FEED_BACKFILL_SIZE]
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('recipes', '0007_recipes_tags_tag_recipe_index'),
+        ('users', '0002_customuser_counters'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FeedEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('author', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL, verbose_name='автор')),
+                ('recipe', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='feedentries', to='recipes.recipes', verbose_name='рецепт')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='feed', to=settings.AUTH_USER_MODEL, verbose_name='подписчик')),
+            ],
+            options={
+                'verbose_name': 'Запись ленты',
+                'verbose_name_plural': 'Записи ленты',
+                'ordering': ['-recipe_id'],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='feedentry',
+            constraint=models.UniqueConstraint(fields=('user', 'recipe'), name='unique_feed_entry'),
+        ),
+        migrations.RunPython(fill_feed, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,48 @@
+# Generated by Django 4.2.3 on 2026-10-18 19:12
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def fill_totals(apps, schema_editor):
+    totals, cart, links = (
+        apps.get_model('recipes', name)._meta
+        for name in ('ShoppingCartTotal', 'ShoppingCart', 'IngredientsRecipes')
+    )
+    schema_editor.execute(
+        f'INSERT INTO {totals.db_table} (user_id, ingredient_id, amount) '
+        f'SELECT c.user_id, i.ingredients_id, SUM(i.amount) '
+        f'FROM {cart.db_table} c '
+        f'JOIN {links.db_table} i ON i.recipes_id = c.recipe_id '
+        f'GROUP BY c.user_id, i.ingredients_id'
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('recipes', '0008_feedentry'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ShoppingCartTotal',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('amount', models.IntegerField(verbose_name='количество')),
+                ('ingredient', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='shoppingcarttotals', to='recipes.ingredients', verbose_name='ингредиент')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='shoppingcarttotals', to=settings.AUTH_USER_MODEL, verbose_name='пользователь')),
+            ],
+            options={
+                'verbose_name': 'Ингредиент списка покупок',
+                'verbose_name_plural': 'Ингредиенты списка покупок',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='shoppingcarttotal',
+            constraint=models.UniqueConstraint(fields=('user', 'ingredient'), name='unique_cart_total'),
+        ),
+        migrations.RunPython(fill_totals, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,52 @@
+# Generated by Django 4.2.3 on 2026-10-18 19:14
+
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+def backdate_existing(apps, schema_editor):
+    # Время добавления старых связей неизвестно; default дал бы им время
+    # миграции, и все они попали бы в окно популярности разом.
+    created = django.utils.timezone.now() - timedelta(
+        days=settings.TRENDING_WINDOW_DAYS + 1
+    )
+    for model in ('Favorite', 'ShoppingCart'):
+        apps.get_model('recipes', model).objects.update(created=created)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0009_shoppingcarttotal'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='favorite',
+            name='created',
+            field=models.DateTimeField(db_index=True, default=django.utils.timezone.now, editable=False, verbose_name='добавлен'),
+        ),
+        migrations.AddField(
+            model_name='shoppingcart',
+            name='created',
+            field=models.DateTimeField(db_index=True, default=django.utils.timezone.now, editable=False, verbose_name='добавлен'),
+        ),
+        migrations.RunPython(backdate_existing, migrations.RunPython.noop),
+        migrations.CreateModel(
+            name='TrendingRecipe',
+            fields=[
+                ('recipe', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='trending', serialize=False, to='recipes.recipes', verbose_name='рецепт')),
+                ('score', models.FloatField(verbose_name='популярность')),
+            ],
+            options={
+                'verbose_name': 'Популярный рецепт',
+                'verbose_name_plural': 'Популярные рецепты',
+                'ordering': ['-score'],
+                'indexes': [models.Index(fields=['-score', '-recipe'], name='trending_score_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,46 @@
+# Generated by Django 4.2.3 on 2026-10-18 19:42
+
+import os
+
+from django.db import migrations, models
+
+# Копии, которые создавал makeimagevariants на момент миграции.
+VARIANT_WIDTHS = (320, 640)
+VARIANT_EXTENSIONS = ('jpeg', 'webp')
+
+
+def variants(name):
+    directory, filename = os.path.split(name)
+    stem = os.path.splitext(filename)[0]
+    return [
+        f'{directory}/variants/{stem}_{width}.{extension}'
+        for width in VARIANT_WIDTHS for extension in VARIANT_EXTENSIONS
+    ]
+
+
+def mark_ready(apps, schema_editor):
+    # Копии старых изображений могли уже быть созданы makeimagevariants.
+    Recipes = apps.get_model('recipes', 'Recipes')
+    storage = Recipes._meta.get_field('image').storage
+    names = Recipes.objects.exclude(image='').values_list(
+        'image', flat=True
+    ).distinct()
+    for name in names:
+        if all(storage.exists(variant) for variant in variants(name)):
+            Recipes.objects.filter(image=name).update(variants_image=name)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0012_recipechange'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recipes',
+            name='variants_image',
+            field=models.CharField(blank=True, editable=False, max_length=100, verbose_name='изображение с готовыми копиями'),
+        ),
+        migrations.RunPython(mark_ready, migrations.RunPython.noop),
+    ]
@@ -1,6 +1,11 @@
 from django.contrib.auth import get_user_model
+from django.contrib.postgres.search import SearchVectorField
 from django.core.validators import MinValueValidator
 from django.db import models
+from django.utils import timezone
+
+from .counters import CountersMixin
+from .storage import ContentAddressedStorage
 
 User = get_user_model()
 
@@ -19,6 +24,12 @@ class Ingredients(models.Model):
     class Meta:
         verbose_name = 'Ингредиент'
         verbose_name_plural = 'Ингредиенты'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['name', 'measurement_unit'],
+                name='unique_ingredient_unit'
+            )
+        ]
 
     def __str__(self):
         return self.name
@@ -46,8 +57,10 @@ class Tags(models.Model):
         return self.name
 
 
-class Recipes(models.Model):
+class Recipes(CountersMixin, models.Model):
     """Модель для рецептов."""
+    counter_fields = ('favorites_count', 'shopping_cart_count')
+
     name = models.CharField(
         verbose_name='название',
         max_length=200
@@ -68,9 +81,16 @@ class Recipes(models.Model):
     )
     image = models.ImageField(
         upload_to='recipes/images/',
+        storage=ContentAddressedStorage(),
         default=None,
         verbose_name='изображение'
     )
+    variants_image = models.CharField(
+        max_length=100,
+        blank=True,
+        editable=False,
+        verbose_name='изображение с готовыми копиями'
+    )
     tags = models.ManyToManyField(
         Tags,
         related_name='tags',
@@ -82,6 +102,21 @@ class Recipes(models.Model):
             MinValueValidator(1),
         ]
     )
+    favorites_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='в избранном'
+    )
+    shopping_cart_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='в списках покупок'
+    )
+    search_vector = SearchVectorField(
+        null=True,
+        editable=False,
+        verbose_name='поисковый вектор'
+    )
 
     class Meta:
         ordering = ['-id']
@@ -140,6 +175,12 @@ class Favorite(models.Model):
         related_name='favoriterecipe',
         verbose_name='избранное'
     )
+    created = models.DateTimeField(
+        default=timezone.now,
+        db_index=True,
+        editable=False,
+        verbose_name='добавлен'
+    )
 
     class Meta:
         ordering = ['-id']
@@ -166,6 +207,12 @@ class ShoppingCart(models.Model):
         related_name='shoppingcartrecipe',
         verbose_name='рецепт'
     )
+    created = models.DateTimeField(
+        default=timezone.now,
+        db_index=True,
+        editable=False,
+        verbose_name='добавлен'
+    )
 
     class Meta:
         ordering = ['-id']
@@ -176,3 +223,116 @@ class ShoppingCart(models.Model):
                 fields=['user', 'recipe'], name='user_cart'
             )
         ]
+
+
+class FeedEntry(models.Model):
+    """Запись ленты подписок: рецепт автора, на которого подписан user."""
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='feed',
+        verbose_name='подписчик'
+    )
+    recipe = models.ForeignKey(
+        Recipes,
+        on_delete=models.CASCADE,
+        related_name='feedentries',
+        verbose_name='рецепт'
+    )
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='+',
+        verbose_name='автор'
+    )
+
+    class Meta:
+        ordering = ['-recipe_id']
+        verbose_name = 'Запись ленты'
+        verbose_name_plural = 'Записи ленты'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'recipe'], name='unique_feed_entry'
+            )
+        ]
+
+
+class ShoppingCartTotal(models.Model):
+    """Суммарное количество ингредиента во всех рецептах корзины."""
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='shoppingcarttotals',
+        verbose_name='пользователь'
+    )
+    ingredient = models.ForeignKey(
+        Ingredients,
+        on_delete=models.CASCADE,
+        related_name='shoppingcarttotals',
+        verbose_name='ингредиент'
+    )
+    amount = models.IntegerField(verbose_name='количество')
+
+    class Meta:
+        verbose_name = 'Ингредиент списка покупок'
+        verbose_name_plural = 'Ингредиенты списка покупок'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'ingredient'], name='unique_cart_total'
+            )
+        ]
+
+
+class TrendingRecipe(models.Model):
+    """Рецепт в рейтинге популярности последнего времени."""
+    recipe = models.OneToOneField(
+        Recipes,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='trending',
+        verbose_name='рецепт'
+    )
+    score = models.FloatField(verbose_name='популярность')
+
+    class Meta:
+        ordering = ['-score']
+        verbose_name = 'Популярный рецепт'
+        verbose_name_plural = 'Популярные рецепты'
+        indexes = [
+            models.Index(
+                fields=['-score', '-recipe'], name='trending_score_idx'
+            )
+        ]
+
+
+class CatalogVersion(models.Model):
+    """Версия данных модели для сброса кешей во всех процессах."""
+    label = models.CharField(
+        max_length=100,
+        primary_key=True,
+        verbose_name='модель'
+    )
+    version = models.FloatField(verbose_name='версия')
+
+    class Meta:
+        verbose_name = 'Версия справочника'
+        verbose_name_plural = 'Версии справочников'
+
+    def __str__(self):
+        return f'{self.label}: {self.version}'
+
+
+class RecipeChange(models.Model):
+    """Запись журнала изменений ингредиентов рецептов.
+
+    Пустой recipe_id означает изменение многих рецептов сразу.
+    """
+    id = models.BigAutoField(primary_key=True)
+    recipe_id = models.IntegerField(
+        null=True,
+        verbose_name='рецепт'
+    )
+
+    class Meta:
+        verbose_name = 'Изменение рецепта'
+        verbose_name_plural = 'Изменения рецептов'
@@ -0,0 +1,89 @@
+from django.db import connection, transaction
+from django.dispatch import Signal
+from django.utils import timezone
+
+# Отправляется после массового добавления или удаления связей
+# пользователя (избранное, корзина, подписки), которые обходят
+# post_save и post_delete. Аргументы: user_id, ids, added.
+relations_changed = Signal()
+
+# Отправляется после изменения ингредиентов рецепта массовыми запросами
+# (bulk_create, bulk_update), которые обходят post_save.
+# Аргументы: recipe_id, deltas — {id ингредиента: изменение количества}.
+ingredients_changed = Signal()
+
+
+def _columns(model):
+    user = model._meta.get_field('user')
+    target = next(
+        field for field in model._meta.concrete_fields
+        if field.is_relation and field is not user
+    )
+    return user.column, target
+
+
+def add_relations(model, user_id, ids):
+    """Добавляет связи одним INSERT, пропуская существующие.
+
+    Связи с несуществующими объектами не создаются. Возвращает
+    список id объектов, связь с которыми действительно добавлена.
+    """
+    ids = [int(pk) for pk in ids]
+    if not ids:
+        return []
+    user_column, target = _columns(model)
+    related = target.related_model._meta
+    columns, values = [user_column, target.column], ['%s', related.pk.column]
+    params = [user_id]
+    # Время добавления, если оно есть: INSERT обходит default поля.
+    created = next((
+        field for field in model._meta.concrete_fields
+        if field.name == 'created'
+    ), None)
+    if created is not None:
+        columns.append(created.column)
+        values.append('%s')
+        params.append(created.get_db_prep_value(timezone.now(), connection))
+    placeholders = ', '.join(['%s'] * len(ids))
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(
+            f'INSERT INTO {model._meta.db_table} ({", ".join(columns)}) '
+            f'SELECT {", ".join(values)} FROM {related.db_table} '
+            f'WHERE {related.pk.column} IN ({placeholders}) '
+            f'ON CONFLICT DO NOTHING RETURNING {target.column}',
+            [*params, *ids]
+        )
+        added = [row[0] for row in cursor.fetchall()]
+        if added:
+            relations_changed.send(
+                sender=model, user_id=user_id, ids=added, added=True
+            )
+    return added
+
+
+def remove_relations(model, user_id, ids=None):
+    """Удаляет связи одним DELETE; без ids удаляет все связи.
+
+    Возвращает список id объектов, связь с которыми была удалена.
+    """
+    user_column, target = _columns(model)
+    condition, params = f'{user_column} = %s', [user_id]
+    if ids is not None:
+        ids = [int(pk) for pk in ids]
+        if not ids:
+            return []
+        placeholders = ', '.join(['%s'] * len(ids))
+        condition += f' AND {target.column} IN ({placeholders})'
+        params += ids
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(
+            f'DELETE FROM {model._meta.db_table} WHERE {condition} '
+            f'RETURNING {target.column}',
+            params
+        )
+        removed = [row[0] for row in cursor.fetchall()]
+        if removed:
+            relations_changed.send(
+                sender=model, user_id=user_id, ids=removed, added=False
+            )
+    return removed
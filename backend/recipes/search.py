@@ -0,0 +1,42 @@
+from django.conf import settings
+from django.contrib.postgres.search import (SearchQuery, SearchRank,
+                                            SearchVector)
+from django.db import connection
+from django.db.models import Case, F, Q, Value, When
+
+
+def is_full_text_supported():
+    return connection.vendor == 'postgresql'
+
+
+def recipe_search_vector():
+    return (
+        SearchVector('name', weight='A', config=settings.SEARCH_CONFIG)
+        + SearchVector('text', weight='B', config=settings.SEARCH_CONFIG)
+    )
+
+
+def update_search_vector(queryset):
+    """Пересчитывает поисковый вектор рецептов одним UPDATE."""
+    if is_full_text_supported():
+        queryset.update(search_vector=recipe_search_vector())
+
+
+def search_recipes(queryset, value):
+    """Рецепты, подходящие под запрос, по убыванию релевантности.
+
+    В PostgreSQL используется поисковый вектор с GIN-индексом,
+    в остальных базах — поиск подстроки в названии и описании.
+    """
+    if is_full_text_supported():
+        query = SearchQuery(
+            value, config=settings.SEARCH_CONFIG, search_type='websearch'
+        )
+        return queryset.filter(search_vector=query).annotate(
+            rank=SearchRank(F('search_vector'), query)
+        ).order_by('-rank', '-id')
+    return queryset.filter(
+        Q(name__icontains=value) | Q(text__icontains=value)
+    ).annotate(
+        rank=Case(When(name__icontains=value, then=Value(2)), default=1)
+    ).order_by('-rank', '-id')
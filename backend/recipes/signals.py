@@ -0,0 +1,133 @@
+from collections import defaultdict
+
+from django.db.models import QuerySet
+from django.db.models.signals import (post_delete, post_save, pre_delete,
+                                      pre_save)
+from django.dispatch import receiver
+
+from .counters import change_counter
+from .models import (Favorite, Ingredients, IngredientsRecipes, Recipes,
+                     ShoppingCart, Tags, User)
+from .relations import ingredients_changed, relations_changed
+from .search import update_search_vector
+from .tasks import fan_out_recipe, make_image_variants
+from .totals import change_cart, change_recipe
+from .versions import bump_version
+
+
+@receiver(post_save, sender=Ingredients)
+@receiver(post_delete, sender=Ingredients)
+@receiver(post_save, sender=Tags)
+@receiver(post_delete, sender=Tags)
+def catalog_changed(sender, **kwargs):
+    bump_version(sender)
+
+
+@receiver(post_save, sender=Recipes)
+def recipe_saved(sender, instance, created, update_fields, **kwargs):
+    if created:
+        change_counter(
+            User.objects.filter(pk=instance.author_id), 'recipes_count', 1
+        )
+        fan_out_recipe.enqueue(recipe_id=instance.pk)
+    if update_fields is None or {'name', 'text'} & set(update_fields):
+        update_search_vector(Recipes.objects.filter(pk=instance.pk))
+    if instance.image and instance.variants_image != instance.image.name:
+        make_image_variants.enqueue(name=instance.image.name)
+
+
+@receiver(post_delete, sender=Recipes)
+def recipe_deleted(sender, instance, **kwargs):
+    change_counter(
+        User.objects.filter(pk=instance.author_id), 'recipes_count', -1
+    )
+
+
+RECIPE_COUNTERS = {
+    Favorite: 'favorites_count',
+    ShoppingCart: 'shopping_cart_count',
+}
+
+
+@receiver(post_save, sender=Favorite)
+@receiver(post_save, sender=ShoppingCart)
+def recipe_relation_saved(sender, instance, created, **kwargs):
+    if created:
+        change_counter(
+            Recipes.objects.filter(pk=instance.recipe_id),
+            RECIPE_COUNTERS[sender], 1
+        )
+
+
+@receiver(post_delete, sender=Favorite)
+@receiver(post_delete, sender=ShoppingCart)
+def recipe_relation_deleted(sender, instance, **kwargs):
+    change_counter(
+        Recipes.objects.filter(pk=instance.recipe_id),
+        RECIPE_COUNTERS[sender], -1
+    )
+
+
+@receiver(relations_changed, sender=Favorite)
+@receiver(relations_changed, sender=ShoppingCart)
+def recipe_relations_changed(sender, ids, added, **kwargs):
+    change_counter(
+        Recipes.objects.filter(pk__in=ids),
+        RECIPE_COUNTERS[sender], 1 if added else -1
+    )
+
+
+@receiver(post_save, sender=ShoppingCart)
+def cart_saved(sender, instance, created, **kwargs):
+    if created:
+        change_cart(instance.user_id, [instance.recipe_id], 1)
+
+
+@receiver(pre_delete, sender=ShoppingCart)
+def cart_deleting(sender, instance, **kwargs):
+    # До удаления: при удалении рецепта его ингредиенты удаляются
+    # в той же операции и после неё уже не найдутся.
+    change_cart(instance.user_id, [instance.recipe_id], -1)
+
+
+@receiver(relations_changed, sender=ShoppingCart)
+def cart_changed(sender, user_id, ids, added, **kwargs):
+    change_cart(user_id, ids, 1 if added else -1)
+
+
+@receiver(ingredients_changed, sender=Recipes)
+def recipe_ingredients_changed(sender, recipe_id, deltas, **kwargs):
+    change_recipe(recipe_id, deltas)
+
+
+@receiver(pre_save, sender=IngredientsRecipes)
+def recipe_ingredient_saving(sender, instance, **kwargs):
+    instance._saved_row = None if instance._state.adding else (
+        IngredientsRecipes.objects.filter(pk=instance.pk).values_list(
+            'recipes_id', 'ingredients_id', 'amount'
+        ).first()
+    )
+
+
+@receiver(post_save, sender=IngredientsRecipes)
+def recipe_ingredient_saved(sender, instance, **kwargs):
+    """Правка ингредиента рецепта, например в админке, меняет суммы."""
+    deltas = defaultdict(lambda: defaultdict(int))
+    saved = instance.__dict__.pop('_saved_row', None)
+    if saved is not None:
+        recipe, ingredient, amount = saved
+        deltas[recipe][ingredient] -= amount
+    deltas[instance.recipes_id][instance.ingredients_id] += instance.amount
+    for recipe, changes in deltas.items():
+        change_recipe(recipe, changes)
+
+
+@receiver(post_delete, sender=IngredientsRecipes)
+def recipe_ingredient_deleted(sender, instance, origin=None, **kwargs):
+    # При удалении рецепта, ингредиента или пользователя суммы
+    # уменьшаются удалением строк корзин и самих сумм.
+    model = origin.model if isinstance(origin, QuerySet) else type(origin)
+    if model is IngredientsRecipes:
+        change_recipe(
+            instance.recipes_id, {instance.ingredients_id: -instance.amount}
+        )
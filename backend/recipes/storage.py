@@ -0,0 +1,39 @@
+import hashlib
+import os
+from uuid import uuid4
+
+from django.core.files.storage import FileSystemStorage
+
+
+class ContentAddressedStorage(FileSystemStorage):
+    """Хранилище, которое называет файлы по хешу содержимого.
+
+    Имя, пришедшее от клиента, заменяется на sha256 содержимого с тем же
+    расширением, поэтому разные файлы с одинаковым именем не совпадают.
+    Файлы, производные от сохранённых (уменьшенные копии), пишутся под
+    своими именами через save_as. Файл с уже существующим именем не
+    сохраняется повторно, а запись идёт через временный файл, поэтому
+    одновременные загрузки одной и той же картинки безопасны.
+    """
+
+    def get_available_name(self, name, max_length=None):
+        return name
+
+    def content_name(self, name, content):
+        digest = hashlib.sha256()
+        for chunk in content.chunks():
+            digest.update(chunk)
+        content.seek(0)
+        directory, filename = os.path.split(name)
+        extension = os.path.splitext(filename)[1].lower()
+        return os.path.join(directory, digest.hexdigest() + extension)
+
+    def _save(self, name, content):
+        return self.save_as(self.content_name(name, content), content)
+
+    def save_as(self, name, content):
+        if self.exists(name):
+            return name
+        temp_name = super()._save(f'{name}.{uuid4().hex}.tmp', content)
+        os.replace(self.path(temp_name), self.path(name))
+        return name
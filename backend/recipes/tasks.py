@@ -0,0 +1,26 @@
+from jobs.queue import task
+
+from .feed import fan_out, fill_authors
+from .images import make_variants, variants_ready
+from .models import Recipes
+
+
+@task(priority=10)
+def fan_out_recipe(recipe_id):
+    """Раскладывает новый рецепт по лентам подписчиков автора."""
+    recipe = Recipes.objects.filter(pk=recipe_id).only('author').first()
+    if recipe is not None:
+        fan_out(recipe)
+
+
+@task(priority=5)
+def make_image_variants(name):
+    """Создаёт уменьшенные копии загруженного изображения."""
+    make_variants(Recipes._meta.get_field('image').storage, name)
+    variants_ready(Recipes, name)
+
+
+@task
+def fill_author_feeds(author_ids):
+    """Раскладывает рецепты авторов по лентам всех их подписчиков."""
+    fill_authors(author_ids)
@@ -0,0 +1,62 @@
+from unittest import mock
+
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from api.tests.factories import (create_catalog, create_recipes,
+                                 create_user, primary_only)
+from recipes.models import Favorite, Recipes, ShoppingCart
+from recipes.totals import lock_recipes
+
+
+@primary_only
+class RecipeCountersTest(TestCase):
+    """Правка рецепта не затирает счётчики, изменённые параллельно."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = create_user(0)
+        cls.reader = create_user(1)
+        cls.tags, cls.ingredients = create_catalog()
+        cls.recipe = create_recipes(
+            [cls.author], cls.tags, cls.ingredients, 1
+        )[0]
+
+    def assertCounters(self, favorites, shopping_cart):
+        self.assertEqual(
+            Recipes.objects.values_list(
+                'favorites_count', 'shopping_cart_count'
+            ).get(pk=self.recipe.pk),
+            (favorites, shopping_cart)
+        )
+
+    def test_patch_after_favorite(self):
+        def lock(ids):
+            # Рецепт уже загружен вьюхой, пока его добавляют в избранное.
+            Favorite.objects.create(user=self.reader, recipe=self.recipe)
+            ShoppingCart.objects.create(user=self.reader, recipe=self.recipe)
+            lock_recipes(ids)
+
+        client = APIClient()
+        client.force_authenticate(self.author)
+        with mock.patch('api.serializers.lock_recipes', side_effect=lock):
+            response = client.patch(f'/api/recipes/{self.recipe.pk}/', {
+                'ingredients': [{'id': self.ingredients[0].pk, 'amount': 5}],
+                'tags': [self.tags[0].pk],
+                'cooking_time': 15,
+            }, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertCounters(1, 1)
+        self.assertEqual(
+            Recipes.objects.get(pk=self.recipe.pk).cooking_time, 15
+        )
+
+    def test_stale_instance_save(self):
+        stale = Recipes.objects.get(pk=self.recipe.pk)
+        Favorite.objects.create(user=self.reader, recipe=self.recipe)
+        stale.name = 'Новое название'
+        stale.save()
+        self.assertCounters(1, 0)
+        self.assertEqual(
+            Recipes.objects.get(pk=self.recipe.pk).name, 'Новое название'
+        )
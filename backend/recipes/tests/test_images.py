@@ -0,0 +1,83 @@
+import io
+import tempfile
+
+from django.core.files.base import ContentFile
+from django.test import TestCase, override_settings
+from PIL import Image
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from api.serializers import RecipesSerializer
+from api.tests.factories import create_user
+from jobs.models import Job
+from recipes.images import variant_names
+from recipes.models import Recipes
+from recipes.tasks import make_image_variants
+
+
+@override_settings(JOBS_INLINE=False)
+class ImageVariantsTest(TestCase):
+    """Копии изображения отдаются только после их создания задачей."""
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        media = override_settings(MEDIA_ROOT=directory.name)
+        media.enable()
+        self.addCleanup(media.disable)
+        self.storage = Recipes._meta.get_field('image').storage
+        buffer = io.BytesIO()
+        Image.new('RGB', (800, 600), (200, 100, 50)).save(buffer, 'JPEG')
+        self.name = self.storage.save(
+            'recipes/images/photo.jpg', ContentFile(buffer.getvalue())
+        )
+        self.recipe = Recipes.objects.create(
+            name='Рецепт',
+            author=create_user(0),
+            text='Описание',
+            image=self.name,
+            cooking_time=1,
+        )
+
+    def variants(self):
+        request = Request(APIRequestFactory().get('/api/recipes/'))
+        recipe = Recipes.objects.defer('search_vector').get(
+            pk=self.recipe.pk
+        )
+        return RecipesSerializer(
+            recipe, context={'request': request}
+        ).data['image_variants']
+
+    def test_variants_after_task(self):
+        self.assertIsNone(self.variants())
+        make_image_variants(name=self.name)
+        variants = self.variants()
+        for width, names in variant_names(self.name).items():
+            for extension, name in names.items():
+                self.assertTrue(self.storage.exists(name))
+                self.assertTrue(
+                    variants[width][extension].endswith(self.storage.url(name))
+                )
+
+    def test_replaced_image(self):
+        make_image_variants(name=self.name)
+        Recipes.objects.filter(pk=self.recipe.pk).update(
+            image='recipes/images/other.jpg'
+        )
+        self.assertIsNone(self.variants())
+
+    def test_enqueue_only_for_new_image(self):
+        jobs = Job.objects.filter(name=make_image_variants.name)
+        self.assertEqual(jobs.count(), 1)
+        jobs.delete()
+        make_image_variants(name=self.name)
+        self.recipe.refresh_from_db()
+        self.recipe.cooking_time = 20
+        self.recipe.save()
+        self.assertFalse(jobs.exists())
+        self.recipe.image = 'recipes/images/other.jpg'
+        self.recipe.save()
+        self.assertEqual(
+            list(jobs.values_list('payload', flat=True)),
+            [{'name': 'recipes/images/other.jpg'}]
+        )
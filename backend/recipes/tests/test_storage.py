@@ -0,0 +1,37 @@
+import tempfile
+
+from django.core.files.base import ContentFile
+from django.test import SimpleTestCase
+
+from recipes.storage import ContentAddressedStorage
+
+
+class ContentAddressedStorageTest(SimpleTestCase):
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.storage = ContentAddressedStorage(location=directory.name)
+
+    def test_same_name_different_content(self):
+        first = self.storage.save('images/photo.JPG', ContentFile(b'first'))
+        second = self.storage.save('images/photo.JPG', ContentFile(b'second'))
+        self.assertNotEqual(first, second)
+        self.assertTrue(first.startswith('images/'))
+        self.assertTrue(first.endswith('.jpg'))
+        with self.storage.open(first) as file:
+            self.assertEqual(file.read(), b'first')
+        with self.storage.open(second) as file:
+            self.assertEqual(file.read(), b'second')
+
+    def test_same_content_different_name(self):
+        first = self.storage.save('images/a.png', ContentFile(b'image'))
+        second = self.storage.save('images/b.png', ContentFile(b'image'))
+        self.assertEqual(first, second)
+
+    def test_save_as(self):
+        name = self.storage.save_as(
+            'images/variants/a_320.webp', ContentFile(b'variant')
+        )
+        self.assertEqual(name, 'images/variants/a_320.webp')
+        self.assertTrue(self.storage.exists(name))
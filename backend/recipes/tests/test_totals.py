@@ -0,0 +1,89 @@
+from unittest import mock
+
+from django.db.models import Sum
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from api.tests.factories import (create_catalog, create_recipes,
+                                 create_user, primary_only)
+from recipes.models import (IngredientsRecipes, ShoppingCart,
+                            ShoppingCartTotal)
+
+
+@primary_only
+class ShoppingCartTotalTest(TestCase):
+    """Суммы корзин совпадают с агрегацией после каждого изменения."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.users = [create_user(0), create_user(1)]
+        cls.tags, cls.ingredients = create_catalog()
+        cls.recipes = create_recipes(
+            cls.users, cls.tags, cls.ingredients, 4
+        )
+        for user in cls.users:
+            for recipe in cls.recipes[1:]:
+                ShoppingCart.objects.create(user=user, recipe=recipe)
+
+    def assertTotals(self):
+        for user in self.users:
+            self.assertEqual(
+                dict(ShoppingCartTotal.objects.filter(
+                    user=user
+                ).values_list('ingredient_id', 'amount')),
+                dict(IngredientsRecipes.objects.filter(
+                    recipes__shoppingcartrecipe__user=user
+                ).values('ingredients').annotate(
+                    total=Sum('amount')
+                ).values_list('ingredients', 'total'))
+            )
+
+    def test_cart(self):
+        self.assertTotals()
+        ShoppingCart.objects.create(user=self.users[0], recipe=self.recipes[0])
+        self.assertTotals()
+        ShoppingCart.objects.filter(recipe=self.recipes[2]).delete()
+        self.assertTotals()
+
+    def test_update_recipe(self):
+        client = APIClient()
+        client.force_authenticate(self.users[1])
+        recipe = self.recipes[3]
+        with mock.patch('api.serializers.lock_recipes') as lock:
+            response = client.patch(f'/api/recipes/{recipe.pk}/', {
+                'ingredients': [
+                    {'id': self.ingredients[0].pk, 'amount': 50},
+                    {'id': self.ingredients[3].pk, 'amount': 7},
+                ],
+                'tags': [self.tags[0].pk],
+            }, format='json')
+        self.assertEqual(response.status_code, 200)
+        lock.assert_called_once_with([recipe.pk])
+        self.assertTotals()
+
+    def test_edit_ingredient_row(self):
+        link = IngredientsRecipes.objects.filter(
+            recipes=self.recipes[2]
+        ).first()
+        link.amount += 10
+        link.save()
+        self.assertTotals()
+        link.ingredients = self.ingredients[3]
+        link.save()
+        self.assertTotals()
+        IngredientsRecipes.objects.create(
+            recipes=self.recipes[1], ingredients=self.ingredients[2],
+            amount=4
+        )
+        self.assertTotals()
+        link.delete()
+        self.assertTotals()
+
+    def test_cascades(self):
+        self.recipes[1].delete()
+        self.assertTotals()
+        self.ingredients[0].delete()
+        self.assertTotals()
+        self.users[1].delete()
+        self.users = self.users[:1]
+        self.assertTotals()
@@ -0,0 +1,58 @@
+from datetime import timedelta
+
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from api.tests.factories import (create_catalog, create_recipes,
+                                 create_user, primary_only)
+from recipes.models import Favorite, ShoppingCart
+from recipes.trending import compute_trending, trending_scores
+
+
+@primary_only
+@override_settings(TRENDING_HALF_LIFE_HOURS=48, TRENDING_WINDOW_DAYS=14)
+class TrendingTest(TestCase):
+    """Вес событий затухает со временем, старые события не учитываются."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.now = timezone.now().replace(minute=0, second=0, microsecond=0)
+        users = [create_user(number) for number in range(3)]
+        tags, ingredients = create_catalog()
+        cls.recipes = [recipe.pk for recipe in create_recipes(
+            users[:1], tags, ingredients, 5, image=''
+        )]
+        fresh, half_life, cart, old, quarter = cls.recipes
+        cls.add(Favorite, users[:1], fresh, hours=0)
+        cls.add(Favorite, users, half_life, hours=48)
+        cls.add(ShoppingCart, users[:1], cart, hours=0)
+        cls.add(Favorite, users, old, hours=15 * 24)
+        cls.add(Favorite, users[:1], quarter, hours=96)
+
+    @classmethod
+    def add(cls, model, users, recipe, hours):
+        for user in users:
+            model.objects.create(user=user, recipe_id=recipe)
+        model.objects.filter(recipe_id=recipe).update(
+            created=cls.now - timedelta(hours=hours)
+        )
+
+    def test_scores(self):
+        fresh, half_life, cart, old, quarter = self.recipes
+        scores = trending_scores(self.now)
+        self.assertEqual(set(scores), {fresh, half_life, cart, quarter})
+        for recipe, score in ((fresh, 1.0), (half_life, 1.5),
+                              (cart, 0.5), (quarter, 0.25)):
+            self.assertAlmostEqual(scores[recipe], score)
+
+    @override_settings(TRENDING_SIZE=3)
+    def test_ordering(self):
+        fresh, half_life, cart, old, quarter = self.recipes
+        self.assertEqual(compute_trending(self.now), 3)
+        response = APIClient().get('/api/recipes/', {'ordering': 'trending'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [recipe['id'] for recipe in response.data['results']],
+            [half_life, fresh, cart]
+        )
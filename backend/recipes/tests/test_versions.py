@@ -0,0 +1,46 @@
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+
+from recipes.models import CatalogVersion, Ingredients
+from recipes.versions import bump_version, get_version
+
+
+@mock.patch.dict('recipes.versions._local_versions', clear=True)
+class CatalogVersionTest(TestCase):
+
+    def tearDown(self):
+        cache.clear()
+
+    def test_local_cache(self):
+        version = get_version(Ingredients)
+        self.assertEqual(get_version(Ingredients), version)
+        bumped = bump_version(Ingredients)
+        # Кеш другого процесса о сбросе не знает, версия читается из базы.
+        cache.clear()
+        self.assertEqual(get_version(Ingredients), bumped)
+        self.assertNotEqual(bumped, version)
+
+    @override_settings(CATALOG_VERSION_TIMEOUT=5)
+    @mock.patch('recipes.versions.time.monotonic', return_value=100.0)
+    def test_local_version_timeout(self, monotonic):
+        version = get_version(Ingredients)
+        with self.assertNumQueries(0):
+            self.assertEqual(get_version(Ingredients), version)
+        # Другой процесс изменил ингредиенты.
+        CatalogVersion.objects.filter(
+            label=Ingredients._meta.label_lower
+        ).update(version=version + 1)
+        self.assertEqual(get_version(Ingredients), version)
+        monotonic.return_value = 106.0
+        self.assertEqual(get_version(Ingredients), version + 1)
+
+    @mock.patch('recipes.versions.is_shared_cache', return_value=True)
+    def test_shared_cache(self, _):
+        version = get_version(Ingredients)
+        with self.captureOnCommitCallbacks(execute=True):
+            bumped = bump_version(Ingredients)
+            self.assertEqual(get_version(Ingredients), version)
+        with self.assertNumQueries(0):
+            self.assertEqual(get_version(Ingredients), bumped)
@@ -0,0 +1,115 @@
+"""Суммы ингредиентов в корзинах пользователей.
+
+Суммы хранятся в ShoppingCartTotal и меняются на разницу при
+добавлении и удалении рецептов из корзины и при изменении
+ингредиентов рецепта, поэтому список покупок читается без агрегации.
+
+Изменение корзины читает ингредиенты рецепта, а изменение ингредиентов
+читает корзины с рецептом. Чтобы параллельные транзакции не пропустили
+изменения друг друга, обе сначала блокируют строку рецепта.
+"""
+from django.db import connection, transaction
+
+from .models import (IngredientsRecipes, Recipes, ShoppingCart,
+                     ShoppingCartTotal)
+
+
+def _upsert(select):
+    """INSERT, прибавляющий к суммам строки (user, ingredient, amount)."""
+    table = ShoppingCartTotal._meta.db_table
+    return (
+        f'INSERT INTO {table} (user_id, ingredient_id, amount) {select} '
+        f'ON CONFLICT (user_id, ingredient_id) DO UPDATE '
+        f'SET amount = {table}.amount + excluded.amount'
+    )
+
+
+def _fill(totals, shopping_cart, ingredients_recipes, condition, params):
+    cart, links = shopping_cart._meta, ingredients_recipes._meta
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'INSERT INTO {totals._meta.db_table} '
+            f'(user_id, ingredient_id, amount) '
+            f'SELECT c.user_id, i.ingredients_id, SUM(i.amount) '
+            f'FROM {cart.db_table} c '
+            f'JOIN {links.db_table} i ON i.recipes_id = c.recipe_id '
+            f'WHERE {condition} '
+            f'GROUP BY c.user_id, i.ingredients_id',
+            params
+        )
+        return cursor.rowcount
+
+
+def rebuild_totals(totals, shopping_cart, ingredients_recipes):
+    """Пересчитывает суммы всех корзин."""
+    with transaction.atomic():
+        totals.objects.all().delete()
+        return _fill(totals, shopping_cart, ingredients_recipes, '1 = 1', [])
+
+
+def fill_totals(user_ids):
+    """Считает суммы корзин пользователей, у которых их ещё нет."""
+    user_ids = list(user_ids)
+    placeholders = ', '.join(['%s'] * len(user_ids))
+    return _fill(
+        ShoppingCartTotal, ShoppingCart, IngredientsRecipes,
+        f'c.user_id IN ({placeholders})', user_ids
+    )
+
+
+def lock_recipes(recipe_ids):
+    """Блокирует строки рецептов до конца транзакции в порядке id."""
+    list(Recipes.objects.select_for_update(no_key=True).filter(
+        pk__in=recipe_ids
+    ).order_by('pk').values_list('pk', flat=True))
+
+
+def change_cart(user_id, recipe_ids, sign):
+    """Прибавляет (sign=1) или вычитает (sign=-1) ингредиенты рецептов."""
+    recipe_ids = [int(pk) for pk in recipe_ids]
+    placeholders = ', '.join(['%s'] * len(recipe_ids))
+    table = ShoppingCartTotal._meta.db_table
+    with transaction.atomic(), connection.cursor() as cursor:
+        lock_recipes(recipe_ids)
+        cursor.execute(_upsert(
+            f'SELECT %s, ingredients_id, %s * SUM(amount) '
+            f'FROM {IngredientsRecipes._meta.db_table} '
+            f'WHERE recipes_id IN ({placeholders}) '
+            f'GROUP BY ingredients_id'
+        ), [user_id, sign, *recipe_ids])
+        if sign < 0:
+            cursor.execute(
+                f'DELETE FROM {table} WHERE user_id = %s AND amount <= 0',
+                [user_id]
+            )
+
+
+def change_recipe(recipe_id, deltas):
+    """Применяет изменения ингредиентов рецепта к корзинам с ним.
+
+    deltas — словарь {id ингредиента: изменение количества}.
+    """
+    deltas = {pk: delta for pk, delta in deltas.items() if delta}
+    if not deltas:
+        return
+    table = ShoppingCartTotal._meta.db_table
+    cart = ShoppingCart._meta.db_table
+    with transaction.atomic(), connection.cursor() as cursor:
+        lock_recipes([recipe_id])
+        cursor.executemany(_upsert(
+            f'SELECT user_id, %s, %s FROM {cart} WHERE recipe_id = %s'
+        ), [
+            [ingredient, delta, recipe_id]
+            for ingredient, delta in deltas.items()
+        ])
+        removed = [pk for pk, delta in deltas.items() if delta < 0]
+        if not removed:
+            return
+        placeholders = ', '.join(['%s'] * len(removed))
+        cursor.execute(
+            f'DELETE FROM {table} WHERE amount <= 0 '
+            f'AND ingredient_id IN ({placeholders}) '
+            f'AND user_id IN (SELECT user_id FROM {cart} '
+            f'WHERE recipe_id = %s)',
+            [*removed, recipe_id]
+        )
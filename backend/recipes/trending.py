@@ -0,0 +1,63 @@
+"""Рейтинг популярности рецептов с затуханием по времени.
+
+Каждое добавление в избранное или корзину за последние
+TRENDING_WINDOW_DAYS дней добавляет рецепту вес события, который
+уменьшается вдвое каждые TRENDING_HALF_LIFE_HOURS часов. Рейтинг
+считается командой computetrending и хранится в TrendingRecipe.
+"""
+import heapq
+from collections import defaultdict
+from datetime import timedelta
+from operator import itemgetter
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count
+from django.db.models.functions import TruncHour
+from django.utils import timezone
+
+from .models import Favorite, ShoppingCart, TrendingRecipe
+
+EVENT_WEIGHTS = {
+    Favorite: 1.0,
+    ShoppingCart: 0.5,
+}
+
+
+def trending_scores(now=None):
+    """Популярность рецептов с событиями в окне, {id рецепта: вес}.
+
+    События агрегируются в базе по часам, поэтому в Python приходит не
+    больше строк, чем пар «рецепт, час» с активностью.
+    """
+    now = now or timezone.now()
+    since = now - timedelta(days=settings.TRENDING_WINDOW_DAYS)
+    half_life = settings.TRENDING_HALF_LIFE_HOURS * 3600
+    scores = defaultdict(float)
+    for model, weight in EVENT_WEIGHTS.items():
+        rows = model.objects.filter(created__gte=since).annotate(
+            hour=TruncHour('created')
+        ).values('recipe', 'hour').annotate(
+            events=Count('pk')
+        ).order_by()
+        for row in rows.iterator():
+            age = max((now - row['hour']).total_seconds(), 0)
+            scores[row['recipe']] += (
+                weight * row['events'] * 0.5 ** (age / half_life)
+            )
+    return scores
+
+
+def compute_trending(now=None):
+    """Заменяет рейтинг TRENDING_SIZE самыми популярными рецептами."""
+    top = heapq.nlargest(
+        settings.TRENDING_SIZE, trending_scores(now).items(),
+        key=itemgetter(1),
+    )
+    with transaction.atomic():
+        TrendingRecipe.objects.all().delete()
+        TrendingRecipe.objects.bulk_create(
+            TrendingRecipe(recipe_id=recipe, score=score)
+            for recipe, score in top
+        )
+    return len(top)
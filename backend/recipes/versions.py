@@ -0,0 +1,79 @@
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, transaction
+
+from .models import CatalogVersion
+
+LOCAL_CACHE_BACKENDS = (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+)
+
+
+def is_shared_cache():
+    """Виден ли кеш Django всем процессам (Redis, Memcached, база)."""
+    return settings.CACHES['default']['BACKEND'] not in LOCAL_CACHE_BACKENDS
+
+
+# Версии, прочитанные из базы без общего кеша: {ключ: (версия, срок)}.
+_local_versions = {}
+
+
+def _version_key(model):
+    return f'catalog-version:{model._meta.label_lower}'
+
+
+def _load_version(model):
+    version, _ = CatalogVersion.objects.using(
+        DEFAULT_DB_ALIAS
+    ).get_or_create(
+        label=model._meta.label_lower, defaults={'version': time.time()}
+    )
+    return version.version
+
+
+def get_version(model):
+    """Текущая версия данных модели.
+
+    Версия хранится в базе, общий кеш только избавляет от запроса к ней.
+    Кеш процесса другим процессам не виден, поэтому с ним версия
+    запоминается в процессе на CATALOG_VERSION_TIMEOUT секунд: изменения
+    из других процессов становятся видны с такой задержкой.
+    """
+    shared = is_shared_cache()
+    key = _version_key(model)
+    if shared:
+        version = cache.get(key)
+        if version is not None:
+            return version
+    else:
+        version, expires = _local_versions.get(key, (None, 0))
+        if expires > time.monotonic():
+            return version
+    version = _load_version(model)
+    if shared:
+        cache.add(key, version, None)
+    else:
+        _local_versions[key] = (
+            version, time.monotonic() + settings.CATALOG_VERSION_TIMEOUT
+        )
+    return version
+
+
+def bump_version(model):
+    """Сбросить закешированные данные модели во всех процессах."""
+    version = time.time()
+    CatalogVersion.objects.update_or_create(
+        label=model._meta.label_lower, defaults={'version': version}
+    )
+    key = _version_key(model)
+    if is_shared_cache():
+        transaction.on_commit(lambda: cache.set(key, version, None))
+    else:
+        # До фиксации другие потоки читают старую версию и могут её
+        # запомнить, поэтому запись сбрасывается ещё раз после фиксации.
+        _local_versions.pop(key, None)
+        transaction.on_commit(lambda: _local_versions.pop(key, None))
+    return version
@@ -4,6 +4,7 @@ from .models import CustomUser, Subscribe
 
 
 class CustomUserAdmin(admin.ModelAdmin):
+    list_display = ('username', 'email', 'recipes_count', 'followers_count')
     list_filter = ('email', 'username')
 
 
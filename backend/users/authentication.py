@@ -0,0 +1,170 @@
+import hashlib
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import transaction
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.authtoken.models import Token
+from rest_framework.permissions import SAFE_METHODS
+
+from recipes.versions import is_shared_cache
+
+
+class LocalTokenCache:
+    """Ограниченный LRU-кеш «токен → пользователь» со сроком жизни.
+
+    generation растёт при каждом сбросе записей: set с поколением,
+    прочитанным до загрузки пользователя, не вернёт в кеш данные,
+    сброшенные во время загрузки.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self.generation = 0
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            user, expires = entry
+            if expires < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return user
+
+    def set(self, key, user, generation):
+        expires = time.monotonic() + settings.TOKEN_CACHE_LOCAL_TIMEOUT
+        with self._lock:
+            if generation != self.generation:
+                return
+            self._entries[key] = (user, expires)
+            self._entries.move_to_end(key)
+            while len(self._entries) > settings.TOKEN_CACHE_SIZE:
+                self._entries.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self.generation += 1
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self.generation += 1
+            self._entries.clear()
+
+
+local_tokens = LocalTokenCache()
+
+
+def token_cache_key(key):
+    return f'auth-token:{hashlib.sha256(key.encode()).hexdigest()}'
+
+
+def generation_key(key):
+    return f'{token_cache_key(key)}:generation'
+
+
+def user_state(user):
+    """Значения полей пользователя для хранения в кеше."""
+    return user._state.db, [
+        getattr(user, field.attname)
+        for field in user._meta.concrete_fields
+    ]
+
+
+def restore_user(state):
+    """Новый объект пользователя из user_state, без общих с кешем данных."""
+    db, values = state
+    model = get_user_model()
+    return model.from_db(db, [
+        field.attname for field in model._meta.concrete_fields
+    ], values)
+
+
+def drop_tokens(keys):
+    for key in keys:
+        local_tokens.delete(key)
+    if is_shared_cache():
+        generation = uuid.uuid4().hex
+        cache.set_many({
+            generation_key(key): generation for key in keys
+        }, settings.TOKEN_CACHE_TIMEOUT * 2)
+        cache.delete_many([token_cache_key(key) for key in keys])
+
+
+def invalidate_tokens(keys):
+    """Сбрасывает кешированных пользователей для токенов keys.
+
+    Общий кеш очищается сразу и повторно после фиксации транзакции:
+    запрос, загрузивший пользователя до фиксации, не сохранит его в
+    кеш, потому что поколение записей токена сменилось. Локальные кеши
+    других процессов очищаются по истечении TOKEN_CACHE_LOCAL_TIMEOUT.
+    """
+    keys = list(keys)
+    drop_tokens(keys)
+    transaction.on_commit(lambda: drop_tokens(keys))
+
+
+def local_user(key):
+    """Пользователь токена из LRU-кеша процесса или None."""
+    state = local_tokens.get(key)
+    return None if state is None else restore_user(state)
+
+
+def cached_user(key):
+    """Пользователь токена из кешей или None, если его там нет."""
+    local_generation = local_tokens.generation
+    state = local_tokens.get(key)
+    if state is None:
+        if not is_shared_cache():
+            return None
+        entries = cache.get_many([token_cache_key(key), generation_key(key)])
+        generation, state = entries.get(token_cache_key(key), (None, None))
+        if state is None or generation != entries.get(generation_key(key)):
+            return None
+        local_tokens.set(key, state, local_generation)
+    return restore_user(state)
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """TokenAuthentication без запроса к базе для известных токенов.
+
+    Пользователь токена хранится в LRU-кеше процесса и в общем кеше
+    Django. Записи сбрасываются при удалении токена (выход из системы)
+    и при сохранении пользователя: смене пароля, деактивации,
+    изменении профиля. Кеш Django внутри процесса (LocMemCache) другие
+    процессы не сбрасывают, поэтому с ним используется только LRU-кеш
+    с коротким сроком жизни. Изменяющие запросы загружают пользователя
+    из базы: его могут сохранить, а кешированная копия могла устареть.
+    """
+    use_cache = True
+
+    def authenticate(self, request):
+        self.use_cache = request.method in SAFE_METHODS
+        return super().authenticate(request)
+
+    def authenticate_credentials(self, key):
+        user = cached_user(key) if self.use_cache else None
+        if user is None:
+            local_generation = local_tokens.generation
+            shared = is_shared_cache()
+            if shared:
+                generation = cache.get(generation_key(key))
+            user, token = super().authenticate_credentials(key)
+            state = user_state(user)
+            if shared:
+                cache.set(token_cache_key(key), (generation, state),
+                          settings.TOKEN_CACHE_TIMEOUT)
+            local_tokens.set(key, state, local_generation)
+            return user, token
+        token = Token(key=key, user=user)
+        token._state.adding = False
+        return user, token
@@ -1,9 +1,13 @@
 from django.contrib.auth.models import AbstractUser
 from django.db import models
 
+from recipes.counters import CountersMixin
 
-class CustomUser(AbstractUser):
+
+class CustomUser(CountersMixin, AbstractUser):
     """Кастомная модель пользователя."""
+    counter_fields = ('recipes_count', 'followers_count')
+
     email = models.EmailField(
         unique=True,
         max_length=254,
@@ -17,6 +21,16 @@ class CustomUser(AbstractUser):
     first_name = models.CharField(max_length=150, verbose_name='имя')
     last_name = models.CharField(max_length=150, verbose_name='фамилия')
     password = models.CharField(max_length=150, verbose_name='пароль')
+    recipes_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='рецептов'
+    )
+    followers_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='подписчиков'
+    )
 
     class Meta:
         verbose_name = 'пользователь'
@@ -1,8 +1,11 @@
+from django.db.models import F, Window
+from django.db.models.functions import RowNumber
 from djoser.serializers import UserSerializer
 from rest_framework import serializers
 from rest_framework.serializers import ModelSerializer
 from rest_framework.validators import UniqueTogetherValidator
 
+from api.viewer import get_viewer
 from recipes.models import Recipes
 
 from .models import CustomUser, Subscribe
@@ -16,6 +19,7 @@ class CustomUserSerializer(UserSerializer):
         model = CustomUser
         fields = ['id', 'email', 'username', 'first_name', 'last_name',
                   'password', 'is_subscribed']
+        extra_kwargs = {'password': {'write_only': True}}
 
     def create(self, validated_data):
         user = CustomUser.objects.create(
@@ -29,10 +33,10 @@ class CustomUserSerializer(UserSerializer):
         return user
 
     def get_is_subscribed(self, obj):
-        user = self.context.get('request').user
-        if user.is_anonymous:
-            return False
-        return Subscribe.objects.filter(user=user, author=obj).exists()
+        if hasattr(obj, 'is_subscribed'):
+            return obj.is_subscribed
+        viewer = get_viewer(self.context.get('request'))
+        return obj.pk in viewer.subscriptions
 
 
 class PasswordSerializer(serializers.ModelSerializer):
@@ -45,6 +49,15 @@ class PasswordSerializer(serializers.ModelSerializer):
         fields = ['new_password', 'current_password']
 
 
+class AuthorIdsSerializer(serializers.Serializer):
+    """Список id авторов для пакетных подписок."""
+    authors = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        allow_empty=False,
+        max_length=1000,
+    )
+
+
 class ShowSubscribeSerializer(ModelSerializer):
     """Сериализатор для отображения подписок."""
 
@@ -56,7 +69,7 @@ class ShowSubscribeSerializer(ModelSerializer):
 class SubscribeSerializer(CustomUserSerializer):
     """Сериализатор для подписок."""
     recipes = serializers.SerializerMethodField()
-    recipes_count = serializers.SerializerMethodField()
+    recipes_count = serializers.ReadOnlyField()
 
     class Meta:
         model = CustomUser
@@ -78,13 +91,40 @@ class SubscribeSerializer(CustomUserSerializer):
         return data
 
     def get_recipes(self, obj):
-        request = self.context.get('request')
-        limit = request.GET.get('recipes_limit')
-        queryset = Recipes.objects.filter(author=obj)
-        if limit:
-            queryset = queryset[:int(limit)]
+        recipes = self.context.get('recipes')
+        if recipes is not None:
+            queryset = recipes.get(obj.pk, [])
+        else:
+            limit = get_recipes_limit(self.context.get('request'))
+            queryset = Recipes.objects.filter(author=obj)
+            if limit is not None:
+                queryset = queryset[:limit]
         serializer = ShowSubscribeSerializer(queryset, many=True)
         return serializer.data
 
-    def get_recipes_count(self, obj):
-        return Recipes.objects.filter(author=obj).count()
+
+def get_recipes_limit(request):
+    """Параметр recipes_limit запроса: число или None."""
+    limit = request.query_params.get('recipes_limit')
+    if limit is None:
+        return None
+    if not limit.isdigit():
+        raise serializers.ValidationError(
+            'recipes_limit должен быть положительным числом.'
+        )
+    return int(limit)
+
+
+def get_recipes_preview(authors, limit=None):
+    """Рецепты для страницы авторов одним оконным запросом."""
+    queryset = Recipes.objects.filter(author__in=authors)
+    if limit is not None:
+        queryset = queryset.annotate(row_number=Window(
+            RowNumber(),
+            partition_by=F('author'),
+            order_by=F('id').desc(),
+        )).filter(row_number__lte=limit)
+    recipes = {}
+    for recipe in queryset:
+        recipes.setdefault(recipe.author_id, []).append(recipe)
+    return recipes
@@ -0,0 +1,53 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from rest_framework.authtoken.models import Token
+
+from recipes.counters import change_counter
+from recipes.feed import update_feed
+from recipes.relations import relations_changed
+
+from .authentication import invalidate_tokens
+from .models import CustomUser, Subscribe
+
+
+@receiver(post_save, sender=Subscribe)
+def subscribe_saved(sender, instance, created, **kwargs):
+    if created:
+        change_counter(
+            CustomUser.objects.filter(pk=instance.author_id),
+            'followers_count', 1
+        )
+        update_feed(instance.user_id, [instance.author_id], True)
+
+
+@receiver(post_delete, sender=Subscribe)
+def subscribe_deleted(sender, instance, **kwargs):
+    change_counter(
+        CustomUser.objects.filter(pk=instance.author_id),
+        'followers_count', -1
+    )
+    update_feed(instance.user_id, [instance.author_id], False)
+
+
+@receiver(relations_changed, sender=Subscribe)
+def subscriptions_changed(sender, user_id, ids, added, **kwargs):
+    change_counter(
+        CustomUser.objects.filter(pk__in=ids),
+        'followers_count', 1 if added else -1
+    )
+    update_feed(user_id, ids, added)
+
+
+@receiver(post_delete, sender=Token)
+def token_deleted(sender, instance, **kwargs):
+    invalidate_tokens([instance.key])
+
+
+@receiver(post_save, sender=CustomUser)
+def user_saved(sender, instance, created, **kwargs):
+    """Смена пароля, деактивация и правка профиля сбрасывают кеш токенов."""
+    if not created:
+        invalidate_tokens(Token.objects.filter(
+            user=instance
+        ).values_list('key', flat=True))
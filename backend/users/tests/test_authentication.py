@@ -0,0 +1,97 @@
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import TestCase
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.test import APIClient
+
+from api.tests.factories import create_user, primary_only
+from users.authentication import (cached_user, invalidate_tokens,
+                                  local_tokens, token_cache_key)
+from users.models import CustomUser
+
+authenticate_credentials = TokenAuthentication.authenticate_credentials
+
+
+@primary_only
+class TokenCacheTest(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = create_user(0)
+
+    def setUp(self):
+        self.client = APIClient()
+        response = self.client.post('/api/auth/token/login/', {
+            'email': self.user.email, 'password': 'password'
+        })
+        self.token = response.data['auth_token']
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token}')
+
+    def tearDown(self):
+        local_tokens.clear()
+        cache.clear()
+
+    def me(self):
+        return self.client.get('/api/users/me/').status_code
+
+    def test_logout(self):
+        self.assertEqual(self.me(), 200)
+        self.assertEqual(
+            self.client.post('/api/auth/token/logout/').status_code, 204
+        )
+        self.assertEqual(self.me(), 401)
+
+    def test_local_cache_not_shared(self):
+        self.assertEqual(self.me(), 200)
+        self.assertIsNone(cache.get(token_cache_key(self.token)))
+        # Другой процесс с пустым LRU-кешем проверяет токен по базе.
+        local_tokens.clear()
+        self.user.auth_token.delete()
+        self.assertEqual(self.me(), 401)
+
+    @mock.patch('users.authentication.is_shared_cache', return_value=True)
+    def test_shared_cache(self, _):
+        self.assertEqual(self.me(), 200)
+        self.assertIsNotNone(cache.get(token_cache_key(self.token)))
+        with self.assertNumQueries(1):
+            local_tokens.clear()
+            self.assertEqual(self.me(), 200)
+        self.assertEqual(
+            self.client.post('/api/auth/token/logout/').status_code, 204
+        )
+        self.assertIsNone(cache.get(token_cache_key(self.token)))
+        self.assertEqual(self.me(), 401)
+
+    def test_write_loads_user(self):
+        self.assertEqual(self.me(), 200)
+        CustomUser.objects.filter(pk=self.user.pk).update(
+            is_active=False, first_name='Другое'
+        )
+        self.assertEqual(self.me(), 200)
+        response = self.client.patch('/api/users/me/', {'last_name': 'Ф'})
+        self.assertEqual(response.status_code, 401)
+
+    def test_cached_copies_independent(self):
+        self.assertEqual(self.me(), 200)
+        first, second = cached_user(self.token), cached_user(self.token)
+        self.assertEqual(first, second)
+        self.assertIsNot(first._state, second._state)
+        first.first_name = 'Другое'
+        self.assertEqual(cached_user(self.token).first_name, 'Имя')
+
+    @mock.patch('users.authentication.is_shared_cache', return_value=True)
+    def test_invalidated_during_load(self, _):
+        def load(auth, key):
+            result = authenticate_credentials(auth, key)
+            # Пользователя деактивировали, пока запрос читал его из базы.
+            invalidate_tokens([key])
+            return result
+
+        with mock.patch.object(
+            TokenAuthentication, 'authenticate_credentials',
+            autospec=True, side_effect=load
+        ):
+            self.assertEqual(self.me(), 200)
+        self.assertIsNotNone(cache.get(token_cache_key(self.token)))
+        self.assertIsNone(cached_user(self.token))
@@ -0,0 +1,41 @@
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from api.tests.factories import (create_catalog, create_recipes,
+                                 create_relations, create_user,
+                                 primary_only)
+
+
+@primary_only
+class SubscriptionsTest(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = create_user(0)
+        author = create_user(1)
+        tags, ingredients = create_catalog()
+        create_recipes([author], tags, ingredients, 3)
+        create_relations(cls.user, [], [author])
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def get(self, limit):
+        return self.client.get(
+            '/api/users/subscriptions/', {'recipes_limit': limit}
+        )
+
+    def test_recipes_limit(self):
+        response = self.get('2')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data['results'][0]['recipes']), 2)
+
+    def test_invalid_recipes_limit(self):
+        for limit in ('abc', '-1', '1.5'):
+            with self.subTest(limit=limit):
+                self.assertEqual(self.get(limit).status_code, 400)
+
+    def test_anonymous(self):
+        response = APIClient().get('/api/users/subscriptions/')
+        self.assertEqual(response.status_code, 401)
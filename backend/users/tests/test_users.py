@@ -0,0 +1,74 @@
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+
+from api.tests.factories import create_token, create_user, primary_only
+from users.models import CustomUser, Subscribe
+
+
+@primary_only
+class UserPasswordTest(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = create_user(0)
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_password_not_returned(self):
+        for fast in (False, True):
+            with self.subTest(fast=fast), override_settings(
+                FAST_READ_PATH=fast
+            ):
+                for url in ('/api/users/', f'/api/users/{self.user.pk}/',
+                            '/api/users/me/'):
+                    self.assertNotIn(b'password', self.client.get(
+                        url
+                    ).content)
+
+    def test_create_user(self):
+        response = APIClient().post('/api/users/', {
+            'email': 'new@example.com',
+            'username': 'new',
+            'first_name': 'Имя',
+            'last_name': 'Фамилия',
+            'password': 'Secret-password-1',
+        })
+        self.assertEqual(response.status_code, 201)
+        self.assertNotIn('password', response.data)
+        self.assertTrue(CustomUser.objects.get(
+            email='new@example.com'
+        ).check_password('Secret-password-1'))
+
+
+@primary_only
+class UserCountersTest(TestCase):
+    """Сохранение профиля не затирает счётчики, изменённые параллельно."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = create_user(0)
+        cls.follower = create_user(1)
+
+    def test_patch_after_subscribe(self):
+        client = APIClient()
+        client.credentials(
+            HTTP_AUTHORIZATION=f'Token {create_token(self.user)}'
+        )
+        self.assertEqual(client.get('/api/users/me/').status_code, 200)
+        Subscribe.objects.create(user=self.follower, author=self.user)
+        response = client.patch('/api/users/me/', {'first_name': 'Новое'})
+        self.assertEqual(response.status_code, 200)
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.first_name, 'Новое')
+        self.assertEqual(self.user.followers_count, 1)
+
+    def test_stale_instance_save(self):
+        stale = CustomUser.objects.get(pk=self.user.pk)
+        Subscribe.objects.create(user=self.follower, author=self.user)
+        stale.set_password('new-password')
+        stale.save()
+        self.user.refresh_from_db()
+        self.assertTrue(self.user.check_password('new-password'))
+        self.assertEqual(self.user.followers_count, 1)
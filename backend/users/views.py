@@ -1,3 +1,5 @@
+from django.conf import settings
+from django.db.models import Value
 from django.shortcuts import get_object_or_404
 from django.utils.translation import gettext_lazy as _
 from djoser.views import UserViewSet
@@ -8,17 +10,24 @@ from rest_framework.pagination import PageNumberPagination
 from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework.response import Response
 
-from api.permissions import IsAuthorOrReadOnly
+from api.fastpath import user_rows
+from api.metrics import timed_serializer
+from api.mixins import SerializerTimingMixin
+from api.querysets import users_for_user
+from recipes.relations import add_relations, remove_relations
 
 from .models import CustomUser, Subscribe
 from .serializers import (
+    AuthorIdsSerializer,
     CustomUserSerializer,
     PasswordSerializer,
-    SubscribeSerializer
+    SubscribeSerializer,
+    get_recipes_limit,
+    get_recipes_preview
 )
 
 
-class CustomUserViewSet(UserViewSet):
+class CustomUserViewSet(SerializerTimingMixin, UserViewSet):
     """Вьюсет для кастомного пользователя."""
     pagination_class = PageNumberPagination
     permission_classes = (AllowAny,)
@@ -29,6 +38,11 @@ class CustomUserViewSet(UserViewSet):
 
     def list(self, request, *args, **kwargs):
         queryset = self.filter_queryset(self.get_queryset())
+        if settings.FAST_READ_PATH:
+            page = self.paginate_queryset(
+                user_rows(users_for_user(request.user, queryset))
+            )
+            return self.get_paginated_response(list(page))
         serializer = self.get_serializer(queryset, many=True)
         page = self.paginate_queryset(queryset)
         if page is not None:
@@ -38,51 +52,68 @@ class CustomUserViewSet(UserViewSet):
         return Response(serializer.data)
 
     @action(detail=False, url_path='subscriptions', url_name='subscriptions',
-            permission_classes=[IsAuthorOrReadOnly])
+            permission_classes=[IsAuthenticated])
     def subscriptions(self, request):
-        user = self.request.user
-        subscriptions = user.follower.all()
-        authors = [item.author.id for item in subscriptions]
-        queryset = CustomUser.objects.filter(pk__in=authors)
-        serializer = SubscribeSerializer(
-            queryset, many=True, context={'request': request}
-        )
-        page = self.paginate_queryset(serializer.data)
-        return self.get_paginated_response(page)
+        limit = get_recipes_limit(request)
+        queryset = CustomUser.objects.filter(
+            following__user=request.user
+        ).annotate(is_subscribed=Value(True))
+        page = self.paginate_queryset(queryset)
+        serializer = timed_serializer(SubscribeSerializer(
+            page, many=True, context={
+                'request': request,
+                'recipes': get_recipes_preview(page, limit),
+            }
+        ))
+        return self.get_paginated_response(serializer.data)
 
     @action(methods=['post', 'delete'], detail=True,
             url_path='subscribe', url_name='subscribe',
             permission_classes=[IsAuthenticated])
     def subscribe(self, request, id=None):
         user = self.request.user
-        author = get_object_or_404(CustomUser, id=id)
+        if not str(id).isdigit():
+            raise exceptions.NotFound()
         if self.request.method == 'POST':
-            if user == author:
+            if int(id) == user.id:
                 raise exceptions.ValidationError(
                     'Нельзя подписаться на самого себя.'
                 )
-            if Subscribe.objects.filter(user=user,
-                                        author=author).exists():
+            if not add_relations(Subscribe, user.id, [id]):
+                get_object_or_404(CustomUser, id=id)
                 raise exceptions.ValidationError('Подписка уже оформлена.')
-            Subscribe.objects.create(user=user, author=author)
+            author = CustomUser.objects.annotate(
+                is_subscribed=Value(True)
+            ).get(id=id)
             serializer = self.get_serializer(author)
             return Response(serializer.data, status=status.HTTP_201_CREATED)
 
         if self.request.method == 'DELETE':
-            if not Subscribe.objects.filter(user=user,
-                                            author=author).exists():
+            if not remove_relations(Subscribe, user.id, [id]):
+                get_object_or_404(CustomUser, id=id)
                 raise exceptions.ValidationError(
                     'Вы уже удалили подписку.'
                 )
-            subscription = get_object_or_404(
-                Subscribe,
-                user=user,
-                author=author
-            )
-            subscription.delete()
             return Response(status=status.HTTP_204_NO_CONTENT)
         return Response(status=status.HTTP_405_METHOD_NOT_ALLOWED)
 
+    @action(methods=['post', 'delete'], detail=False,
+            url_path='subscribe', url_name='subscribe-batch',
+            permission_classes=[IsAuthenticated])
+    def subscribe_batch(self, request):
+        serializer = AuthorIdsSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        authors = [
+            author for author in serializer.validated_data['authors']
+            if author != request.user.id
+        ]
+        if self.request.method == 'POST':
+            added = add_relations(Subscribe, request.user.id, authors)
+            return Response({'authors': added},
+                            status=status.HTTP_201_CREATED)
+        removed = remove_relations(Subscribe, request.user.id, authors)
+        return Response({'authors': removed})
+
 
 class ChangePasswordView(CreateAPIView):
     """Изменение пароля."""